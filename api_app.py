@@ -1,72 +1,282 @@
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse, Response, JSONResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from database.db_manager import DatabaseManager
-import cv2, torch, time, numpy as np, json
+from contextlib import asynccontextmanager
+from database.factory import create_database_manager
+from database.durable_writer import DurableWriter
+import cv2, os, threading, time, numpy as np
 from datetime import datetime, timedelta
-from ultralytics import YOLO
 from config.config import Config
-from core.polygon import PolygonChecker
-from core.counter import PeopleCounter
+from core.polygon import PolygonChecker, scale_points
+from core.capture import open_capture
+from core.backoff import Backoff
+from core.polygon_registry import PolygonRegistry
+from core.model_manager import ModelManager, detect_device, load_yolo
+from core.inference_profile import load_profile, apply_profile, prepare_model
+from core.adaptive_resolution import create_resolution_controller
+from core.sliced_inference import create_sliced_tracker, track_frame
+from core.track_propagation import create_detection_scheduler
+from core.counter import create_counter
+from core.event_buffer import EventBuffer
+from core.response_cache import ResponseCache
+from core.timeseries import OccupancyTimeSeries
+from core.dwell import DwellAnalytics
+from core.heatmap import OccupancyHeatmap
+from core.sketches import HyperLogLog
+from core.visitors import UniqueVisitorCounter
+from core.clip_recorder import create_clip_recorder
+from core.snapshots import create_snapshot_store
 
 from pydantic import BaseModel
 from typing import List
 
-app = FastAPI()
+config = Config()
+response_cache = ResponseCache(max_entries=config.RESPONSE_CACHE_MAX_ENTRIES,
+                               ttls=config.RESPONSE_CACHE_TTL)
+
+# Database, polygon registry dan model diinisialisasi di background saat startup (lifespan),
+# sampai siap nilainya None dan endpoint yang membutuhkan membalas 503
+db = None
+writer = None
+polygon_registry = None
+model_manager = None
+sliced = None  # SlicedTracker (Config.SLICED_INFERENCE), dibuat bersama model
+
+startup_status = {
+    'database': {'state': 'pending', 'error': None, 'attempts': 0, 'ready_at': None},
+    'model': {'state': 'pending', 'error': None, 'ready_at': None}
+}
+_shutdown = threading.Event()
+frame_scale = (1.0, 1.0)  # Skala polygon (koordinat source) ke frame output capture
+
+inference_profile = load_profile(config)
+resolution = create_resolution_controller(config, inference_profile['imgsz'])
+detection_scheduler = create_detection_scheduler(config)
+pipeline_metrics = {'frames': 0, 'fps': 0.0, 'inference_ms': None, 'detections': 0, 'updated_at': None}
+
+# Sampai database siap, counter memakai default polygon (di-swap setelah registry ter-load)
+polygon_points = config.DEFAULT_POLYGON
+polygon_name = "Default Area"
+polygon_id = None
+polygon_detached = False  # Area counter dihapus, menunggu polygon aktif baru
+polygon_checker = PolygonChecker(polygon_points)
+
+counter = create_counter(config, polygon_checker, EventBuffer(config.EVENT_BUFFER_CAPACITY,
+                                                              config.EVENT_BUFFER_OVERFLOW,
+                                                              config.EVENT_SPILL_DIR))
+occupancy_history = OccupancyTimeSeries(config.OCCUPANCY_HISTORY_SECONDS, config.OCCUPANCY_HISTORY_GAP_TOLERANCE)
+dwell_analytics = DwellAnalytics(config.DWELL_SKETCH_ACCURACY, config.DWELL_RETENTION_HOURS)
+heatmap = OccupancyHeatmap(config.HEATMAP_SCALE, config.HEATMAP_HALF_LIFE,
+                           config.HEATMAP_DIR, config.HEATMAP_SNAPSHOT_INTERVAL) if config.HEATMAP_ENABLED else None
+visitor_counter = UniqueVisitorCounter(config.CAMERA_ID, config.HLL_PRECISION, config.VISITOR_FLUSH_INTERVAL)
+
+
+def save_clip(clip):
+    # Dipanggil dari writer thread ClipRecorder setelah file MP4 selesai
+    if writer is None:
+        print(f"⚠️ Database not ready, clip not referenced: {clip['file_path']}")
+        return
+    writer.save_event_clip(clip, config.CAMERA_ID, config.VIDEO_SOURCE)
+
+
+clips = create_clip_recorder(config, save_clip)
+snapshots = create_snapshot_store(config)
+
+
+def on_polygon_change(changed_id, entry):
+    """
+    Listener PolygonRegistry: invalidasi cache response, swap geometry counter
+    jika area yang sedang dihitung diedit, lepas area jika dihapus
+    """
+    global polygon_detached
+
+    response_cache.invalidate('polygon_list', 'polygon')
+    if changed_id == counter.area_id:
+        if entry is None:
+            # Hard delete: berhenti menulis sampai polygon aktif baru di-load
+            counter.detach_area()
+            polygon_detached = True
+            print(f"⚠️ Active polygon {changed_id} deleted, counting is no longer saved")
+        elif entry['checker'] is not None:
+            version = counter.swap_polygon(entry['checker'], changed_id)
+            print(f"🔄 Active polygon {changed_id} changed, geometry swapped (v{version})")
+    elif polygon_detached and entry and entry['row']['is_active'] and entry['checker'] is not None:
+        version = counter.swap_polygon(entry['checker'], changed_id)
+        polygon_detached = False
+        print(f"✅ Polygon {changed_id} activated, counting resumed (v{version})")
+
+
+def init_storage():
+    """
+    Koneksi database + load polygon registry, di-retry sampai berhasil
+    (API tetap hidup saat database down)
+    """
+    global db, writer, polygon_registry, polygon_points, polygon_name, polygon_id, polygon_checker
+
+    status = startup_status['database']
+    while not _shutdown.is_set():
+        status['attempts'] += 1
+        try:
+            if db is None:
+                db = create_database_manager(config)
+                writer = DurableWriter(db, config)
+            db.ensure_connection()
+            registry = PolygonRegistry(db, config.POLYGON_REGISTRY_POLL_INTERVAL, frame_scale)
+            break
+        except Exception as e:
+            status.update(state='retrying', error=str(e))
+            print(f"⚠️ Database not ready ({e}), retry in {config.DB_INIT_RETRY_INTERVAL}s")
+            _shutdown.wait(config.DB_INIT_RETRY_INTERVAL)
+    else:
+        return
+
+    active_entry = registry.active()
+    if active_entry and active_entry['checker'] is not None:
+        polygon_config = active_entry['row']
+        polygon_points = db.polygon_points(polygon_config)
+        polygon_name = polygon_config['name']
+        polygon_id = polygon_config['id']
+        polygon_checker = active_entry['checker']
+        counter.swap_polygon(polygon_checker, polygon_id)
+        print(f"✅ Polygon loaded: {polygon_name} (ID: {polygon_id})")
+    else:
+        print("⚠️ Using default polygon")
+
+    registry.add_listener(on_polygon_change)
+    registry.set_frame_scale(frame_scale)  # Capture bisa sudah dibuka selama registry di-load
+    registry.start_polling()
+    polygon_registry = registry
+    status.update(state='ready', error=None, ready_at=time.time())
+
+
+def init_model():
+    """
+    Import torch / ultralytics, load + warmup model awal (background thread)
+    """
+    global model_manager, sliced
+
+    status = startup_status['model']
+    status['state'] = 'loading'
+    try:
+        device = detect_device()
+        print(f"🔧 Device: {device}")
+        apply_profile(inference_profile)
+        sliced = create_sliced_tracker(config)
+        model_manager = ModelManager(config.YOLO_MODEL, device, config.MODEL_CACHE_SIZE, config.MODEL_WARMUP_FRAMES,
+                                     imgsz=inference_profile['imgsz'],
+                                     loader=lambda path, dev: prepare_model(load_yolo(path, dev), inference_profile))
+        status.update(state='ready', ready_at=time.time())
+    except Exception as e:
+        print(f"❌ Failed to initialize model: {e}")
+        status.update(state='failed', error=str(e))
+
+
+def apply_frame_scale(scale):
+    """
+    Dipanggil setelah capture dibuka: scale polygon ke ukuran frame output capture
+    """
+    global frame_scale
+
+    if tuple(scale) == frame_scale:
+        return
+    frame_scale = tuple(scale)
+    if polygon_registry is not None:
+        polygon_registry.set_frame_scale(frame_scale)
+    if counter.area_id is None:
+        counter.swap_polygon(PolygonChecker(scale_points(config.DEFAULT_POLYGON, frame_scale)), None)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Startup tidak menunggu database / model: endpoint sudah bisa melayani request,
+    # cek /readyz untuk status inisialisasi
+    threading.Thread(target=init_storage, daemon=True).start()
+    threading.Thread(target=init_model, daemon=True).start()
+
+    yield
+
+    _shutdown.set()
+    if polygon_registry is not None:
+        polygon_registry.stop()
+    if model_manager is not None:
+        model_manager.close()
+    if heatmap is not None:
+        heatmap.snapshot()
+    if clips is not None:
+        clips.close()
+    if snapshots is not None:
+        snapshots.close()
+    if writer is not None:
+        visitor_counter.maybe_flush(writer, force=True)
+        writer.close()
+    if db is not None:
+        db.close()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"],
                    allow_headers=["*"])
 
-db = DatabaseManager()
-config = Config()
 
-device = 'cuda' if torch.cuda.is_available() else 'cpu'
-print(f"🔧 Device: {device}")
-model = YOLO(config.YOLO_MODEL)
-model.to(device)
-
-cursor = db.connection.cursor(dictionary=True)
-cursor.execute("""
-    SELECT id, name, coordinates FROM polygon_areas
-    WHERE is_active = TRUE
-    ORDER BY created_at DESC
-    LIMIT 1
-""")
-polygon_config = cursor.fetchone()
-cursor.close()
-
-if polygon_config:
-    coords = json.loads(polygon_config['coordinates'])
-    polygon_points = [(int(p['x']), int(p['y'])) for p in coords['points']]
-    polygon_name = polygon_config['name']
-    polygon_id = polygon_config['id']
-    print(f"✅ Polygon loaded: {polygon_name} (ID: {polygon_id})")
-else:
-    polygon_points = config.DEFAULT_POLYGON
-    polygon_name = "Default Area"
-    polygon_id = None
-    print("⚠️ Using default polygon")
+def require_storage():
+    if polygon_registry is None:
+        raise HTTPException(503, "Database is not ready yet, check /readyz")
 
-polygon_checker = PolygonChecker(polygon_points)
-counter = PeopleCounter(polygon_checker)
+
+def require_model():
+    if model_manager is None:
+        raise HTTPException(503, f"Model is not ready yet ({startup_status['model']['state']}), check /readyz")
+
+
+@app.get("/healthz")
+def healthz():
+    # Liveness: proses hidup dan event loop merespons
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    # Readiness: database + polygon registry dan model sudah siap
+    ready = polygon_registry is not None and model_manager is not None
+    return JSONResponse(status_code=200 if ready else 503, content={
+        "ready": ready,
+        "components": startup_status
+    })
+
+
+def cached_response(request: Request, key, loader, media_type='application/json'):
+    """
+    Balas dari response cache (JSON, atau media_type lain mis. PNG heatmap),
+    dengan 304 jika ETag / Last-Modified client masih valid
+    """
+    entry = response_cache.get_or_load(key, loader)
+    headers = response_cache.headers(entry)
+
+    if response_cache.is_not_modified(entry,
+                                      request.headers.get('if-none-match'),
+                                      request.headers.get('if-modified-since')):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=entry['body'], media_type=media_type, headers=headers)
 
 class ChangeYOLOModelRequest(BaseModel):
     model_path: str
 @app.post("/api/config/yolo/change_model")
 def change_yolo_model(req: ChangeYOLOModelRequest):
-    global model
-    try:
-        model = YOLO(req.model_path)
-        model.to(device)
-        return {
-            "success": True,
-            "current_model": req.model_path,
-            "device": device
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
+    require_model()
+    # Load + warmup di background, swap dilakukan pipeline di antara frame
+    status = model_manager.request(req.model_path)
+    return {
+        "success": True,
+        "message": "Model change queued, poll /api/config/yolo/status for progress",
+        "status": status
+    }
+
+@app.get("/api/config/yolo/status")
+def yolo_model_status():
+    if model_manager is None:
+        return {**startup_status['model'], 'current_model': None, 'model_path': config.YOLO_MODEL}
+    return model_manager.get_status()
 
 class Point(BaseModel):
     x: int
@@ -86,6 +296,7 @@ class PolygonUpdate(BaseModel):
 
 @app.post("/api/polygon/create")
 def create_polygon(polygon: PolygonCreate):
+    require_storage()
 
     if len(polygon.points) < 3:
         raise HTTPException(400, "Polygon must have at least 3 points")
@@ -95,14 +306,8 @@ def create_polygon(polygon: PolygonCreate):
             "points": [{"x": p.x, "y": p.y} for p in polygon.points]
         }
 
-        cursor = db.connection.cursor()
-        cursor.execute("""
-            INSERT INTO polygon_areas (name, description, coordinates, is_active)
-            VALUES (%s, %s, %s, FALSE)
-        """, (polygon.name, polygon.description, json.dumps(coordinates)))
-        db.connection.commit()
-        polygon_id = cursor.lastrowid
-        cursor.close()
+        polygon_id = db.create_polygon(polygon.name, polygon.description, coordinates)
+        polygon_registry.notify(polygon_id)
 
         return {
             "success": True,
@@ -112,55 +317,41 @@ def create_polygon(polygon: PolygonCreate):
             "points_count": len(polygon.points)
         }
     except Exception as e:
-        db.connection.rollback()
         raise HTTPException(500, f"Failed to create polygon: {str(e)}")
 
 
 @app.get("/api/polygon/list")
-def list_polygons(active_only: bool = False):
-    try:
-        cursor = db.connection.cursor(dictionary=True)
-        if active_only:
-            cursor.execute("SELECT * FROM polygon_areas WHERE is_active = TRUE ORDER BY created_at DESC")
-        else:
-            cursor.execute("SELECT * FROM polygon_areas ORDER BY created_at DESC")
-
-        polygons = cursor.fetchall()
-        cursor.close()
-
-        for poly in polygons:
-            poly['coordinates'] = json.loads(poly['coordinates'])
-            poly['created_at'] = poly['created_at'].strftime("%Y-%m-%d %H:%M:%S") if poly['created_at'] else None
-            poly['updated_at'] = poly['updated_at'].strftime("%Y-%m-%d %H:%M:%S") if poly['updated_at'] else None
-
+def list_polygons(request: Request, active_only: bool = False):
+    require_storage()
+    def load():
+        polygons = polygon_registry.list(active_only)
         return {
             "success": True,
             "count": len(polygons),
             "polygons": polygons
         }
+
+    try:
+        return cached_response(request, ('polygon_list', active_only), load)
     except Exception as e:
         raise HTTPException(500, str(e))
 
 
 @app.get("/api/polygon/{polygon_id}")
-def get_polygon(polygon_id: int):
-    try:
-        cursor = db.connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM polygon_areas WHERE id = %s", (polygon_id,))
-        polygon = cursor.fetchone()
-        cursor.close()
-
-        if not polygon:
+def get_polygon(request: Request, polygon_id: int):
+    require_storage()
+    def load():
+        entry = polygon_registry.get(polygon_id)
+        if not entry:
             raise HTTPException(404, "Polygon not found")
 
-        polygon['coordinates'] = json.loads(polygon['coordinates'])
-        polygon['created_at'] = polygon['created_at'].strftime("%Y-%m-%d %H:%M:%S") if polygon['created_at'] else None
-        polygon['updated_at'] = polygon['updated_at'].strftime("%Y-%m-%d %H:%M:%S") if polygon['updated_at'] else None
-
         return {
             "success": True,
-            "polygon": polygon
+            "polygon": entry['row']
         }
+
+    try:
+        return cached_response(request, ('polygon', polygon_id), load)
     except HTTPException:
         raise
     except Exception as e:
@@ -169,42 +360,21 @@ def get_polygon(polygon_id: int):
 
 @app.put("/api/polygon/{polygon_id}")
 def update_polygon(polygon_id: int, polygon: PolygonUpdate):
+    require_storage()
     try:
-        cursor = db.connection.cursor()
-
-        # Build dynamic update query
-        updates = []
-        values = []
-
-        if polygon.name:
-            updates.append("name = %s")
-            values.append(polygon.name)
-
-        if polygon.description is not None:
-            updates.append("description = %s")
-            values.append(polygon.description)
-
+        coordinates = None
         if polygon.points:
             if len(polygon.points) < 3:
                 raise HTTPException(400, "Polygon must have at least 3 points")
             coordinates = {"points": [{"x": p.x, "y": p.y} for p in polygon.points]}
-            updates.append("coordinates = %s")
-            values.append(json.dumps(coordinates))
 
-        if not updates:
+        if not polygon.name and polygon.description is None and coordinates is None:
             raise HTTPException(400, "No fields to update")
 
-        updates.append("updated_at = NOW()")
-        values.append(polygon_id)
-
-        sql = f"UPDATE polygon_areas SET {', '.join(updates)} WHERE id = %s"
-        cursor.execute(sql, values)
-        db.connection.commit()
-
-        if cursor.rowcount == 0:
+        if not db.update_polygon(polygon_id, polygon.name, polygon.description, coordinates):
             raise HTTPException(404, "Polygon not found")
 
-        cursor.close()
+        polygon_registry.notify(polygon_id)
 
         return {
             "success": True,
@@ -214,29 +384,19 @@ def update_polygon(polygon_id: int, polygon: PolygonUpdate):
     except HTTPException:
         raise
     except Exception as e:
-        db.connection.rollback()
         raise HTTPException(500, str(e))
 
 
 # 5. DELETE - Hapus polygon (soft delete)
 @app.delete("/api/polygon/{polygon_id}")
 def delete_polygon(polygon_id: int, hard_delete: bool = False):
+    require_storage()
     try:
-        cursor = db.connection.cursor()
-
-        if hard_delete:
-            cursor.execute("DELETE FROM polygon_areas WHERE id = %s", (polygon_id,))
-            msg = "Polygon permanently deleted"
-        else:
-            cursor.execute("UPDATE polygon_areas SET is_active = FALSE WHERE id = %s", (polygon_id,))
-            msg = "Polygon deactivated"
-
-        db.connection.commit()
-
-        if cursor.rowcount == 0:
+        if not db.delete_polygon(polygon_id, hard_delete):
             raise HTTPException(404, "Polygon not found")
 
-        cursor.close()
+        msg = "Polygon permanently deleted" if hard_delete else "Polygon deactivated"
+        polygon_registry.notify(polygon_id)
         return {
             "success": True,
             "message": msg,
@@ -245,25 +405,17 @@ def delete_polygon(polygon_id: int, hard_delete: bool = False):
     except HTTPException:
         raise
     except Exception as e:
-        db.connection.rollback()
         raise HTTPException(500, str(e))
 
 @app.put("/api/polygon/{polygon_id}/activate")
 def activate_polygon(polygon_id: int):
+    require_storage()
     try:
-        cursor = db.connection.cursor()
-
-        # Cek polygon exists
-        cursor.execute("SELECT id FROM polygon_areas WHERE id = %s", (polygon_id,))
-        if not cursor.fetchone():
+        if not db.activate_polygon(polygon_id):
             raise HTTPException(404, "Polygon not found")
 
-        cursor.execute("UPDATE polygon_areas SET is_active = FALSE")
-
-        cursor.execute("UPDATE polygon_areas SET is_active = TRUE, updated_at = NOW() WHERE id = %s", (polygon_id,))
-
-        db.connection.commit()
-        cursor.close()
+        # Polygon lain ikut dinonaktifkan, jadi refresh semua (incremental)
+        polygon_registry.notify()
 
         return {
             "success": True,
@@ -273,35 +425,30 @@ def activate_polygon(polygon_id: int):
     except HTTPException:
         raise
     except Exception as e:
-        db.connection.rollback()
         raise HTTPException(500, str(e))
 
 
 @app.post("/api/polygon/reload")
 def reload_polygon():
-    global polygon_checker, counter, polygon_id, polygon_name, polygon_points
+    global polygon_checker, polygon_id, polygon_name, polygon_points, polygon_detached
 
+    require_storage()
     try:
-        cursor = db.connection.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id, name, coordinates FROM polygon_areas
-            WHERE is_active = TRUE
-            ORDER BY created_at DESC
-            LIMIT 1
-        """)
-        polygon_config = cursor.fetchone()
-        cursor.close()
-
-        if not polygon_config:
+        entry = polygon_registry.active()
+
+        if not entry or entry['checker'] is None:
             raise HTTPException(404, "No active polygon found in database")
 
-        coords = json.loads(polygon_config['coordinates'])
-        new_polygon_points = [(int(p['x']), int(p['y'])) for p in coords['points']]
+        polygon_config = entry['row']
+        new_polygon_points = db.polygon_points(polygon_config)
+        new_checker = entry['checker']
+
+        # Swap atomic di counter (dibaca pipeline setiap frame), counter tidak di-reset
+        version = counter.swap_polygon(new_checker, polygon_config['id'])
+        polygon_detached = False
 
-        # Update global variables
         polygon_points = new_polygon_points
-        polygon_checker = PolygonChecker(polygon_points)
-        counter = PeopleCounter(polygon_checker)  # Reset counter untuk area baru
+        polygon_checker = new_checker
         polygon_id = polygon_config['id']
         polygon_name = polygon_config['name']
 
@@ -311,7 +458,8 @@ def reload_polygon():
             "polygon_id": polygon_id,
             "polygon_name": polygon_name,
             "points_count": len(polygon_points),
-            "note": "Counter has been reset for the new area"
+            "polygon_version": version,
+            "note": "Counters preserved, active tracks re-evaluated against the new area"
         }
     except HTTPException:
         raise
@@ -321,6 +469,7 @@ def reload_polygon():
 
 @app.post("/api/polygon/import")
 def import_polygon_from_json(data: dict):
+    require_storage()
     try:
         name = data.get('name', 'Imported Polygon')
         description = data.get('description', '')
@@ -329,14 +478,8 @@ def import_polygon_from_json(data: dict):
         if 'points' not in coordinates or len(coordinates['points']) < 3:
             raise HTTPException(400, "Invalid polygon data: need at least 3 points")
 
-        cursor = db.connection.cursor()
-        cursor.execute("""
-            INSERT INTO polygon_areas (name, description, coordinates, is_active)
-            VALUES (%s, %s, %s, FALSE)
-        """, (name, description, json.dumps(coordinates)))
-        db.connection.commit()
-        polygon_id = cursor.lastrowid
-        cursor.close()
+        polygon_id = db.create_polygon(name, description, coordinates)
+        polygon_registry.notify(polygon_id)
 
         return {
             "success": True,
@@ -348,68 +491,105 @@ def import_polygon_from_json(data: dict):
     except HTTPException:
         raise
     except Exception as e:
-        db.connection.rollback()
         raise HTTPException(500, str(e))
 
+def retire_all_tracks():
+    """
+    Buang state per track di semua komponen (counter + Kalman, propagasi, visitor)
+    """
+    counter.cleanup_old_tracks([])
+    detection_scheduler.reset()
+    visitor_counter.reset_tracks()
+
+
 def gen_frames_api():
-    cap = cv2.VideoCapture(config.VIDEO_SOURCE)
-    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    cap = open_capture(config)
 
     if not cap.isOpened():
         print("❌ Failed to open video stream!")
         return
+    apply_frame_scale(cap.scale)
 
     frame_count = 0
+    reconnect_backoff = Backoff(config.RECONNECT_BACKOFF_BASE, config.RECONNECT_BACKOFF_MAX)
+    detected = np.empty((0, 4))
+    inference_ms = 0.0
     fps_start = time.time()
     fps = 0
+    event_cursor = counter.events.next_seq
+    model_generation = None
 
     print("✅ Video stream opened for API endpoint")
 
     while True:
         ret, frame = cap.read()
         if not ret:
-            print("⚠️ Stream interrupted, reconnecting...")
+            delay = reconnect_backoff.next_delay()
+            print(f"⚠️ Stream interrupted, reconnecting in {delay:.1f}s...")
             cap.release()
-            time.sleep(2)
-            cap = cv2.VideoCapture(config.VIDEO_SOURCE)
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            time.sleep(delay)
+            cap = open_capture(config)
             continue
+        reconnect_backoff.reset()
 
         frame_count += 1
 
         if frame_count % config.FRAME_SKIP != 0:
             continue
 
-        results = model.track(
-            frame,
-            persist=True,
-            tracker=config.TRACKER_TYPE + '.yaml',
-            classes=config.DETECT_CLASSES,
-            conf=config.CONFIDENCE_THRESHOLD,
-            iou=config.IOU_THRESHOLD,
-            imgsz=640,
-            max_det=30,
-            verbose=False,
-            agnostic_nms=True
-        )
-
-        if results[0].boxes is not None and results[0].boxes.id is not None:
-            boxes = results[0].boxes.xyxy.cpu().numpy()
-            track_ids = results[0].boxes.id.cpu().numpy().astype(int)
-            confidences = results[0].boxes.conf.cpu().numpy()
-            active_track_ids = []
+        # Snapshot geometry untuk frame ini (reload_polygon bisa swap di thread lain)
+        polygon_checker = counter.polygon_checker
+        polygon_id = counter.area_id
+
+        # Background overlay heatmap (frame bersih, sebelum anotasi)
+        if heatmap is not None and frame_count % 30 == 0:
+            heatmap.background = frame.copy()
+
+        # Model baru (jika sudah siap) di-swap di sini, di antara dua frame yang lewat detector
+        if detection_scheduler.should_detect():
+            model, generation = model_manager.acquire()
+            if model_generation is not None and generation != model_generation:
+                # Track ID dimulai ulang setelah swap: ID lama yang dipakai ulang tidak boleh mewarisi state
+                retire_all_tracks()
+            model_generation = generation
+            inference_start = time.perf_counter()
+            detected, tracks = track_frame(model, frame, config, resolution.imgsz, resolution.max_det, sliced,
+                                           polygon_checker.polygon if config.SLICE_ROI_ONLY else None)
+            inference_ms = (time.perf_counter() - inference_start) * 1000
+
+            # Setting imgsz / max_det frame berikutnya dari hasil deteksi frame ini
+            resolution.observe(detected, sliced.tile_shape if sliced is not None else frame.shape)
+            detection_scheduler.observe(frame_count, tracks)
+        else:
+            # Frame tanpa detector: posisi track dari prediksi Kalman
+            tracks = detection_scheduler.propagate(frame_count)
 
-            for box, track_id, conf in zip(boxes, track_ids, confidences):
+        snapshot_crops = {}
+        if tracks is not None:
+            boxes, track_ids, confidences = tracks
+            active_track_ids = []
+            inside_track_ids = []
+
+            centroids = [(int((x1 + x2) / 2), int((y1 + y2) / 2)) for x1, y1, x2, y2 in boxes]
+            frame_events = counter.update_batch(track_ids, centroids, frame_count)
+            # Crop bbox track yang menghasilkan event, sebelum frame dianotasi
+            if snapshots is not None and frame_events:
+                snapshot_crops = {track_id: snapshots.crop(frame, box)
+                                  for box, track_id in zip(boxes, track_ids) if track_id in frame_events}
+            if heatmap is not None:
+                heatmap.accumulate(centroids, frame.shape)
+
+            for box, track_id, conf, centroid in zip(boxes, track_ids, confidences, centroids):
                 x1, y1, x2, y2 = box
-                centroid_x = int((x1 + x2) / 2)
-                centroid_y = int((y1 + y2) / 2)
-                centroid = (centroid_x, centroid_y)
 
-                is_inside = polygon_checker.is_inside(centroid)
+                # Status dari counter (hysteresis / Kalman), sama dengan hitungan ENTER/EXIT
+                is_inside = counter.is_track_inside(track_id)
 
-                event = counter.update(track_id, centroid, frame_count)
+                event = frame_events.get(track_id)
 
                 active_track_ids.append(track_id)
+                if is_inside:
+                    inside_track_ids.append(track_id)
 
                 color = (0, 255, 0) if is_inside else (0, 0, 255)
                 cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
@@ -421,32 +601,59 @@ def gen_frames_api():
                 cv2.circle(frame, centroid, 5, color, -1)
 
                 if event:
-                    event_text = "MASUK" if event == "entered" else "KELUAR"
+                    event_text = "MASUK" if event in ("ENTER", "IN") else "KELUAR"
                     cv2.putText(frame, event_text, (int(x1), int(y2) + 20),
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
 
             counter.cleanup_old_tracks(active_track_ids)
+            visitor_counter.observe(inside_track_ids, polygon_id)
 
         frame = polygon_checker.draw_polygon(frame, color=(255, 0, 255), thickness=3)
+        if config.COUNTING_MODE == 'tripwire':
+            frame = counter.draw_lines(frame)
 
         stats = counter.get_stats()
-
-        if polygon_id and frame_count % 100 == 0:
-            try:
-                db.update_summary(
+        occupancy_history.record(stats)
+
+        # Event baru dari counter ditulis lewat WAL (tidak blocking saat DB down)
+        new_events, event_cursor = counter.events_since(event_cursor)
+        dwell_analytics.consume(new_events, polygon_id)
+        for ev in new_events:
+            event_uid = None
+            if polygon_id:
+                event_uid = writer.save_counting_event(
                     polygon_area_id=polygon_id,
-                    total_entered=stats['total_entered'],
-                    total_exited=stats['total_exited'],
-                    current_count=stats['current_inside']
+                    tracking_id=ev['track_id'],
+                    event_type=ev['event_type'],
+                    frame_number=ev['frame_number'],
+                    video_source=config.VIDEO_SOURCE,
+                    timestamp=ev['timestamp']
                 )
-            except Exception as e:
-                print(f"⚠️ DB update error: {e}")
+                crop = snapshot_crops.get(ev['track_id'])
+                if crop is not None:
+                    snapshots.save(event_uid, crop)
+            if clips is not None and ev['event_type'] in config.CLIP_TRIGGER_EVENTS:
+                clips.trigger(ev['event_type'], polygon_id, event_uid)
+        if clips is not None:
+            clips.observe_occupancy(stats['current_inside'], polygon_id)
+
+        if polygon_id and frame_count % 100 == 0:
+            writer.update_summary(
+                polygon_area_id=polygon_id,
+                total_entered=stats['total_entered'],
+                total_exited=stats['total_exited'],
+                current_count=stats['current_inside']
+            )
+        if writer is not None:
+            visitor_counter.maybe_flush(writer)
 
         fps_end = time.time()
         time_diff = fps_end - fps_start
         if time_diff > 0:
             fps = 1 / time_diff
         fps_start = fps_end
+        pipeline_metrics.update(frames=frame_count, fps=round(fps, 2), inference_ms=round(inference_ms, 2),
+                                detections=len(detected), updated_at=fps_end)
 
         info_height = 150
         overlay = frame.copy()
@@ -466,6 +673,9 @@ def gen_frames_api():
         cv2.putText(frame, f"Inside: {stats['current_inside']}", (20, y),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
 
+        if clips is not None:
+            clips.push(frame)
+
         ret, buffer = cv2.imencode('.jpg', frame)
         if not ret: continue
 
@@ -476,8 +686,62 @@ def gen_frames_api():
 
 @app.get("/video_feed")
 def video_feed():
+    require_model()
     return StreamingResponse(gen_frames_api(), media_type='multipart/x-mixed-replace; boundary=frame')
 
+@app.get("/api/metrics")
+def metrics():
+    return {
+        "pipeline": pipeline_metrics,
+        "resolution": resolution.get_status(),
+        "detection": detection_scheduler.get_status(),
+        "model": model_manager.get_status() if model_manager is not None else startup_status['model'],
+        "writer": writer.get_status() if writer is not None else None,
+        "clips": clips.get_status() if clips is not None else None,
+        "snapshots": snapshots.get_status() if snapshots is not None else None
+    }
+
+@app.get("/api/clips")
+def list_clips(hours: int = 24, area_id: int = None):
+    require_storage()
+    t1 = datetime.now()
+    try:
+        rows = db.list_event_clips(t1 - timedelta(hours=hours), t1, area_id)
+    except Exception as e:
+        raise HTTPException(500, str(e))
+    return {"success": True, "count": len(rows), "clips": rows}
+
+@app.get("/api/clips/{clip_id}/video")
+def clip_video(clip_id: int):
+    require_storage()
+    try:
+        clip = db.get_event_clip(clip_id)
+    except Exception as e:
+        raise HTTPException(500, str(e))
+    if not clip:
+        raise HTTPException(404, "Clip not found")
+    if not os.path.isfile(clip['file_path']):
+        raise HTTPException(404, "Clip file no longer available")
+    return FileResponse(clip['file_path'], media_type='video/mp4')
+
+@app.get("/api/events/{event_id}/snapshot")
+def event_snapshot(event_id: int):
+    if snapshots is None:
+        raise HTTPException(404, "Snapshots disabled")
+    require_storage()
+    try:
+        event = db.get_event(event_id)
+    except Exception as e:
+        raise HTTPException(500, str(e))
+    if not event:
+        raise HTTPException(404, "Event not found")
+
+    # File bisa belum ditulis (event lewat WAL lebih dulu), tidak pernah dibuat, atau sudah di-evict quota
+    path = snapshots.path(event['event_uid']) if event.get('event_uid') else None
+    if path is None:
+        raise HTTPException(404, "Snapshot not available")
+    return FileResponse(path, media_type='image/jpeg')
+
 @app.get("/api/stats/live")
 def stats_live(area_id: int = None):
     stats = counter.get_stats()
@@ -488,20 +752,79 @@ def stats_live(area_id: int = None):
         "waktu_update": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
 
-@app.get("/api/stats/history")
-def stats_history(minutes: int = 60):
-    t0 = datetime.now() - timedelta(minutes=minutes)
+@app.get("/api/stats/dwell")
+def stats_dwell(hours: int = 24, area_id: int = None):
+    # Quantile dari sketch di memory, tanpa scan tabel event
+    since = datetime.now() - timedelta(hours=hours)
+    return {"buckets": dwell_analytics.quantiles(since, area_id)}
+
+@app.get("/api/heatmap.png")
+def heatmap_png(request: Request):
+    if heatmap is None:
+        raise HTTPException(404, "Heatmap disabled")
+
+    # Render di-cache (TTL 'heatmap'), bukan render ulang setiap request
+    return cached_response(request, ('heatmap',), heatmap.render_png, media_type='image/png')
+
+@app.get("/api/stats/unique_visitors")
+def stats_unique_visitors(hours: int = 24, start: str = None, end: str = None,
+                          area_id: int = None, camera_id: str = None, granularity: str = 'total'):
+    """
+    Pengunjung unik (HyperLogLog) untuk range waktu apapun, hasil merge sketch per jam.
+    granularity: total, hour, day
+    """
+    if granularity not in ('total', 'hour', 'day'):
+        raise HTTPException(400, "granularity must be total, hour or day")
+
     try:
-        cur = db.connection.cursor()
-        cur.execute(
-            "SELECT updated_at, current_count FROM counting_summary WHERE updated_at >= %s ORDER BY updated_at",
-            (t0,)
-        )
-        rows = cur.fetchall()
-        cur.close()
-        times = [r[0].strftime("%Y-%m-%d %H:%M:%S") for r in rows]
-        counts = [r[1] for r in rows]
+        t1 = datetime.strptime(end, "%Y-%m-%d %H:%M") if end else datetime.now()
+        t0 = datetime.strptime(start, "%Y-%m-%d %H:%M") if start else t1 - timedelta(hours=hours)
+    except ValueError:
+        raise HTTPException(400, "start / end format: YYYY-MM-DD HH:MM")
+
+    require_storage()
+    try:
+        rows = db.get_visitor_sketches(t0, t1, camera_id, area_id)
+    except Exception as e:
+        raise HTTPException(500, str(e))
+    if camera_id in (None, config.CAMERA_ID):
+        rows += visitor_counter.live_rows(t0, t1, area_id)
+
+    total = HyperLogLog(config.HLL_PRECISION)
+    buckets = {}
+    for row in rows:
+        sketch = HyperLogLog.from_bytes(row['registers'])
+        total.merge(sketch)
+
+        if granularity != 'total':
+            bucket = row['summary_date'] if granularity == 'day' else f"{row['summary_date']} {row['summary_hour']:02d}:00"
+            buckets.setdefault(bucket, HyperLogLog(sketch.precision)).merge(sketch)
+
+    return {
+        "start": t0.strftime("%Y-%m-%d %H:%M:%S"),
+        "end": t1.strftime("%Y-%m-%d %H:%M:%S"),
+        "unique_visitors": total.count(),
+        "buckets": [{"bucket": b, "unique_visitors": buckets[b].count()} for b in sorted(buckets)]
+    }
+
+@app.get("/api/stats/history")
+def stats_history(request: Request, minutes: int = 60):
+    # Window pendek dilayani langsung dari ring buffer tanpa query DB
+    since = time.time() - minutes * 60
+    if occupancy_history.covers(since):
+        return occupancy_history.query(since)
+
+    require_storage()
+
+    def load():
+        t0 = datetime.now() - timedelta(minutes=minutes)
+        rows = db.get_summary_history(t0)
+        times = [r['updated_at'] for r in rows]
+        counts = [r['current_count'] for r in rows]
         return {"times": times, "counts": counts}
+
+    try:
+        return cached_response(request, ('stats_history', minutes), load)
     except Exception as e:
         raise HTTPException(500, str(e))
 
@@ -5,20 +5,100 @@ load_dotenv()
 
 
 class Config:
+    # Storage backend: 'mysql' (server) atau 'sqlite' (embedded, edge deployment)
+    DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/people_counting.db')
+
     DB_HOST = os.getenv('DB_HOST', 'localhost')
     DB_NAME = os.getenv('DB_NAME', 'people_counting_db')
     DB_USER = os.getenv('DB_USER', 'cv_user')
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'cvpassword123')
+    DB_CONNECT_TIMEOUT = 3  # detik
+    DB_INIT_RETRY_INTERVAL = 5  # detik, retry koneksi awal API jika database belum siap
+
+    # Write-ahead log: record ditulis ke disk dulu, lalu di-replay ke database
+    WAL_DIR = os.getenv('WAL_DIR', 'data/wal')
+    WAL_FSYNC_INTERVAL = 0.5  # detik
+    WAL_FSYNC_BATCH = 50  # record per fsync
+    WAL_REPLAY_BATCH = 200
+    WAL_REPLAY_INTERVAL = 1.0  # detik
+
+    # Circuit breaker database
+    DB_BREAKER_FAILURES = 3
+    DB_BREAKER_RESET = 30  # detik
 
     # Video Source
     VIDEO_SOURCE = os.getenv('VIDEO_SOURCE',
                              'https://cctvjss.jogjakota.go.id/malioboro/Malioboro_30_Pasar_Beringharjo.stream/playlist.m3u8')
 
+    # Capture backend: 'opencv' (cv2.VideoCapture) atau 'pyav' (FFmpeg, decode multi-thread + scale di decoder)
+    CAPTURE_BACKEND = os.getenv('CAPTURE_BACKEND', 'opencv')
+    # Ukuran output frame, None = resolusi source (isi salah satu saja untuk menjaga aspect ratio).
+    # Polygon di database tetap dalam koordinat source, di-scale otomatis ke ukuran output
+    CAPTURE_WIDTH = None
+    CAPTURE_HEIGHT = None
+    CAPTURE_THREADS = 0  # Thread decoder PyAV, 0 = otomatis
+
+    # HLS ingest (CAPTURE_BACKEND = 'hls'): playlist di-poll, segment di-prefetch ke ring buffer lokal
+    HLS_BUFFER_DIR = 'data/hls_buffer'
+    HLS_BUFFER_SEGMENTS = 10
+    HLS_LIVE_EDGE_SEGMENTS = 3  # Segment terakhir playlist yang diambil saat start (= toleransi gangguan)
+    HLS_HTTP_TIMEOUT = 5  # detik
+    HLS_STALL_TIMEOUT = 30  # detik menunggu segment baru sebelum stream dianggap putus
+    HLS_DECODER = 'opencv'  # Decoder segment: opencv, pyav
+    HLS_REALTIME = True  # Frame diberikan sesuai pts, tertinggal live edge sebanyak buffer awal
+
+    # Frame bus (CAPTURE_BACKEND = 'framebus'): frame dibaca dari shared memory yang diisi
+    # tools/frame_ingest.py, sehingga main.py / api_app.py / polygon_editor cukup satu decode per kamera
+    FRAME_BUS_NAME = os.getenv('FRAME_BUS_NAME')  # None = pc_frames_<CAMERA_ID>
+    FRAME_BUS_BACKEND = os.getenv('FRAME_BUS_BACKEND', 'opencv')  # Backend capture di frame_ingest: opencv, pyav, hls
+    FRAME_BUS_SLOTS = 4  # Slot ring buffer; reader yang tertinggal > slots frame melompat ke frame terbaru
+    FRAME_BUS_TIMEOUT = 10  # detik menunggu bus / frame baru sebelum dianggap putus
+
+    # Reconnect capture / playlist: exponential backoff dengan jitter (detik)
+    RECONNECT_BACKOFF_BASE = 0.5
+    RECONNECT_BACKOFF_MAX = 30
+
     # YOLO Configuration
     YOLO_MODEL = 'yolo11m.pt'  # YOLOv11 Medium
+    MODEL_CACHE_SIZE = 2  # Model yang disimpan di memory (LRU), termasuk model aktif
+    MODEL_WARMUP_FRAMES = 2  # Inference dummy sebelum model baru di-swap
     CONFIDENCE_THRESHOLD = 0.25
     IOU_THRESHOLD = 0.45
 
+    # Inference: imgsz default, override dari profile hasil tools/autotune.py (jika ada)
+    INFERENCE_IMGSZ = 640
+    INFERENCE_MAX_DET = 30
+    INFERENCE_PROFILE_PATH = os.getenv('INFERENCE_PROFILE_PATH', 'data/inference_profile.json')
+    INFERENCE_LATENCY_TARGET_MS = 200  # p95 per frame, dipakai autotune memilih profile
+
+    # Resolusi adaptif: level [imgsz, max_det] dipilih per window dari jumlah deteksi + ukuran box.
+    # Level di atas imgsz inference profile dibuang (tidak melewati target latency autotune)
+    ADAPTIVE_RES_ENABLED = False
+    ADAPTIVE_RES_LEVELS = [[320, 20], [480, 40], [640, 60], [800, 100]]
+    ADAPTIVE_RES_WINDOW = 30  # frame per evaluasi
+    ADAPTIVE_RES_MIN_BOX = 20  # px di input model (persentil 25 tinggi box), di bawah ini naik level
+    ADAPTIVE_RES_DOWN_BOX = 40  # px, box di level bawah harus >= ini untuk turun level
+    ADAPTIVE_RES_SATURATION = 0.2  # fraksi frame dengan deteksi >= max_det yang memicu naik level
+    ADAPTIVE_RES_DOWN_WINDOWS = 3  # window berturut-turut sebelum turun level
+
+    # Sliced inference: frame / ROI polygon dipotong jadi tile overlap, semua tile satu batch
+    SLICED_INFERENCE = False
+    SLICE_ROWS = 2
+    SLICE_COLS = 3  # Inference per frame = rows * cols (+1 jika SLICE_FULL_FRAME)
+    SLICE_OVERLAP = 0.2
+    SLICE_FULL_FRAME = True  # Tambah satu pass region penuh untuk orang besar yang terpotong tile
+    SLICE_ROI_ONLY = True  # Slice bounding box polygon aktif (+ margin), bukan seluruh frame
+    SLICE_ROI_MARGIN = 64  # pixel
+    SLICE_MERGE_IOU = 0.5
+    SLICE_MERGE_IOS = 0.8  # intersection / area box terkecil, untuk box terpotong di batas tile
+
+    # Deteksi setiap K frame, di antaranya track dipropagasi prediksi Kalman (K adaptif)
+    DETECT_INTERVAL_MIN = 1
+    DETECT_INTERVAL_MAX = 1  # 1 = detector setiap frame, mis. 4 untuk edge CPU
+    DETECT_UNCERTAINTY = 0.5  # error prediksi / tinggi box yang dianggap tidak pasti
+    DETECT_CHURN = 0.3  # fraksi track baru + hilang per deteksi yang dianggap tidak pasti
+
     # Tracking Configuration
     TRACKER_TYPE = 'botsort'  # botsort, bytetrack
     TRACKER_CONFIG = None  # Use default ultralytics config
@@ -31,10 +111,96 @@ class Config:
         [200, 600]  # Bottom-left
     ]
 
+    # Polygon registry: interval polling perubahan polygon_areas (detik), 0 = tanpa polling
+    POLYGON_REGISTRY_POLL_INTERVAL = 5
+
     # Processing
     FRAME_SKIP = 1  # Process every N frames (1 = no skip)
     DISPLAY_WIDTH = 1280
     DISPLAY_HEIGHT = 720
 
     # Classes to detect (COCO dataset)
-    DETECT_CLASSES = [0]  # 0 = person only
\ No newline at end of file
+    DETECT_CLASSES = [0]  # 0 = person only
+
+    # Counting mode
+    COUNTING_MODE = os.getenv('COUNTING_MODE', 'polygon')  # polygon, tripwire
+    # Tripwire: list line [[x1, y1], [x2, y2]], IN = bergerak ke sisi kanan A -> B di layar (y ke bawah)
+    # Kosong = edge polygon aktif dipakai sebagai tripwire
+    COUNTING_LINES = []
+
+    # Hysteresis mode polygon: buffer band (pixel) + minimum observasi sebelum ENTER/EXIT
+    # Opt-in: mengubah hitungan ENTER/EXIT dibanding point-in-polygon mentah
+    HYSTERESIS_ENABLED = False
+    HYSTERESIS_INNER_MARGIN = 15
+    HYSTERESIS_OUTER_MARGIN = 15
+    HYSTERESIS_MIN_FRAMES = 2
+
+    # Kalman smoothing centroid (constant velocity)
+    KALMAN_ENABLED = False  # Opt-in, sama seperti hysteresis
+    KALMAN_PROCESS_NOISE = 1.0
+    KALMAN_MEASUREMENT_NOISE = 10.0
+
+    # Trajectory per track (menggantikan sample detection tiap 30 frame)
+    TRAJECTORY_ENABLED = True
+    TRAJECTORY_MAX_POINTS = 18000
+
+    # Event buffer PeopleCounter
+    EVENT_BUFFER_CAPACITY = 10000
+    EVENT_BUFFER_OVERFLOW = 'drop_oldest'  # drop_oldest, spill
+    EVENT_SPILL_DIR = 'data/event_spill'
+
+    # Dwell time analytics (DDSketch per area per jam)
+    DWELL_SKETCH_ACCURACY = 0.01  # Error relatif quantile
+    DWELL_RETENTION_HOURS = 48
+
+    # Heatmap posisi centroid
+    HEATMAP_ENABLED = True
+    HEATMAP_SCALE = 8  # Grid 1/8 resolusi frame
+    HEATMAP_HALF_LIFE = 600  # detik
+    HEATMAP_DIR = 'data/heatmap'
+    HEATMAP_SNAPSHOT_INTERVAL = 60  # detik
+
+    # Klip video event: pre-roll JPEG di memory, MP4 ditulis background thread, direferensikan di event_clips
+    CLIP_ENABLED = False
+    CLIP_DIR = 'data/clips'
+    CLIP_PRE_ROLL = 5  # detik sebelum trigger
+    CLIP_POST_ROLL = 5  # detik setelah trigger terakhir
+    CLIP_MAX_DURATION = 60  # detik, klip dipotong jika trigger terus berdatangan
+    CLIP_JPEG_QUALITY = 80
+    CLIP_QUEUE_SIZE = 4  # Klip menunggu ditulis, lebih dari ini klip dibuang
+    CLIP_FOURCC = 'mp4v'
+    CLIP_TRIGGER_EVENTS = ['ENTER', 'EXIT', 'IN', 'OUT']
+    CLIP_OCCUPANCY_THRESHOLD = None  # Trigger saat current_inside >= nilai ini, None = off
+
+    # Snapshot crop orang per event ({event_uid}.jpg), ditulis thread pool dengan quota disk
+    SNAPSHOT_ENABLED = True
+    SNAPSHOT_DIR = 'data/snapshots'
+    SNAPSHOT_QUOTA_MB = 500  # File paling lama dihapus jika total melebihi quota
+    SNAPSHOT_WORKERS = 2
+    SNAPSHOT_QUEUE_SIZE = 32  # Crop menunggu encode, lebih dari ini snapshot dibuang
+    SNAPSHOT_JPEG_QUALITY = 85
+    SNAPSHOT_PADDING = 0.1  # Margin di sekitar bbox (fraksi ukuran bbox)
+
+    # Pengunjung unik (HyperLogLog per kamera, area, jam)
+    CAMERA_ID = os.getenv('CAMERA_ID', 'cam-01')
+    HLL_PRECISION = 12  # 4 KB register per sketch, error ~1.6%
+    VISITOR_FLUSH_INTERVAL = 60  # detik
+
+    # In-memory occupancy history (1 titik per detik)
+    OCCUPANCY_HISTORY_SECONDS = 7200
+    OCCUPANCY_HISTORY_GAP_TOLERANCE = 5  # detik tanpa titik baru sebelum window dianggap bolong (fallback ke DB)
+
+    # Parquet archive (tools/archive_exporter.py)
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'data/archive')
+    ARCHIVE_COMPRESSION = 'zstd'
+    ARCHIVE_INTERVAL = 3600  # detik
+    ARCHIVE_GRACE_HOURS = 6  # Hari diarsip setelah lewat tengah malam + grace (dan backlog WAL hari itu kosong)
+
+    # API Response Cache (TTL dalam detik per endpoint)
+    RESPONSE_CACHE_MAX_ENTRIES = 256
+    RESPONSE_CACHE_TTL = {
+        'stats_history': 5,
+        'polygon_list': 60,
+        'polygon': 60,
+        'heatmap': 5
+    }
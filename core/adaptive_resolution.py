@@ -0,0 +1,172 @@
+import time
+
+import numpy as np
+
+
+class AdaptiveResolution:
+    """
+    Pilih imgsz + max_det inference per window frame dari jumlah deteksi dan
+    ukuran box orang.
+
+    Naik level jika banyak frame saturasi (deteksi mendekati max_det) atau box
+    terlalu kecil di resolusi input model (orang jauh / scene ramai). Turun level
+    jika tidak ada saturasi dan box masih cukup besar walaupun di-scale ke level
+    di bawahnya (scene sepi / malam). Hysteresis: naik langsung, turun butuh
+    beberapa window berturut-turut, dan setelah ganti level ada cooldown.
+    """
+
+    def __init__(self, levels, initial_imgsz=640, window=30, min_box=20, down_box=40,
+                 saturation=0.2, down_windows=3, cooldown_windows=2):
+        """
+        Args:
+            levels: List [imgsz, max_det], urut dari resolusi terkecil
+            initial_imgsz: Level awal = imgsz terdekat (mis. dari inference profile)
+            window: Jumlah frame per evaluasi
+            min_box: Tinggi box (px di input model, persentil 25) di bawah ini memicu naik level
+            down_box: Tinggi box di level bawah harus >= ini untuk turun level
+            saturation: Fraksi frame dengan deteksi >= max_det yang memicu naik level
+            down_windows: Window berturut-turut yang memenuhi syarat sebelum turun level
+            cooldown_windows: Window yang dilewati setelah ganti level
+        """
+        self.levels = sorted((int(size), int(max_det)) for size, max_det in levels)
+        self.level = min(range(len(self.levels)), key=lambda i: abs(self.levels[i][0] - initial_imgsz))
+        self.window = window
+        self.min_box = min_box
+        self.down_box = down_box
+        self.saturation = saturation
+        self.down_windows = down_windows
+        self.cooldown_windows = cooldown_windows
+
+        self.changes = 0
+        self.changed_at = None
+        self.last_window = None
+        self._down_votes = 0
+        self._cooldown = 0
+        self._reset_window()
+
+    @property
+    def imgsz(self):
+        return self.levels[self.level][0]
+
+    @property
+    def max_det(self):
+        return self.levels[self.level][1]
+
+    def observe(self, boxes, frame_shape):
+        """
+        Catat hasil deteksi satu frame (dengan setting saat ini)
+
+        Args:
+            boxes: Array (N, 4) xyxy dalam pixel frame
+            frame_shape: Shape frame (h, w, ...)
+
+        Returns:
+            (imgsz, max_det): Setting untuk frame berikutnya
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        count = len(boxes)
+
+        self._frames += 1
+        self._count_sum += count
+        self._count_max = max(self._count_max, count)
+        if count >= self.max_det:
+            self._saturated += 1
+        if count:
+            # Ultralytics letterbox: sisi terpanjang frame di-scale ke imgsz
+            scale = self.imgsz / max(frame_shape[0], frame_shape[1])
+            self._heights.append((boxes[:, 3] - boxes[:, 1]) * scale)
+
+        if self._frames >= self.window:
+            self._evaluate()
+        return self.imgsz, self.max_det
+
+    def get_status(self):
+        return {
+            'imgsz': self.imgsz,
+            'max_det': self.max_det,
+            'level': self.level,
+            'levels': [list(level) for level in self.levels],
+            'changes': self.changes,
+            'changed_at': self.changed_at,
+            'last_window': self.last_window
+        }
+
+    def _reset_window(self):
+        self._frames = 0
+        self._count_sum = 0
+        self._count_max = 0
+        self._saturated = 0
+        self._heights = []
+
+    def _evaluate(self):
+        heights = np.concatenate(self._heights) if self._heights else None
+        box_p25 = float(np.percentile(heights, 25)) if heights is not None else None
+        saturated = self._saturated / self._frames
+
+        self.last_window = {
+            'frames': self._frames,
+            'mean_count': round(self._count_sum / self._frames, 2),
+            'max_count': self._count_max,
+            'saturated': round(saturated, 3),
+            'box_p25': round(box_p25, 1) if box_p25 is not None else None
+        }
+        count_max = self._count_max
+        self._reset_window()
+
+        if self._cooldown:
+            self._cooldown -= 1
+            return
+
+        want_up = saturated >= self.saturation or (box_p25 is not None and box_p25 < self.min_box)
+        if want_up:
+            self._down_votes = 0
+            if self.level < len(self.levels) - 1:
+                self._set_level(self.level + 1)
+            return
+
+        if self.level == 0:
+            return
+
+        lower_size, lower_max_det = self.levels[self.level - 1]
+        lower_p25 = box_p25 * lower_size / self.imgsz if box_p25 is not None else None
+        can_down = (saturated == 0 and count_max < lower_max_det
+                    and (lower_p25 is None or lower_p25 >= self.down_box))
+
+        self._down_votes = self._down_votes + 1 if can_down else 0
+        if self._down_votes >= self.down_windows:
+            self._set_level(self.level - 1)
+
+    def _set_level(self, level):
+        old_size, old_max_det = self.levels[self.level]
+        self.level = level
+        self.changes += 1
+        self.changed_at = time.time()
+        self._down_votes = 0
+        self._cooldown = self.cooldown_windows
+        print(f"🔄 Inference resolution {old_size}/{old_max_det} -> {self.imgsz}/{self.max_det} "
+              f"(window: {self.last_window})")
+
+
+def create_resolution_controller(config, imgsz):
+    """
+    AdaptiveResolution sesuai Config; jika ADAPTIVE_RES_ENABLED False, satu level
+    tetap (imgsz dari inference profile, Config.INFERENCE_MAX_DET).
+
+    Jika aktif, imgsz profile (hasil autotune, memenuhi target latency) menjadi
+    level tertinggi: level di atasnya dibuang, jadi adaptasi hanya menurunkan
+    resolusi saat scene sepi dan tidak pernah melewati target latency.
+    """
+    if not config.ADAPTIVE_RES_ENABLED:
+        return AdaptiveResolution([[imgsz, config.INFERENCE_MAX_DET]], imgsz)
+
+    levels = sorted(config.ADAPTIVE_RES_LEVELS)
+    # max_det level profile: dari level konfigurasi terkecil yang >= imgsz profile
+    top_max_det = next((max_det for size, max_det in levels if size >= imgsz), levels[-1][1])
+    levels = [[size, max_det] for size, max_det in levels if size < imgsz] + [[imgsz, top_max_det]]
+
+    return AdaptiveResolution(levels, imgsz,
+                              window=config.ADAPTIVE_RES_WINDOW,
+                              min_box=config.ADAPTIVE_RES_MIN_BOX,
+                              down_box=config.ADAPTIVE_RES_DOWN_BOX,
+                              saturation=config.ADAPTIVE_RES_SATURATION,
+                              down_windows=config.ADAPTIVE_RES_DOWN_WINDOWS)
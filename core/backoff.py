@@ -0,0 +1,23 @@
+import random
+
+
+class Backoff:
+    """
+    Exponential backoff dengan jitter untuk reconnect (stream, playlist HLS).
+
+    Delay ke-n diambil acak dari [cap / 2, cap] dengan cap = min(maximum, base * 2^n),
+    supaya banyak client yang putus bersamaan tidak reconnect serentak.
+    """
+
+    def __init__(self, base=0.5, maximum=30):
+        self.base = base
+        self.maximum = maximum
+        self.attempts = 0
+
+    def next_delay(self):
+        cap = min(self.maximum, self.base * (2 ** self.attempts))
+        self.attempts += 1
+        return random.uniform(cap / 2, cap)
+
+    def reset(self):
+        self.attempts = 0
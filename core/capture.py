@@ -0,0 +1,319 @@
+import time
+
+import cv2
+
+
+def output_size(source_size, width=None, height=None):
+    """
+    Ukuran output capture; jika hanya width / height yang diisi, aspect ratio dipertahankan
+
+    Returns:
+        (w, h): Ukuran genap (syarat swscale untuk format YUV)
+    """
+    src_w, src_h = source_size
+    if width and height:
+        w, h = width, height
+    elif width:
+        w, h = width, src_h * width / src_w
+    elif height:
+        w, h = src_w * height / src_h, height
+    else:
+        return src_w, src_h
+    return int(round(w / 2)) * 2, int(round(h / 2)) * 2
+
+
+class OpenCVCapture:
+    """
+    Backend cv2.VideoCapture (decode satu thread, resize setelah decode)
+    """
+
+    def __init__(self, source, width=None, height=None):
+        self.cap = cv2.VideoCapture(source)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.source_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                            int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.output_size = output_size(self.source_size, width, height) if self.source_size[0] else self.source_size
+        self.pts = None
+
+    @property
+    def scale(self):
+        if not self.source_size[0]:
+            return 1.0, 1.0
+        return self.output_size[0] / self.source_size[0], self.output_size[1] / self.source_size[1]
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return False, None
+
+        self.pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if (frame.shape[1], frame.shape[0]) != self.output_size:
+            frame = cv2.resize(frame, self.output_size, interpolation=cv2.INTER_AREA)
+        return True, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class PyAVCapture:
+    """
+    Backend PyAV (FFmpeg): decode multi-thread, dan konversi YUV -> BGR sekaligus
+    scale ke ukuran output di swscale (tanpa frame BGR resolusi penuh).
+
+    Frame dikembalikan sebagai array NumPy BGR (reformat + to_ndarray, tetap
+    satu alokasi + konversi per frame, tetapi di resolusi output); pts (detik)
+    dari stream tersedia di atribut pts setelah read().
+    """
+
+    def __init__(self, source, width=None, height=None, threads=0, timeout=10):
+        """
+        Args:
+            source: URL / path (HLS, RTSP, file)
+            width, height: Ukuran output (None = resolusi source)
+            threads: Thread decoder, 0 = otomatis
+            timeout: Timeout open / read (detik)
+        """
+        import av
+
+        self._av = av
+        self.container = None
+        self.pts = None
+        try:
+            self.container = av.open(source, timeout=timeout,
+                                     options={'rtsp_transport': 'tcp', 'fflags': 'nobuffer'})
+            self.stream = self.container.streams.video[0]
+            self.stream.thread_type = 'AUTO'  # Frame + slice threading
+            self.stream.codec_context.thread_count = threads
+        except (av.error.FFmpegError, IndexError) as e:
+            print(f"❌ PyAV failed to open {source}: {e}")
+            self.close_container()
+            self.source_size = self.output_size = (0, 0)
+            return
+
+        self.source_size = (self.stream.codec_context.width, self.stream.codec_context.height)
+        self.output_size = output_size(self.source_size, width, height)
+        self._frames = self.container.decode(self.stream)
+
+    @property
+    def scale(self):
+        if not self.source_size[0]:
+            return 1.0, 1.0
+        return self.output_size[0] / self.source_size[0], self.output_size[1] / self.source_size[1]
+
+    def isOpened(self):
+        return self.container is not None
+
+    def read(self):
+        if self.container is None:
+            return False, None
+
+        try:
+            frame = next(self._frames)
+        except (StopIteration, self._av.error.FFmpegError) as e:
+            if not isinstance(e, StopIteration):
+                print(f"⚠️ PyAV decode error: {e}")
+            return False, None
+
+        self.pts = float(frame.time) if frame.time is not None else None
+        width, height = self.output_size
+        frame = frame.reformat(width=width, height=height, format='bgr24', interpolation='AREA')
+        return True, frame.to_ndarray()
+
+    def release(self):
+        self.close_container()
+
+    def close_container(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+
+class HLSCapture:
+    """
+    Backend HLS dengan prefetch (HLSIngest): segment di-download ke ring buffer
+    lokal dan di-decode satu per satu dari disk (decoder OpenCVCapture / PyAVCapture).
+
+    read() menunggu segment baru sampai stall_timeout, sehingga gangguan singkat
+    di server tidak memutus pipeline selama masih ada segment di buffer. Dengan
+    realtime, frame diberikan sesuai pts (1x), jadi playback berjalan
+    live_edge segment di belakang live edge dan buffer itu yang menutup gangguan.
+    """
+
+    def __init__(self, source, config, width=None, height=None):
+        from core.backoff import Backoff
+        from core.hls_ingest import HLSIngest
+
+        self.width = width
+        self.height = height
+        self.decoder_backend = config.HLS_DECODER
+        self.threads = config.CAPTURE_THREADS
+        self.stall_timeout = config.HLS_STALL_TIMEOUT
+        self.realtime = config.HLS_REALTIME
+
+        self.ingest = HLSIngest(source, config.HLS_BUFFER_DIR, config.HLS_BUFFER_SEGMENTS,
+                                config.HLS_LIVE_EDGE_SEGMENTS, config.HLS_HTTP_TIMEOUT,
+                                Backoff(config.RECONNECT_BACKOFF_BASE, config.RECONNECT_BACKOFF_MAX)).start()
+
+        self.source_size = self.output_size = (0, 0)
+        self.pts = None
+        self._decoder = None
+        self._seq = None
+        self._segment_start = 0.0  # pts awal segment (jumlah durasi segment sebelumnya)
+        self._segment_duration = None
+        self._pts0 = None
+        self._clock0 = None  # time.time() saat pts 0 (pacing realtime)
+        self._open_next()
+
+    @property
+    def scale(self):
+        if not self.source_size[0]:
+            return 1.0, 1.0
+        return self.output_size[0] / self.source_size[0], self.output_size[1] / self.source_size[1]
+
+    def isOpened(self):
+        return self._decoder is not None
+
+    def read(self):
+        while self._decoder is not None:
+            ret, frame = self._decoder.read()
+            if ret:
+                # pts kontinu antar segment (pts decoder bisa mulai dari 0 di setiap file)
+                if self._pts0 is None:
+                    self._pts0 = self._decoder.pts or 0.0
+                self.pts = self._segment_start + (self._decoder.pts or 0.0) - self._pts0
+                if self.realtime:
+                    self._pace()
+                return True, frame
+
+            self._decoder.release()
+            self._decoder = None
+            if self._segment_duration:
+                self._segment_start += self._segment_duration
+            elif self.pts is not None:
+                self._segment_start = self.pts
+            self._open_next()
+
+        return False, None
+
+    def release(self):
+        if self._decoder is not None:
+            self._decoder.release()
+            self._decoder = None
+        self.ingest.stop()
+
+    def _pace(self):
+        now = time.time()
+        if self._clock0 is None or now - (self._clock0 + self.pts) > 1.0:
+            # Awal stream, setelah stall, atau consumer lebih lambat dari realtime: rebase clock
+            self._clock0 = now - self.pts
+            return
+        delay = self._clock0 + self.pts - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def _open_next(self):
+        while True:
+            segment = self.ingest.next_segment(self._seq, self.stall_timeout)
+            if segment is None:
+                print("⚠️ HLS stalled: no new segment in buffer")
+                return
+
+            self._seq, path, self._segment_duration = segment
+            self._pts0 = None
+            if self.decoder_backend == 'pyav':
+                decoder = PyAVCapture(path, self.width, self.height, self.threads)
+            else:
+                decoder = OpenCVCapture(path, self.width, self.height)
+
+            if decoder.isOpened():
+                self._decoder = decoder
+                self.source_size, self.output_size = decoder.source_size, decoder.output_size
+                return
+            print(f"⚠️ Skipping undecodable HLS segment {self._seq}")
+            decoder.release()
+
+
+class FrameBusCapture:
+    """
+    Backend frame bus: attach ke shared memory yang diisi tools/frame_ingest.py.
+
+    Ukuran frame mengikuti writer (CAPTURE_WIDTH / CAPTURE_HEIGHT di proses
+    ingest), source_size dari header bus sehingga scale polygon tetap benar.
+    read() selalu memberi frame terbaru (frame lama dilewati jika consumer
+    lambat); untuk akses tanpa copy pakai reader.read_view() langsung.
+    """
+
+    def __init__(self, name, timeout=10):
+        from core.frame_bus import FrameBusReader
+
+        self.timeout = timeout
+        self.reader = None
+        self.pts = None
+        self.seq = 0
+        try:
+            self.reader = FrameBusReader(name, timeout)
+        except (FileNotFoundError, TimeoutError) as e:
+            print(f"❌ Frame bus {name} not available ({e}), is tools/frame_ingest.py running?")
+            self.source_size = self.output_size = (0, 0)
+            return
+
+        self.source_size = self.reader.source_size
+        self.output_size = (self.reader.width, self.reader.height)
+        self.seq = max(self.reader.last_seq - 1, 0)  # Frame pertama boleh frame terakhir yang sudah ada di bus
+
+    @property
+    def scale(self):
+        if not self.source_size[0]:
+            return 1.0, 1.0
+        return self.output_size[0] / self.source_size[0], self.output_size[1] / self.source_size[1]
+
+    def isOpened(self):
+        return self.reader is not None
+
+    def read(self):
+        if self.reader is None:
+            return False, None
+
+        seq, frame, pts = self.reader.read(self.seq, self.timeout)
+        if seq is None:
+            print("⚠️ Frame bus stalled: no new frame from ingest")
+            return False, None
+
+        self.seq, self.pts = seq, pts
+        return True, frame
+
+    def release(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+
+def open_capture(config, source=None):
+    """
+    Buka video source dengan backend Config.CAPTURE_BACKEND ('opencv' / 'pyav' / 'hls' / 'framebus')
+
+    Returns:
+        Capture dengan interface isOpened() / read() / release() seperti cv2.VideoCapture,
+        plus atribut pts, source_size, output_size dan scale
+    """
+    source = source or config.VIDEO_SOURCE
+    backend = config.CAPTURE_BACKEND
+
+    if backend == 'framebus':
+        from core.frame_bus import bus_name
+        return FrameBusCapture(config.FRAME_BUS_NAME or bus_name(config.CAMERA_ID), config.FRAME_BUS_TIMEOUT)
+
+    if backend == 'pyav':
+        return PyAVCapture(source, config.CAPTURE_WIDTH, config.CAPTURE_HEIGHT, config.CAPTURE_THREADS)
+
+    if backend == 'hls':
+        return HLSCapture(source, config, config.CAPTURE_WIDTH, config.CAPTURE_HEIGHT)
+
+    if backend == 'opencv':
+        return OpenCVCapture(source, config.CAPTURE_WIDTH, config.CAPTURE_HEIGHT)
+
+    raise ValueError(f"Unknown CAPTURE_BACKEND: {backend}")
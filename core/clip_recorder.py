@@ -0,0 +1,223 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+
+class ClipRecorder:
+    """
+    Rekam klip video di sekitar event (ENTER/EXIT, lonjakan occupancy).
+
+    Frame loop memanggil push() setiap frame: frame di-encode JPEG dan
+    disimpan di pre-roll (deque N detik terakhir), jadi memory dibatasi
+    ukuran JPEG, bukan array mentah. trigger() memulai klip dari isi
+    pre-roll dan merekam sampai post_roll detik setelah trigger terakhir
+    (maksimum max_duration). Klip yang selesai di-mux ke MP4 oleh background
+    thread; jika antrian penuh, klip dibuang (frame loop tidak pernah menunggu).
+    """
+
+    def __init__(self, output_dir, pre_roll=5, post_roll=5, max_duration=60, jpeg_quality=80,
+                 max_queue=4, fourcc='mp4v', occupancy_threshold=None, on_clip=None):
+        """
+        Args:
+            output_dir: Folder file MP4
+            pre_roll: Detik sebelum trigger yang ikut di klip
+            post_roll: Detik setelah trigger terakhir
+            max_duration: Panjang maksimum satu klip (detik)
+            jpeg_quality: Kualitas JPEG frame di buffer
+            max_queue: Klip maksimum yang menunggu ditulis
+            fourcc: Codec cv2.VideoWriter
+            occupancy_threshold: Trigger 'OCCUPANCY' saat current_inside naik ke >= nilai ini (None = off)
+            on_clip: fn(clip) dipanggil dari writer thread setelah file selesai ditulis
+        """
+        self.output_dir = output_dir
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.max_duration = max_duration
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.fourcc = fourcc
+        self.occupancy_threshold = occupancy_threshold
+        self.on_clip = on_clip
+
+        self._pre_roll = deque()  # (timestamp, jpeg bytes)
+        self._pre_roll_bytes = 0
+        self._active = None
+        self._occupancy_armed = True
+
+        self.status = {'written': 0, 'dropped': 0, 'failed': 0, 'last_clip': None}
+        self._queue = queue.Queue(maxsize=max_queue)
+        os.makedirs(output_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    @property
+    def recording(self):
+        return self._active is not None
+
+    def push(self, frame, now=None):
+        """
+        Tambahkan frame ke pre-roll (dan ke klip yang sedang direkam)
+        """
+        now = now if now is not None else time.time()
+        ret, buffer = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ret:
+            return
+        item = (now, buffer.tobytes())
+
+        self._pre_roll.append(item)
+        self._pre_roll_bytes += len(item[1])
+        while self._pre_roll and self._pre_roll[0][0] < now - self.pre_roll:
+            self._pre_roll_bytes -= len(self._pre_roll.popleft()[1])
+
+        if self._active is not None:
+            clip = self._active
+            clip['frames'].append(item)
+            if now >= clip['end'] or now - clip['start'] >= self.max_duration:
+                self._finish()
+
+    def trigger(self, trigger_type, polygon_area_id=None, event_uid=None, now=None):
+        """
+        Mulai klip baru, atau perpanjang klip yang sedang direkam
+
+        Args:
+            trigger_type: 'ENTER', 'EXIT', 'IN', 'OUT', 'OCCUPANCY', ...
+            polygon_area_id: Area event
+            event_uid: uid event di database (dari DurableWriter.save_counting_event)
+        """
+        now = now if now is not None else time.time()
+        clip = self._active
+        if clip is None:
+            frames = list(self._pre_roll)
+            clip = self._active = {
+                'start': frames[0][0] if frames else now,
+                'end': now + self.post_roll,
+                'frames': frames,
+                'trigger_type': trigger_type,
+                'polygon_area_id': polygon_area_id,
+                'event_uids': []
+            }
+        else:
+            clip['end'] = max(clip['end'], now + self.post_roll)
+
+        if event_uid is not None:
+            clip['event_uids'].append(event_uid)
+
+    def observe_occupancy(self, current_inside, polygon_area_id=None, now=None):
+        """
+        Trigger 'OCCUPANCY' saat occupancy naik melewati threshold (aktif lagi setelah turun di bawahnya)
+        """
+        if self.occupancy_threshold is None:
+            return
+        if current_inside >= self.occupancy_threshold:
+            if self._occupancy_armed:
+                self._occupancy_armed = False
+                self.trigger('OCCUPANCY', polygon_area_id, now=now)
+        else:
+            self._occupancy_armed = True
+
+    def get_status(self):
+        return {
+            **self.status,
+            'recording': self.recording,
+            'pre_roll_frames': len(self._pre_roll),
+            'pre_roll_bytes': self._pre_roll_bytes,
+            'queued': self._queue.qsize()
+        }
+
+    def close(self):
+        """
+        Tulis klip yang sedang direkam, tunggu antrian selesai
+        """
+        if self._active is not None:
+            self._finish()
+        self._queue.put(None)
+        self._thread.join(timeout=30)
+
+    def _finish(self):
+        clip, self._active = self._active, None
+        try:
+            self._queue.put_nowait(clip)
+        except queue.Full:
+            self.status['dropped'] += 1
+            print(f"⚠️ Clip writer busy, dropped {clip['trigger_type']} clip ({len(clip['frames'])} frames)")
+
+    def _writer_loop(self):
+        while True:
+            clip = self._queue.get()
+            if clip is None:
+                return
+            try:
+                result = self._write(clip)
+            except Exception as e:
+                self.status['failed'] += 1
+                print(f"❌ Error writing clip: {e}")
+                continue
+
+            self.status['written'] += 1
+            self.status['last_clip'] = result['file_path']
+            if self.on_clip is not None:
+                try:
+                    self.on_clip(result)
+                except Exception as e:
+                    print(f"❌ Error saving clip record: {e}")
+
+    def _write(self, clip):
+        frames = clip['frames']
+        if not frames:
+            raise ValueError("empty clip")
+
+        first = cv2.imdecode(np.frombuffer(frames[0][1], dtype=np.uint8), cv2.IMREAD_COLOR)
+        height, width = first.shape[:2]
+        started_at, ended_at = frames[0][0], frames[-1][0]
+        # fps dari timestamp frame (stream bisa lebih lambat dari fps nominal, mis. FRAME_SKIP)
+        fps = (len(frames) - 1) / (ended_at - started_at) if ended_at > started_at else 1.0
+
+        name = f"clip_{datetime.fromtimestamp(started_at).strftime('%Y%m%d_%H%M%S')}_{clip['trigger_type'].lower()}"
+        path = os.path.join(self.output_dir, name + '.mp4')
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.output_dir, f"{name}_{suffix}.mp4")
+            suffix += 1
+        tmp_path = path[:-4] + '.part.mp4'  # Ekstensi .mp4 menentukan container di cv2.VideoWriter
+
+        video = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*self.fourcc), max(fps, 1.0), (width, height))
+        if not video.isOpened():
+            raise RuntimeError(f"cannot open video writer for {tmp_path}")
+        try:
+            video.write(first)
+            for _, data in frames[1:]:
+                frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if frame.shape[:2] != (height, width):
+                    frame = cv2.resize(frame, (width, height))
+                video.write(frame)
+        finally:
+            video.release()
+        os.replace(tmp_path, path)
+
+        print(f"🎬 Clip saved: {path} ({len(frames)} frames, {ended_at - started_at:.1f}s)")
+        return {
+            'file_path': path,
+            'file_size': os.path.getsize(path),
+            'trigger_type': clip['trigger_type'],
+            'polygon_area_id': clip['polygon_area_id'],
+            'event_uids': clip['event_uids'],
+            'started_at': datetime.fromtimestamp(started_at),
+            'ended_at': datetime.fromtimestamp(ended_at),
+            'num_frames': len(frames)
+        }
+
+
+def create_clip_recorder(config, on_clip=None):
+    """
+    ClipRecorder sesuai Config.CLIP_*, atau None jika CLIP_ENABLED = False
+    """
+    if not config.CLIP_ENABLED:
+        return None
+    return ClipRecorder(config.CLIP_DIR, config.CLIP_PRE_ROLL, config.CLIP_POST_ROLL, config.CLIP_MAX_DURATION,
+                        config.CLIP_JPEG_QUALITY, config.CLIP_QUEUE_SIZE, config.CLIP_FOURCC,
+                        config.CLIP_OCCUPANCY_THRESHOLD, on_clip)
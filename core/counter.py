@@ -1,25 +1,47 @@
+import threading
 from collections import defaultdict
 from datetime import datetime
 
+import numpy as np
+
+from core.event_buffer import EventBuffer
+from core.hysteresis import CountingStateMachine, TrackSmoother
+
 
 class PeopleCounter:
     """
     Class untuk tracking dan counting orang masuk/keluar polygon
     """
 
-    def __init__(self, polygon_checker):
+    def __init__(self, polygon_checker, event_buffer=None, state_machine=None, smoother=None, area_id=None):
+        """
+        Args:
+            polygon_checker: PolygonChecker area yang dihitung
+            event_buffer: EventBuffer untuk log event (default: drop_oldest, 10000 event)
+            state_machine: CountingStateMachine (buffer band + debounce), None = tanpa hysteresis
+            smoother: TrackSmoother (Kalman) untuk centroid, None = centroid mentah
+            area_id: ID polygon_areas di database (None = polygon default)
+        """
         self.polygon_checker = polygon_checker
+        self.area_id = area_id
+        self.polygon_version = 1
+        self.state_machine = state_machine
+        self.smoother = smoother
 
         # Track status setiap object
-        self.tracked_objects = {}  # {track_id: {'inside': bool, 'last_centroid': (x,y)}}
+        self.tracked_objects = {}  # {track_id: {'inside': bool, 'last_centroid': (x,y), 'entered_at': datetime}}
 
         # Counters
         self.total_entered = 0
         self.total_exited = 0
         self.current_inside = 0
 
-        # Events log
-        self.events = []  # List of events untuk disimpan ke database
+        # Events log (bounded ring buffer, dibaca consumer lewat events_since)
+        self.events = event_buffer if event_buffer is not None else EventBuffer()
+        self._pending_seq = self.events.next_seq  # Cursor untuk get_pending_events
+
+        # Pipeline thread (update) vs API thread (swap_polygon, get_stats)
+        self._lock = threading.RLock()
 
     def update(self, track_id, centroid, frame_number):
         """
@@ -33,15 +55,27 @@ class PeopleCounter:
         Returns:
             event: 'ENTER', 'EXIT', or None
         """
-        is_inside = self.polygon_checker.is_inside(centroid)
+        with self._lock:
+            return self._update(track_id, centroid, frame_number)
+
+    def _update(self, track_id, centroid, frame_number):
+        if self.smoother is not None:
+            centroid = self.smoother.smooth(track_id, centroid, frame_number)
+
+        if self.state_machine is not None:
+            distance = self.polygon_checker.signed_distance(centroid)
+        else:
+            is_inside = self.polygon_checker.is_inside(centroid)
         event = None
 
         # Jika object baru
         if track_id not in self.tracked_objects:
-            self.tracked_objects[track_id] = {
-                'inside': is_inside,
-                'last_centroid': centroid
-            }
+            if self.state_machine is not None:
+                self.tracked_objects[track_id] = self.state_machine.initial_state(distance)
+                is_inside = self.tracked_objects[track_id]['inside']
+            else:
+                self.tracked_objects[track_id] = {'inside': is_inside}
+            self.tracked_objects[track_id]['last_centroid'] = centroid
 
             # Jika object pertama kali muncul di dalam polygon
             if is_inside:
@@ -50,6 +84,9 @@ class PeopleCounter:
         else:
             # Object sudah ada, cek perubahan status
             prev_status = self.tracked_objects[track_id]['inside']
+            if self.state_machine is not None:
+                self.state_machine.step(self.tracked_objects[track_id], distance)
+                is_inside = self.tracked_objects[track_id]['inside']
 
             # Deteksi boundary crossing
             if not prev_status and is_inside:
@@ -58,10 +95,13 @@ class PeopleCounter:
                 self.current_inside += 1
                 event = 'ENTER'
 
+                now = datetime.now()
+                self.tracked_objects[track_id]['entered_at'] = now
+
                 self.events.append({
                     'track_id': track_id,
                     'event_type': 'ENTER',
-                    'timestamp': datetime.now(),
+                    'timestamp': now,
                     'frame_number': frame_number,
                     'centroid': centroid
                 })
@@ -74,12 +114,18 @@ class PeopleCounter:
                 self.current_inside -= 1
                 event = 'EXIT'
 
+                # Dwell time hanya diketahui jika ENTER-nya teramati (bukan muncul langsung di dalam)
+                now = datetime.now()
+                entered_at = self.tracked_objects[track_id].pop('entered_at', None)
+                dwell_seconds = (now - entered_at).total_seconds() if entered_at else None
+
                 self.events.append({
                     'track_id': track_id,
                     'event_type': 'EXIT',
-                    'timestamp': datetime.now(),
+                    'timestamp': now,
                     'frame_number': frame_number,
-                    'centroid': centroid
+                    'centroid': centroid,
+                    'dwell_seconds': dwell_seconds
                 })
 
                 print(f"⬅️ EXIT: Track ID {track_id} | Total Exited: {self.total_exited}")
@@ -90,32 +136,146 @@ class PeopleCounter:
 
         return event
 
+    def update_batch(self, track_ids, centroids, frame_number):
+        """
+        Update semua track dalam satu frame
+
+        Returns:
+            dict: {track_id: 'ENTER' / 'EXIT'} untuk track yang berubah status
+        """
+        frame_events = {}
+        with self._lock:
+            for track_id, centroid in zip(track_ids, centroids):
+                event = self._update(track_id, centroid, frame_number)
+                if event:
+                    frame_events[track_id] = event
+        return frame_events
+
+    def swap_polygon(self, polygon_checker, area_id=None):
+        """
+        Ganti geometry polygon tanpa reset counter.
+
+        Total ENTER/EXIT tetap, membership track yang sedang aktif dihitung
+        ulang terhadap polygon baru dalam satu pass vectorized. Perubahan
+        membership karena geometry berubah tidak menghasilkan event.
+
+        Returns:
+            int: Versi polygon baru
+        """
+        with self._lock:
+            track_ids = list(self.tracked_objects)
+            if track_ids:
+                points = [self.tracked_objects[tid]['last_centroid'] for tid in track_ids]
+                inside = polygon_checker.contains_points(points)
+
+                for track_id, is_inside in zip(track_ids, inside):
+                    state = self.tracked_objects[track_id]
+                    if state['inside'] and not is_inside:
+                        state.pop('entered_at', None)  # Dwell time di area lama tidak valid lagi
+                    state['inside'] = bool(is_inside)
+                    if 'candidate_frames' in state:
+                        state['candidate_frames'] = 0
+
+            self.current_inside = int(np.count_nonzero(inside)) if track_ids else 0
+            self.polygon_checker = polygon_checker
+            self.area_id = area_id
+            self.polygon_version += 1
+            return self.polygon_version
+
+    def detach_area(self):
+        """
+        Area di database dihapus: geometry tetap dipakai, tetapi area_id dikosongkan
+        supaya event / summary tidak lagi ditulis ke polygon yang sudah tidak ada
+        """
+        with self._lock:
+            self.area_id = None
+
+    def is_track_inside(self, track_id):
+        """
+        Status inside track menurut counter (hysteresis + centroid Kalman), bukan
+        is_inside centroid mentah, supaya warna box dan visitor sama dengan hitungan ENTER/EXIT
+        """
+        with self._lock:
+            state = self.tracked_objects.get(track_id)
+            return bool(state is not None and state['inside'])
+
     def get_stats(self):
         """
         Dapatkan statistik counting
         """
-        return {
-            'total_entered': self.total_entered,
-            'total_exited': self.total_exited,
-            'current_inside': self.current_inside,
-            'total_tracked': len(self.tracked_objects)
-        }
+        with self._lock:
+            return {
+                'total_entered': self.total_entered,
+                'total_exited': self.total_exited,
+                'current_inside': self.current_inside,
+                'total_tracked': len(self.tracked_objects),
+                'polygon_version': self.polygon_version
+            }
 
     def get_pending_events(self):
         """
         Dapatkan events yang belum disimpan ke database
         """
-        events = self.events.copy()
-        self.events.clear()
+        events, self._pending_seq = self.events.events_since(self._pending_seq)
         return events
 
+    def events_since(self, seq):
+        """
+        Baca events mulai dari cursor seq tanpa menghapus dari buffer
+
+        Returns:
+            (events, next_seq)
+        """
+        return self.events.events_since(seq)
+
     def cleanup_old_tracks(self, active_track_ids):
         """
         Hapus tracking object yang sudah tidak aktif
+
+        Returns:
+            list: Track ID yang di-retire
         """
-        inactive_ids = set(self.tracked_objects.keys()) - set(active_track_ids)
-        for track_id in inactive_ids:
-            # Jika object hilang saat masih di dalam, kurangi counter
-            if self.tracked_objects[track_id]['inside']:
-                self.current_inside -= 1
-            del self.tracked_objects[track_id]
\ No newline at end of file
+        with self._lock:
+            inactive_ids = set(self.tracked_objects.keys()) - set(active_track_ids)
+            for track_id in inactive_ids:
+                # Jika object hilang saat masih di dalam, kurangi counter
+                if self.tracked_objects[track_id]['inside']:
+                    self.current_inside -= 1
+                del self.tracked_objects[track_id]
+                if self.smoother is not None:
+                    self.smoother.drop(track_id)
+            return list(inactive_ids)
+
+
+def create_counter(config, polygon_checker, event_buffer=None, area_id=None):
+    """
+    Buat counter sesuai Config.COUNTING_MODE
+
+    Args:
+        config: Config
+        polygon_checker: PolygonChecker area aktif
+        event_buffer: EventBuffer untuk log event
+        area_id: ID polygon_areas di database
+
+    Returns:
+        PeopleCounter (mode 'polygon') atau TripwireCounter (mode 'tripwire')
+    """
+    if config.COUNTING_MODE == 'polygon':
+        state_machine = None
+        if config.HYSTERESIS_ENABLED:
+            state_machine = CountingStateMachine(config.HYSTERESIS_INNER_MARGIN,
+                                                 config.HYSTERESIS_OUTER_MARGIN,
+                                                 config.HYSTERESIS_MIN_FRAMES)
+        smoother = None
+        if config.KALMAN_ENABLED:
+            smoother = TrackSmoother(config.KALMAN_PROCESS_NOISE, config.KALMAN_MEASUREMENT_NOISE)
+
+        return PeopleCounter(polygon_checker, event_buffer, state_machine, smoother, area_id)
+
+    if config.COUNTING_MODE == 'tripwire':
+        from core.tripwire import TripwireCounter
+
+        # Tanpa COUNTING_LINES, edge polygon dipakai sebagai tripwire (IN = masuk polygon)
+        return TripwireCounter(config.COUNTING_LINES or None, event_buffer, polygon_checker, area_id)
+
+    raise ValueError(f"Unknown COUNTING_MODE: {config.COUNTING_MODE}")
@@ -0,0 +1,76 @@
+import threading
+from datetime import datetime, timedelta
+
+from core.sketches import DDSketch
+
+
+class DwellAnalytics:
+    """
+    Statistik dwell time (ENTER -> EXIT) per area dan per jam.
+
+    Setiap bucket (area, jam) berisi satu DDSketch, diisi dari EXIT event
+    PeopleCounter yang membawa dwell_seconds. Bucket yang lebih tua dari
+    retention_hours dibuang, sehingga memory tetap terbatas.
+    """
+
+    def __init__(self, relative_accuracy=0.01, retention_hours=48):
+        """
+        Args:
+            relative_accuracy: Akurasi relatif quantile
+            retention_hours: Jumlah jam yang disimpan di memory
+        """
+        self.relative_accuracy = relative_accuracy
+        self.retention_hours = retention_hours
+        self.sketches = {}  # {(area_id, hour_start): DDSketch}
+        self._lock = threading.Lock()
+
+    def consume(self, events, area_id):
+        """
+        Masukkan event dari counter (hasil events_since); hanya EXIT / OUT dengan dwell_seconds yang dipakai
+        """
+        with self._lock:
+            for ev in events:
+                dwell = ev.get('dwell_seconds')
+                if dwell is None:
+                    continue
+
+                hour = ev['timestamp'].replace(minute=0, second=0, microsecond=0)
+                key = (area_id, hour)
+                sketch = self.sketches.get(key)
+                if sketch is None:
+                    sketch = self.sketches[key] = DDSketch(self.relative_accuracy)
+                sketch.add(dwell)
+
+            self._expire()
+
+    def quantiles(self, since, area_id=None, qs=(0.5, 0.9, 0.99)):
+        """
+        Quantile dwell time per area dan jam
+
+        Returns:
+            list: Dict area_id, hour, count, mean dan p50/p90/p99 (detik), urut per jam
+        """
+        since_hour = since.replace(minute=0, second=0, microsecond=0)
+        rows = []
+
+        with self._lock:
+            for (key_area, hour), sketch in sorted(self.sketches.items(), key=lambda kv: (kv[0][1], str(kv[0][0]))):
+                if hour < since_hour or (area_id is not None and key_area != area_id):
+                    continue
+
+                row = {
+                    'area_id': key_area,
+                    'hour': hour.strftime("%Y-%m-%d %H:00:00"),
+                    'count': sketch.count,
+                    'mean': round(sketch.sum / sketch.count, 2)
+                }
+                for q in qs:
+                    row[f"p{int(round(q * 100))}"] = round(sketch.quantile(q), 2)
+                rows.append(row)
+
+        return rows
+
+    def _expire(self):
+        cutoff = datetime.now() - timedelta(hours=self.retention_hours)
+        for key in [k for k in self.sketches if k[1] < cutoff]:
+            del self.sketches[key]
@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+
+
+class EventBuffer:
+    """
+    Ring buffer event counter dengan kapasitas tetap dan nomor urut (seq).
+
+    Setiap event mendapat 'seq' yang naik terus. Consumer (DB writer, push
+    channel, alert) menyimpan cursor sendiri dan membaca dengan
+    events_since(seq), sehingga buffer tidak perlu di-copy atau di-clear.
+
+    Overflow policy saat buffer penuh:
+        'drop_oldest' - event paling lama dibuang
+        'spill'       - event paling lama ditulis ke segment file JSONL (append-only)
+    """
+
+    OVERFLOW_POLICIES = ('drop_oldest', 'spill')
+
+    def __init__(self, capacity=10000, overflow_policy='drop_oldest', spill_dir=None,
+                 segment_max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            capacity: Jumlah event maksimum di memory
+            overflow_policy: 'drop_oldest' atau 'spill'
+            spill_dir: Folder segment file (wajib untuk policy 'spill')
+            segment_max_bytes: Ukuran maksimum satu segment sebelum rotate
+        """
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        if overflow_policy == 'spill' and not spill_dir:
+            raise ValueError("spill_dir is required for overflow policy 'spill'")
+
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.spill_dir = spill_dir
+        self.segment_max_bytes = segment_max_bytes
+
+        self._slots = [None] * capacity
+        # Seq melanjutkan segment spill run sebelumnya, supaya nama segment dan seq tidak bentrok
+        self.next_seq = self._last_spilled_seq() + 1 if overflow_policy == 'spill' else 0
+        self._first_seq = self.next_seq  # Seq event pertama run ini
+        self.dropped = 0  # Jumlah event yang dibuang (policy drop_oldest)
+        self.spilled = 0  # Jumlah event yang ditulis ke disk (policy spill)
+
+        self._segment_file = None
+        self._lock = threading.Lock()
+
+    @property
+    def oldest_seq(self):
+        """Seq paling lama yang masih ada di memory"""
+        return max(self._first_seq, self.next_seq - self.capacity)
+
+    def __len__(self):
+        return self.next_seq - self.oldest_seq
+
+    def append(self, event):
+        """
+        Tambah event ke buffer
+
+        Returns:
+            seq: Nomor urut event
+        """
+        with self._lock:
+            seq = self.next_seq
+            idx = seq % self.capacity
+
+            evicted = self._slots[idx]
+            if evicted is not None:
+                if self.overflow_policy == 'spill':
+                    self._spill(evicted)
+                else:
+                    self.dropped += 1
+
+            event['seq'] = seq
+            self._slots[idx] = event
+            self.next_seq += 1
+            return seq
+
+    def events_since(self, seq):
+        """
+        Ambil event dengan seq >= seq yang masih ada di memory
+
+        Args:
+            seq: Cursor consumer (seq event berikutnya yang ingin dibaca)
+
+        Returns:
+            (events, next_seq): List event dan cursor baru untuk consumer
+        """
+        with self._lock:
+            start = max(seq, self.oldest_seq)
+            events = [self._slots[s % self.capacity] for s in range(start, self.next_seq)]
+            return events, self.next_seq
+
+    def read_spilled(self, since_seq=0):
+        """
+        Baca event yang sudah di-spill ke disk, mulai dari since_seq
+        """
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return
+
+        with self._lock:
+            if self._segment_file:
+                self._segment_file.flush()
+
+        for name in self._segment_names():
+            with open(os.path.join(self.spill_dir, name)) as f:
+                for line in f:
+                    event = json.loads(line)
+                    if event['seq'] >= since_seq:
+                        yield event
+
+    def close(self):
+        with self._lock:
+            if self._segment_file:
+                self._segment_file.close()
+                self._segment_file = None
+
+    def _segment_names(self):
+        # Nama segment berisi seq event pertama (zero-padded), urutan nama = urutan seq
+        return sorted(f for f in os.listdir(self.spill_dir)
+                      if f.startswith('events_') and f.endswith('.jsonl'))
+
+    def _last_spilled_seq(self):
+        """
+        Seq terbesar di segment spill yang sudah ada di disk, -1 jika belum ada
+        """
+        if not os.path.isdir(self.spill_dir):
+            return -1
+
+        segments = self._segment_names()
+        if not segments:
+            return -1
+
+        # Cukup segment terakhir: seq di segment lain lebih kecil dari seq awal segment ini
+        last_seq = int(segments[-1][len('events_'):-len('.jsonl')])
+        with open(os.path.join(self.spill_dir, segments[-1])) as f:
+            for line in f:
+                try:
+                    last_seq = max(last_seq, json.loads(line)['seq'])
+                except (ValueError, KeyError):
+                    pass  # Baris terakhir terpotong (proses mati saat menulis)
+        return last_seq
+
+    def _spill(self, event):
+        if self._segment_file is None or self._segment_file.tell() >= self.segment_max_bytes:
+            if self._segment_file:
+                self._segment_file.close()
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"events_{event['seq']:012d}.jsonl")
+            self._segment_file = open(path, 'a', buffering=1)
+
+        self._segment_file.write(json.dumps(event, default=str) + '\n')
+        self.spilled += 1
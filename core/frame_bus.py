@@ -0,0 +1,237 @@
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+_MAGIC = 0x50434642  # 'PCFB'
+_HEADER_FIELDS = 16
+# Index header (uint64)
+_H_MAGIC, _H_WIDTH, _H_HEIGHT, _H_CHANNELS, _H_SLOTS, _H_LAST_SEQ, _H_SOURCE_W, _H_SOURCE_H, _H_PID = range(9)
+
+
+class _BusLayout:
+    """
+    Layout shared memory:
+        header   uint64[16]   magic, ukuran frame, jumlah slot, seq terakhir, ukuran source, pid writer
+        slot_seq uint64[N]    seqlock per slot: 2*seq+1 saat ditulis, 2*seq setelah selesai
+        slot_pts float64[N]   pts frame (detik)
+        slot_at  float64[N]   waktu publish (time.time)
+        frames   uint8[N, H, W, C]
+    """
+
+    def __init__(self, buf, width, height, channels, slots):
+        offset = 0
+        self.header = np.ndarray((_HEADER_FIELDS,), dtype=np.uint64, buffer=buf, offset=offset)
+        offset += self.header.nbytes
+        self.slot_seq = np.ndarray((slots,), dtype=np.uint64, buffer=buf, offset=offset)
+        offset += self.slot_seq.nbytes
+        self.slot_pts = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += self.slot_pts.nbytes
+        self.slot_at = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += self.slot_at.nbytes
+        self.frames = np.ndarray((slots, height, width, channels), dtype=np.uint8, buffer=buf, offset=offset)
+
+    @staticmethod
+    def size(width, height, channels, slots):
+        return 8 * _HEADER_FIELDS + 8 * 3 * slots + slots * height * width * channels
+
+
+def bus_name(camera_id):
+    return f"pc_frames_{camera_id}"
+
+
+def _pid_alive(pid):
+    """True jika proses pid masih ada (os.kill signal 0)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Ada, tapi milik user lain
+    return True
+
+
+class FrameBusWriter:
+    """
+    Writer ring buffer frame di shared memory (satu per kamera, dipakai tools/frame_ingest.py)
+    """
+
+    def __init__(self, name, width, height, channels=3, slots=4, source_size=None):
+        """
+        Args:
+            name: Nama shared memory (bus_name(camera_id))
+            width, height, channels: Ukuran frame (semua frame di-resize ke ukuran ini)
+            slots: Jumlah slot ring; reader aman selama memproses < slots frame publish
+            source_size: (w, h) resolusi asli source, untuk scale polygon di reader
+        """
+        size = _BusLayout.size(width, height, channels, slots)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Segment hanya boleh diambil alih jika writer sebelumnya sudah mati tanpa cleanup
+            stale = shared_memory.SharedMemory(name=name)
+            pid = 0
+            if stale.size >= 8 * _HEADER_FIELDS:
+                header = np.ndarray((_HEADER_FIELDS,), dtype=np.uint64, buffer=stale.buf)
+                if header[_H_MAGIC] == _MAGIC:
+                    pid = int(header[_H_PID])
+                del header
+            stale.close()
+            if pid and _pid_alive(pid):
+                raise RuntimeError(f"Frame bus {name} is already owned by running writer (pid {pid})")
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.name = name
+        self.width, self.height, self.channels, self.slots = width, height, channels, slots
+        self.layout = _BusLayout(self.shm.buf, width, height, channels, slots)
+        self.layout.slot_seq[:] = 0
+
+        source_w, source_h = source_size or (width, height)
+        header = self.layout.header
+        header[:] = 0
+        header[_H_WIDTH], header[_H_HEIGHT], header[_H_CHANNELS], header[_H_SLOTS] = width, height, channels, slots
+        header[_H_SOURCE_W], header[_H_SOURCE_H], header[_H_PID] = source_w, source_h, os.getpid()
+        header[_H_MAGIC] = _MAGIC  # Ditulis terakhir: reader menunggu magic sebelum membaca layout
+        self.seq = 0
+
+    def publish(self, frame, pts=None):
+        """
+        Tulis frame ke slot berikutnya
+
+        Returns:
+            int: Sequence number frame
+        """
+        if frame.shape[:2] != (self.height, self.width):
+            import cv2
+            frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+
+        self.seq += 1
+        slot = self.seq % self.slots
+        layout = self.layout
+
+        layout.slot_seq[slot] = 2 * self.seq + 1  # Ganjil: sedang ditulis
+        layout.frames[slot] = frame.reshape(self.height, self.width, self.channels)
+        layout.slot_pts[slot] = pts if pts is not None else np.nan
+        layout.slot_at[slot] = time.time()
+        layout.slot_seq[slot] = 2 * self.seq
+        layout.header[_H_LAST_SEQ] = self.seq
+        return self.seq
+
+    def close(self):
+        self.layout = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class FrameBusReader:
+    """
+    Reader frame bus. read() mengembalikan salinan frame yang dijamin utuh
+    (seqlock), read_view() view langsung ke shared memory (zero-copy) yang
+    harus dicek dengan still_valid() setelah dipakai.
+    """
+
+    def __init__(self, name, timeout=10):
+        """
+        Args:
+            name: Nama shared memory
+            timeout: Menunggu writer membuat bus (detik)
+        """
+        deadline = time.time() + timeout
+        while True:
+            try:
+                self.shm = shared_memory.SharedMemory(name=name)
+                break
+            except FileNotFoundError:
+                if time.time() >= deadline:
+                    raise
+                time.sleep(0.2)
+
+        # Reader tidak memiliki segment: jangan di-unlink resource_tracker saat proses ini exit
+        try:
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        except Exception:
+            pass
+
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.uint64, buffer=self.shm.buf)
+        while header[_H_MAGIC] != _MAGIC:
+            if time.time() >= deadline:
+                raise TimeoutError(f"Frame bus {name} is not initialized")
+            time.sleep(0.05)
+
+        self.name = name
+        self.width, self.height = int(header[_H_WIDTH]), int(header[_H_HEIGHT])
+        self.channels, self.slots = int(header[_H_CHANNELS]), int(header[_H_SLOTS])
+        self.source_size = (int(header[_H_SOURCE_W]), int(header[_H_SOURCE_H]))
+        self.layout = _BusLayout(self.shm.buf, self.width, self.height, self.channels, self.slots)
+
+    @property
+    def last_seq(self):
+        return int(self.layout.header[_H_LAST_SEQ])
+
+    def wait(self, after_seq=0, timeout=5, poll=0.002):
+        """
+        Tunggu sampai ada frame dengan seq > after_seq
+
+        Returns:
+            int: Seq terbaru, atau None jika timeout
+        """
+        deadline = time.time() + timeout
+        while True:
+            seq = self.last_seq
+            if seq > after_seq:
+                return seq
+            if time.time() >= deadline:
+                return None
+            time.sleep(poll)
+
+    def read(self, after_seq=0, timeout=5):
+        """
+        Salinan frame terbaru setelah after_seq
+
+        Returns:
+            (seq, frame, pts) atau (None, None, None) jika timeout
+        """
+        layout = self.layout
+        while True:
+            seq = self.wait(after_seq, timeout)
+            if seq is None:
+                return None, None, None
+
+            slot = seq % self.slots
+            before = int(layout.slot_seq[slot])
+            if before != 2 * seq:
+                continue  # Slot sudah ditimpa frame lebih baru: ambil ulang yang terbaru
+            frame = layout.frames[slot].copy()
+            pts = float(layout.slot_pts[slot])
+            if int(layout.slot_seq[slot]) == before:
+                return seq, frame, (None if np.isnan(pts) else pts)
+
+    def read_view(self, after_seq=0, timeout=5):
+        """
+        View read-only frame terbaru di shared memory (tanpa copy)
+
+        Returns:
+            (seq, frame_view) atau (None, None); cek still_valid(seq) sebelum hasil dipakai
+        """
+        seq = self.wait(after_seq, timeout)
+        if seq is None:
+            return None, None
+        view = self.layout.frames[seq % self.slots]
+        view.flags.writeable = False
+        return seq, view
+
+    def still_valid(self, seq):
+        """
+        True jika slot frame seq belum ditimpa writer
+        """
+        return int(self.layout.slot_seq[seq % self.slots]) == 2 * seq
+
+    def close(self):
+        self.layout = None
+        self.shm.close()
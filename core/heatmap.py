@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class OccupancyHeatmap:
+    """
+    Heatmap posisi centroid dengan resolusi diperkecil dan decay eksponensial.
+
+    Decay dilakukan secara lazy: bukan seluruh grid dikalikan setiap frame,
+    tetapi bobot centroid baru diperbesar 2^(t / half_life). Grid
+    dinormalisasi ulang sesekali supaya nilainya tidak overflow.
+    """
+
+    def __init__(self, scale=8, half_life=600, snapshot_dir=None, snapshot_interval=60):
+        """
+        Args:
+            scale: Faktor downscale grid terhadap frame (8 = 1/8 resolusi)
+            half_life: Waktu paruh (detik) bobot sebuah observasi
+            snapshot_dir: Folder snapshot grid (None = tanpa snapshot)
+            snapshot_interval: Interval (detik) flush snapshot ke disk
+        """
+        self.scale = scale
+        self.half_life = half_life
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval = snapshot_interval
+
+        self.grid = None
+        self.frame_size = None  # (width, height)
+        self.background = None  # Frame terakhir, untuk overlay saat render
+
+        self._epoch = time.time()  # Waktu referensi bobot 1.0
+        self._last_snapshot = time.time()
+        self._snapshot_thread = None
+        self._lock = threading.Lock()
+
+        if snapshot_dir:
+            self._load_snapshot()
+
+    def accumulate(self, centroids, frame_shape, now=None):
+        """
+        Tambahkan centroid satu frame ke grid
+
+        Args:
+            centroids: List / array (x, y) centroid
+            frame_shape: frame.shape dari frame asal centroid
+            now: Timestamp (default: time.time())
+        """
+        now = now if now is not None else time.time()
+        height, width = frame_shape[:2]
+
+        with self._lock:
+            if self.grid is None or self.frame_size != (width, height):
+                self.grid = np.zeros((height // self.scale + 1, width // self.scale + 1), dtype=np.float64)
+                self.frame_size = (width, height)
+                self._epoch = now
+
+            # Rebase epoch sebelum bobot terlalu besar (setiap ~32 half-life)
+            if now - self._epoch > 32 * self.half_life:
+                self.grid *= 2.0 ** (-(now - self._epoch) / self.half_life)
+                self._epoch = now
+
+            if len(centroids):
+                pts = np.asarray(centroids, dtype=np.int64) // self.scale
+                cols = np.clip(pts[:, 0], 0, self.grid.shape[1] - 1)
+                rows = np.clip(pts[:, 1], 0, self.grid.shape[0] - 1)
+                np.add.at(self.grid, (rows, cols), 2.0 ** ((now - self._epoch) / self.half_life))
+
+        if self.snapshot_dir and now - self._last_snapshot >= self.snapshot_interval:
+            self._snapshot_async(now)
+
+    def values(self, now=None):
+        """
+        Grid dengan decay sampai waktu sekarang
+
+        Returns:
+            np.ndarray: Grid float (kosong jika belum ada data)
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            if self.grid is None:
+                return np.zeros((1, 1))
+            return self.grid * 2.0 ** (-(now - self._epoch) / self.half_life)
+
+    def render(self, alpha=0.5):
+        """
+        Render heatmap berwarna (JET), di-overlay ke frame terakhir jika ada
+
+        Returns:
+            np.ndarray: Image BGR ukuran frame asli
+        """
+        grid = self.values()
+        peak = grid.max()
+        normalized = (grid / peak * 255).astype(np.uint8) if peak > 0 else np.zeros(grid.shape, np.uint8)
+
+        width, height = self.frame_size or (grid.shape[1] * self.scale, grid.shape[0] * self.scale)
+        colored = cv2.applyColorMap(cv2.resize(normalized, (width, height), interpolation=cv2.INTER_LINEAR),
+                                    cv2.COLORMAP_JET)
+
+        background = self.background
+        if background is not None and background.shape[:2] == (height, width):
+            colored = cv2.addWeighted(colored, alpha, background, 1 - alpha, 0)
+        return colored
+
+    def render_png(self, alpha=0.5):
+        ok, buffer = cv2.imencode('.png', self.render(alpha))
+        if not ok:
+            raise RuntimeError("Failed to encode heatmap")
+        return buffer.tobytes()
+
+    def snapshot(self, now=None):
+        """
+        Simpan grid ke disk secara sinkron (atomic replace), dimuat lagi saat start.
+        Dipakai saat shutdown; frame loop memakai _snapshot_async
+        """
+        now = now if now is not None else time.time()
+        self._last_snapshot = now
+        state = self._copy_state()
+        if state is None:
+            return
+
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+        self._write_snapshot(*state)
+
+    def _snapshot_async(self, now):
+        """
+        Salin grid di bawah lock, kompresi + tulis file di background thread
+        """
+        self._last_snapshot = now
+        thread = self._snapshot_thread
+        if thread is not None and thread.is_alive():
+            return  # Snapshot sebelumnya belum selesai, coba lagi interval berikutnya
+        state = self._copy_state()
+        if state is None:
+            return
+
+        self._snapshot_thread = threading.Thread(target=self._write_snapshot, args=state, daemon=True)
+        self._snapshot_thread.start()
+
+    def _copy_state(self):
+        with self._lock:
+            if self.grid is None:
+                return None
+            return self.grid.copy(), self._epoch, self.frame_size
+
+    def _write_snapshot(self, grid, epoch, frame_size):
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            path = os.path.join(self.snapshot_dir, 'heatmap.npz')
+            tmp_path = path + '.tmp.npz'
+            np.savez_compressed(tmp_path, grid=grid, epoch=epoch,
+                                frame_size=np.asarray(frame_size), scale=self.scale)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"❌ Error writing heatmap snapshot: {e}")
+
+    def _load_snapshot(self):
+        path = os.path.join(self.snapshot_dir, 'heatmap.npz')
+        if not os.path.exists(path):
+            return
+
+        try:
+            with np.load(path) as data:
+                if int(data['scale']) != self.scale:
+                    print("⚠️ Heatmap snapshot scale changed, starting fresh")
+                    return
+                self.grid = data['grid']
+                self._epoch = float(data['epoch'])
+                self.frame_size = tuple(int(v) for v in data['frame_size'])
+            print(f"✅ Heatmap snapshot loaded: {path}")
+        except Exception as e:
+            print(f"⚠️ Failed to load heatmap snapshot: {e}")
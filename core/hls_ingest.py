@@ -0,0 +1,222 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from urllib.parse import urljoin, urlparse
+
+from core.backoff import Backoff
+
+
+def parse_playlist(text, base_url):
+    """
+    Parse playlist HLS (master atau media)
+
+    Returns:
+        dict: variants [(bandwidth, url)], segments [(url, duration)], media_sequence,
+              target_duration, endlist
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or lines[0] != '#EXTM3U':
+        raise ValueError("Not an HLS playlist")
+
+    playlist = {'variants': [], 'segments': [], 'media_sequence': 0, 'target_duration': None, 'endlist': False}
+    duration = None
+    bandwidth = None
+
+    for line in lines[1:]:
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            bandwidth = 0
+            for attr in line.split(':', 1)[1].split(','):
+                if attr.startswith('BANDWIDTH='):
+                    bandwidth = int(attr.split('=', 1)[1])
+        elif line.startswith('#EXT-X-MEDIA-SEQUENCE:'):
+            playlist['media_sequence'] = int(line.split(':', 1)[1])
+        elif line.startswith('#EXT-X-TARGETDURATION:'):
+            playlist['target_duration'] = float(line.split(':', 1)[1])
+        elif line.startswith('#EXTINF:'):
+            duration = float(line.split(':', 1)[1].split(',')[0])
+        elif line.startswith('#EXT-X-ENDLIST'):
+            playlist['endlist'] = True
+        elif not line.startswith('#'):
+            url = urljoin(base_url, line)
+            if bandwidth is not None:
+                playlist['variants'].append((bandwidth, url))
+                bandwidth = None
+            else:
+                playlist['segments'].append((url, duration))
+                duration = None
+
+    return playlist
+
+
+class HLSIngest:
+    """
+    Poll playlist HLS dan prefetch segment ke ring buffer lokal (file di buffer_dir).
+
+    Decoder membaca segment dari buffer, bukan langsung dari server, sehingga
+    gangguan singkat di server / jaringan tertutup oleh segment yang sudah
+    di-buffer. Error playlist / segment di-retry dengan exponential backoff
+    + jitter; buffer dibatasi max_segments (segment tertua dihapus).
+    """
+
+    def __init__(self, url, buffer_dir, max_segments=10, live_edge=2, timeout=5, backoff=None):
+        """
+        Args:
+            url: URL playlist (master atau media)
+            buffer_dir: Direktori induk ring buffer (subdirektori unik per ingest)
+            max_segments: Jumlah segment maksimum di buffer
+            live_edge: Jumlah segment terakhir playlist yang diambil saat start
+            timeout: Timeout HTTP (detik)
+            backoff: Backoff untuk retry (default Backoff(0.5, 30))
+        """
+        self.url = url
+        self.media_url = None
+        self.max_segments = max(2, max_segments)
+        self.live_edge = max(1, live_edge)
+        self.timeout = timeout
+        self.backoff = backoff or Backoff(0.5, 30)
+
+        os.makedirs(buffer_dir, exist_ok=True)
+        self.buffer_dir = tempfile.mkdtemp(prefix='hls_', dir=buffer_dir)
+
+        self.segments = deque()  # (seq, path, duration)
+        self.last_seq = None
+        self.ended = False
+        self.status = {'state': 'starting', 'fetched': 0, 'evicted': 0, 'errors': 0,
+                       'last_error': None, 'last_fetch_at': None}
+
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + 1)
+            self._thread = None
+        shutil.rmtree(self.buffer_dir, ignore_errors=True)
+
+    def next_segment(self, after_seq=None, timeout=30):
+        """
+        Segment berikutnya setelah after_seq (blocking sampai ada / timeout).
+        Jika consumer tertinggal dan segment sudah di-evict, lompat ke segment tertua di buffer.
+
+        Returns:
+            (seq, path, duration) atau None jika timeout / stop / stream selesai
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while not self._stop.is_set():
+                for segment in self.segments:
+                    if after_seq is None or segment[0] > after_seq:
+                        return segment
+                if self.ended:
+                    return None
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+        return None
+
+    def get_status(self):
+        with self._cond:
+            return {**self.status, 'buffered': len(self.segments), 'last_seq': self.last_seq,
+                    'reconnect_attempts': self.backoff.attempts}
+
+    def _fetch(self, url):
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return response.read()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                wait = self._poll()
+                self.backoff.reset()
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                wait = self.backoff.next_delay()
+                with self._cond:
+                    self.status.update(state='retrying', last_error=str(e))
+                    self.status['errors'] += 1
+                print(f"⚠️ HLS ingest error ({e}), retry in {wait:.1f}s")
+
+            if self.ended:
+                return
+            self._stop.wait(wait)
+
+    def _poll(self):
+        """
+        Satu siklus: ambil playlist, download segment baru
+
+        Returns:
+            float: Detik sampai poll berikutnya
+        """
+        playlist_url = self.media_url or self.url
+        playlist = parse_playlist(self._fetch(playlist_url).decode('utf-8', 'replace'), playlist_url)
+
+        if playlist['variants']:
+            # Master playlist: pakai variant bandwidth tertinggi
+            self.media_url = max(playlist['variants'])[1]
+            return 0
+
+        first_seq = playlist['media_sequence']
+        entries = [(first_seq + i, url, duration) for i, (url, duration) in enumerate(playlist['segments'])]
+
+        # Start pertama atau playlist di-reset server (sequence mundur): mulai dari live edge
+        if entries and (self.last_seq is None or entries[-1][0] < self.last_seq):
+            self.last_seq = None
+            entries = entries[-self.live_edge:]
+
+        for seq, url, duration in entries:
+            if self._stop.is_set():
+                break
+            if self.last_seq is not None and seq <= self.last_seq:
+                continue
+            self._store(seq, self._fetch(url), duration, url)
+
+        with self._cond:
+            self.status['state'] = 'ended' if playlist['endlist'] else 'live'
+            self.ended = playlist['endlist']
+            self._cond.notify_all()
+
+        # Sesuai spesifikasi HLS: reload playlist sekitar setengah target duration jika tidak ada yang baru
+        target = playlist['target_duration'] or 2.0
+        return max(target / 2, 0.2)
+
+    def _store(self, seq, data, duration, url):
+        extension = os.path.splitext(urlparse(url).path)[1] or '.ts'
+        path = os.path.join(self.buffer_dir, f"{seq:012d}{extension}")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        evicted = []
+        with self._cond:
+            self.segments.append((seq, path, duration))
+            self.last_seq = seq
+            while len(self.segments) > self.max_segments:
+                evicted.append(self.segments.popleft()[1])
+            self.status['fetched'] += 1
+            self.status['evicted'] += len(evicted)
+            self.status['last_fetch_at'] = time.time()
+            self._cond.notify_all()
+
+        # Segment yang sedang dibuka decoder tetap bisa dibaca setelah di-unlink (POSIX)
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
@@ -0,0 +1,154 @@
+import numpy as np
+
+
+class CountingStateMachine:
+    """
+    State machine inside/outside dengan buffer band dan debounce.
+
+    Transisi hanya terjadi jika centroid sudah melewati band (lebih dari
+    inner_margin ke dalam polygon, atau lebih dari outer_margin ke luar)
+    selama min_frames observasi berturut-turut. Jitter di sekitar edge
+    tidak lagi menghasilkan ENTER/EXIT berulang.
+    """
+
+    def __init__(self, inner_margin=15, outer_margin=15, min_frames=2):
+        """
+        Args:
+            inner_margin: Jarak (pixel) ke dalam polygon untuk dianggap inside
+            outer_margin: Jarak (pixel) ke luar polygon untuk dianggap outside
+            min_frames: Jumlah observasi berturut-turut sebelum transisi dikonfirmasi
+        """
+        self.inner_margin = inner_margin
+        self.outer_margin = outer_margin
+        self.min_frames = max(1, int(min_frames))
+
+    def initial_state(self, distance):
+        """
+        State awal track baru (tanpa band, track belum punya histori)
+        """
+        return {'inside': distance >= 0, 'candidate_frames': 0}
+
+    def step(self, state, distance):
+        """
+        Proses satu observasi
+
+        Args:
+            state: Dict state track (dari initial_state), diupdate in-place
+            distance: Signed distance centroid ke polygon (positif = di dalam)
+
+        Returns:
+            bool: True jika status inside berubah di observasi ini
+        """
+        if state['inside']:
+            crossed = distance < -self.outer_margin
+        else:
+            crossed = distance > self.inner_margin
+
+        # Di dalam band atau kembali ke sisi semula: kandidat transisi direset
+        if not crossed:
+            state['candidate_frames'] = 0
+            return False
+
+        state['candidate_frames'] += 1
+        if state['candidate_frames'] < self.min_frames:
+            return False
+
+        state['inside'] = not state['inside']
+        state['candidate_frames'] = 0
+        return True
+
+
+class CentroidKalmanFilter:
+    """
+    Kalman filter constant-velocity untuk centroid satu track.
+
+    State: [x, y, vx, vy] dengan satuan pixel per frame. Selisih frame_number
+    dipakai sebagai dt, sehingga FRAME_SKIP besar tetap konsisten.
+    """
+
+    _H = np.array([[1, 0, 0, 0],
+                   [0, 1, 0, 0]], dtype=np.float64)
+
+    def __init__(self, centroid, frame_number, process_noise=1.0, measurement_noise=10.0):
+        """
+        Args:
+            centroid: (x, y) observasi pertama
+            frame_number: Frame observasi pertama
+            process_noise: Variansi akselerasi (pixel^2 / frame^4)
+            measurement_noise: Variansi noise centroid dari detector (pixel^2)
+        """
+        self.x = np.array([centroid[0], centroid[1], 0.0, 0.0], dtype=np.float64)
+        self.P = np.diag([measurement_noise, measurement_noise, 100.0, 100.0])
+        self.R = np.eye(2) * measurement_noise
+        self.q = process_noise
+        self.frame_number = frame_number
+
+    def predict(self, frame_number):
+        """
+        Propagasi state sampai frame_number
+
+        Returns:
+            (x, y): Posisi prediksi
+        """
+        dt = frame_number - self.frame_number
+        if dt > 0:
+            F = np.eye(4)
+            F[0, 2] = F[1, 3] = dt
+
+            # Discrete white-noise acceleration
+            dt2, dt3, dt4 = dt ** 2, dt ** 3 / 2, dt ** 4 / 4
+            Q = self.q * np.array([[dt4, 0, dt3, 0],
+                                   [0, dt4, 0, dt3],
+                                   [dt3, 0, dt2, 0],
+                                   [0, dt3, 0, dt2]])
+
+            self.x = F @ self.x
+            self.P = F @ self.P @ F.T + Q
+            self.frame_number = frame_number
+
+        return self.x[0], self.x[1]
+
+    def update(self, centroid, frame_number):
+        """
+        Predict + koreksi dengan observasi baru
+
+        Returns:
+            (x, y): Posisi hasil smoothing
+        """
+        self.predict(frame_number)
+
+        z = np.asarray(centroid, dtype=np.float64)
+        S = self._H @ self.P @ self._H.T + self.R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ (z - self._H @ self.x)
+        self.P = (np.eye(4) - K @ self._H) @ self.P
+
+        return self.x[0], self.x[1]
+
+
+class TrackSmoother:
+    """
+    Kumpulan CentroidKalmanFilter per track ID
+    """
+
+    def __init__(self, process_noise=1.0, measurement_noise=10.0):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.filters = {}  # {track_id: CentroidKalmanFilter}
+
+    def smooth(self, track_id, centroid, frame_number):
+        """
+        Returns:
+            (x, y): Centroid hasil smoothing (int)
+        """
+        kf = self.filters.get(track_id)
+        if kf is None:
+            self.filters[track_id] = CentroidKalmanFilter(
+                centroid, frame_number, self.process_noise, self.measurement_noise)
+            return (int(centroid[0]), int(centroid[1]))
+
+        x, y = kf.update(centroid, frame_number)
+        return (int(round(x)), int(round(y)))
+
+    def drop(self, track_id):
+        self.filters.pop(track_id, None)
@@ -0,0 +1,153 @@
+import json
+import os
+import time
+
+import numpy as np
+
+
+PROFILE_KEYS = ('threads', 'interop_threads', 'imgsz', 'channels_last', 'compile')
+
+
+def default_profile(config):
+    """
+    Profile tanpa tuning: thread bawaan torch, imgsz dari Config
+    """
+    return {
+        'threads': None,
+        'interop_threads': None,
+        'imgsz': config.INFERENCE_IMGSZ,
+        'channels_last': False,
+        'compile': False
+    }
+
+
+def load_profile(config, path=None):
+    """
+    Load profile hasil tools/autotune.py, fallback ke default_profile jika belum ada
+
+    Returns:
+        dict: Profile (key PROFILE_KEYS + metadata hasil benchmark)
+    """
+    path = path or config.INFERENCE_PROFILE_PATH
+    profile = default_profile(config)
+    if not path or not os.path.exists(path):
+        return profile
+
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Failed to read inference profile {path}: {e}, using defaults")
+        return profile
+
+    if saved.get('model') and saved['model'] != config.YOLO_MODEL:
+        print(f"⚠️ Inference profile was tuned for {saved['model']}, not {config.YOLO_MODEL}")
+    profile.update(saved)
+    print(f"✅ Inference profile loaded: {describe_profile(profile)}")
+    return profile
+
+
+def save_profile(profile, path):
+    """
+    Simpan profile (atomic: tulis file sementara lalu rename)
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def describe_profile(profile):
+    return (f"imgsz={profile['imgsz']} threads={profile['threads'] or 'default'} "
+            f"interop={profile['interop_threads'] or 'default'} "
+            f"channels_last={profile['channels_last']} compile={profile['compile']}")
+
+
+def apply_profile(profile):
+    """
+    Set thread torch sesuai profile. Dipanggil sekali di awal proses, sebelum
+    inference pertama (inter-op threads tidak bisa diubah setelah dipakai).
+    """
+    import torch
+
+    if profile.get('threads'):
+        torch.set_num_threads(int(profile['threads']))
+    if profile.get('interop_threads'):
+        try:
+            torch.set_num_interop_threads(int(profile['interop_threads']))
+        except RuntimeError as e:
+            print(f"⚠️ Cannot set inter-op threads: {e}")
+
+
+def prepare_model(model, profile):
+    """
+    Terapkan memory format / torch.compile ke model YOLO ultralytics
+
+    Returns:
+        model: Model yang sama (dimodifikasi in-place)
+    """
+    import torch
+
+    if profile.get('channels_last'):
+        model.model.to(memory_format=torch.channels_last)
+    if profile.get('compile'):
+        model.model = torch.compile(model.model)
+    return model
+
+
+def benchmark(model, frames, profile, config, warmup=3, runs=20):
+    """
+    Ukur latency inference (predict, parameter sama dengan frame loop) pada sample frame
+
+    Returns:
+        dict: {'p50', 'p95', 'mean'} dalam milidetik
+    """
+    def infer(frame):
+        model.predict(frame,
+                      classes=config.DETECT_CLASSES,
+                      conf=config.CONFIDENCE_THRESHOLD,
+                      iou=config.IOU_THRESHOLD,
+                      imgsz=profile['imgsz'],
+                      max_det=config.INFERENCE_MAX_DET,
+                      verbose=False,
+                      agnostic_nms=True)
+
+    # Warmup juga menanggung waktu torch.compile
+    for i in range(warmup):
+        infer(frames[i % len(frames)])
+
+    latencies = []
+    for i in range(runs):
+        start = time.perf_counter()
+        infer(frames[i % len(frames)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies = np.array(latencies)
+    return {
+        'p50': round(float(np.percentile(latencies, 50)), 2),
+        'p95': round(float(np.percentile(latencies, 95)), 2),
+        'mean': round(float(latencies.mean()), 2)
+    }
+
+
+def select_profile(results, latency_target_ms):
+    """
+    Pilih profile: imgsz terbesar yang p95-nya memenuhi target, lalu yang tercepat.
+    Jika tidak ada yang memenuhi target, profile tercepat.
+
+    Args:
+        results: List dict profile + 'latency_ms' (hasil benchmark)
+
+    Returns:
+        (dict, bool): Profile terpilih, dan apakah memenuhi target
+    """
+    if not results:
+        return None, False
+
+    within = [r for r in results if r['latency_ms']['p95'] <= latency_target_ms]
+    if within:
+        return min(within, key=lambda r: (-r['imgsz'], r['latency_ms']['p95'])), True
+    return min(results, key=lambda r: r['latency_ms']['p95']), False
@@ -0,0 +1,201 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def load_yolo(model_path, device):
+    """Loader default: YOLO ultralytics di device yang diminta"""
+    from ultralytics import YOLO
+
+    model = YOLO(model_path)
+    model.to(device)
+    return model
+
+
+def detect_device():
+    """'cuda' jika tersedia, selain itu 'cpu' (torch di-import saat dipanggil)"""
+    import torch
+
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+
+class ModelManager:
+    """
+    Pengelola model YOLO aktif untuk frame loop.
+
+    Pergantian model dikerjakan background worker (load + warmup dengan
+    frame dummy), lalu di-swap oleh frame loop lewat acquire() di antara
+    dua frame, sehingga model.track tidak pernah berjalan di model yang
+    sedang diganti. Model yang baru dipakai disimpan di LRU cache supaya
+    kembali ke model sebelumnya tidak perlu load ulang.
+
+    Catatan: state tracker (BoT-SORT) menempel di model, jadi track ID
+    dimulai ulang setelah swap. acquire() mengembalikan generation yang naik
+    setiap swap; caller membuang state per track (counter, smoother,
+    visitor, propagasi) saat generation berubah.
+    """
+
+    def __init__(self, model_path, device, cache_size=2, warmup_frames=2, imgsz=640, loader=load_yolo):
+        """
+        Args:
+            model_path: Model awal (dimuat + warmup sinkron, jalankan constructor di thread
+                lain jika startup tidak boleh menunggu)
+            device: 'cuda' / 'cpu'
+            cache_size: Jumlah model maksimum di memory (termasuk model aktif)
+            warmup_frames: Jumlah inference dummy sebelum model siap di-swap
+            imgsz: Ukuran input untuk warmup
+            loader: fn(model_path, device) -> model
+        """
+        self.device = device
+        self.cache_size = max(1, cache_size)
+        self.warmup_frames = warmup_frames
+        self.imgsz = imgsz
+        self.loader = loader
+
+        self.cache = OrderedDict()  # {model_path: model}, paling baru dipakai di akhir
+        self.current_path = None
+        self.model = None
+        self.swapped_at = None
+        self.generation = 0  # Naik setiap swap
+
+        self._pending = None  # (request_id, model_path, model) siap di-swap
+        self._request_id = 0
+        self._lock = threading.RLock()
+        self._jobs = queue.Queue()
+        self.status = {'state': 'loading', 'request_id': 0, 'model_path': model_path, 'progress': 0.1,
+                       'error': None, 'requested_at': time.time(), 'ready_at': None}
+
+        # Model awal dimuat sinkron supaya pipeline langsung bisa jalan, warmup
+        # di sini juga supaya frame pertama tidak membayar inisialisasi CUDA / kernel
+        self.current_path = model_path
+        self.model = self._load(model_path)
+        self._set_status(0, state='warming_up', progress=0.5)
+        self._warmup(self.model, 0)
+        self.swapped_at = time.time()
+        self._set_status(0, state='active', progress=1.0, ready_at=self.swapped_at)
+
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def request(self, model_path):
+        """
+        Minta ganti model (non-blocking)
+
+        Returns:
+            dict: Status load saat ini
+        """
+        with self._lock:
+            if model_path == self.current_path and self._pending is None:
+                return self.get_status()
+            self._request_id += 1
+            self.status = {'state': 'queued', 'request_id': self._request_id, 'model_path': model_path,
+                           'progress': 0.0, 'error': None, 'requested_at': time.time(), 'ready_at': None}
+            self._jobs.put((self._request_id, model_path))
+        return self.get_status()
+
+    def acquire(self):
+        """
+        Dipanggil frame loop di awal setiap frame: swap model jika ada yang siap
+
+        Returns:
+            (model, generation): Model yang dipakai untuk frame ini, generation berubah setelah swap
+        """
+        if self._pending is not None:
+            with self._lock:
+                if self._pending is not None:
+                    request_id, self.current_path, self.model = self._pending
+                    self._pending = None
+                    self.swapped_at = time.time()
+                    self.generation += 1
+                    # Status bisa sudah milik request yang lebih baru (queued / loading)
+                    self._set_status(request_id, state='active')
+                    print(f"✅ Model swapped: {self.current_path}")
+        return self.model, self.generation
+
+    def get_status(self):
+        with self._lock:
+            return {
+                **self.status,
+                'current_model': self.current_path,
+                'device': self.device,
+                'cached_models': list(self.cache),
+                'swapped_at': self.swapped_at,
+                'generation': self.generation
+            }
+
+    def close(self):
+        self._jobs.put(None)
+        self._thread.join(timeout=5)
+
+    def _cached(self, model_path):
+        with self._lock:
+            model = self.cache.get(model_path)
+            if model is not None:
+                self.cache.move_to_end(model_path)
+            return model
+
+    def _load(self, model_path):
+        model = self.loader(model_path, self.device)
+        with self._lock:
+            self.cache[model_path] = model
+            self._evict()
+        return model
+
+    def _evict(self):
+        protected = {self.current_path}
+        if self._pending is not None:
+            protected.add(self._pending[1])
+
+        for path in list(self.cache):
+            if len(self.cache) <= self.cache_size:
+                break
+            if path not in protected:
+                del self.cache[path]
+
+    def _warmup(self, model, request_id):
+        dummy = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        for i in range(self.warmup_frames):
+            # predict (bukan track) supaya state tracker model tidak tersentuh
+            model.predict(dummy, imgsz=self.imgsz, verbose=False)
+            self._set_status(request_id, progress=0.5 + 0.5 * (i + 1) / self.warmup_frames)
+
+    def _set_status(self, request_id, **fields):
+        """
+        Update status hanya jika status masih milik request_id (request baru tidak ditimpa)
+        """
+        with self._lock:
+            if self.status.get('request_id') == request_id:
+                self.status.update(fields)
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+
+            # Request baru menggantikan request lama yang belum diproses
+            while not self._jobs.empty():
+                job = self._jobs.get()
+                if job is None:
+                    return
+            request_id, model_path = job
+
+            try:
+                # Model dari cache sudah pernah di-warmup (dan bisa jadi sedang dipakai frame loop)
+                model = self._cached(model_path)
+                if model is None:
+                    self._set_status(request_id, state='loading', progress=0.1)
+                    model = self._load(model_path)
+                    self._set_status(request_id, state='warming_up', progress=0.5)
+                    self._warmup(model, request_id)
+
+                with self._lock:
+                    self._pending = (request_id, model_path, model)
+                    self._set_status(request_id, state='ready', progress=1.0, ready_at=time.time())
+                print(f"✅ Model ready, waiting for swap: {model_path}")
+            except Exception as e:
+                print(f"❌ Failed to load model {model_path}: {e}")
+                self._set_status(request_id, state='failed', error=str(e))
@@ -2,6 +2,16 @@ import cv2
 import numpy as np
 
 
+def scale_points(points, scale):
+    """
+    Scale koordinat polygon (x, y) dengan faktor (sx, sy), mis. dari resolusi source ke output capture
+    """
+    sx, sy = scale
+    if (sx, sy) == (1.0, 1.0):
+        return points
+    return [[int(round(x * sx)), int(round(y * sy))] for x, y in points]
+
+
 class PolygonChecker:
     """
     Class untuk mengecek apakah point berada di dalam polygon
@@ -27,6 +37,43 @@ class PolygonChecker:
         result = cv2.pointPolygonTest(self.polygon, point, False)
         return result >= 0
 
+    def contains_points(self, points):
+        """
+        Versi vectorized is_inside untuk banyak point sekaligus (even-odd rule)
+
+        Args:
+            points: Array (N, 2) / list (x, y)
+
+        Returns:
+            np.ndarray: (N,) bool, point tepat di edge dianggap di dalam
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        poly = self.polygon.reshape(-1, 2).astype(np.float64)
+        ax, ay = poly[:, 0], poly[:, 1]
+        bx, by = np.roll(ax, -1), np.roll(ay, -1)
+        x, y = pts[:, 0:1], pts[:, 1:2]  # (N, 1) supaya broadcast dengan M edge
+
+        straddle = (ay > y) != (by > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = ax + (y - ay) * (bx - ax) / (by - ay)
+        inside = np.count_nonzero(straddle & (x < x_cross), axis=1) % 2 == 1
+
+        ex, ey = bx - ax, by - ay
+        cross = (x - ax) * ey - (y - ay) * ex
+        dot = (x - ax) * ex + (y - ay) * ey
+        on_edge = (cross == 0) & (dot >= 0) & (dot <= ex * ex + ey * ey)
+
+        return inside | on_edge.any(axis=1)
+
+    def signed_distance(self, point):
+        """
+        Jarak point ke edge polygon
+
+        Returns:
+            float: Positif di dalam, negatif di luar, 0 tepat di edge
+        """
+        return cv2.pointPolygonTest(self.polygon, (float(point[0]), float(point[1])), True)
+
     def draw_polygon(self, frame, color=(0, 255, 0), thickness=2):
         """
         Gambar polygon di frame
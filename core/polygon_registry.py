@@ -0,0 +1,179 @@
+import threading
+
+from core.polygon import PolygonChecker, scale_points
+
+
+class PolygonRegistry:
+    """
+    Cache in-memory semua polygon_areas dalam bentuk PolygonChecker siap pakai.
+
+    Setiap area punya versi (updated_at di database). refresh() hanya
+    mengambil daftar (id, updated_at, is_active) lalu me-load ulang area
+    yang berubah, sehingga polling murah. Endpoint yang menulis polygon
+    memanggil notify() supaya perubahan langsung terlihat tanpa menunggu poll.
+    """
+
+    def __init__(self, db, poll_interval=5, frame_scale=(1.0, 1.0)):
+        """
+        Args:
+            db: StorageBackend
+            poll_interval: Interval (detik) polling perubahan di database, 0 = tanpa polling
+            frame_scale: (sx, sy) dari koordinat polygon di database ke frame pipeline
+        """
+        self.db = db
+        self.poll_interval = poll_interval
+        self.frame_scale = tuple(frame_scale)
+
+        self.entries = {}  # {polygon_id: {'row', 'checker', 'version'}}
+        self.generation = 0  # Naik setiap ada perubahan apapun
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._load_all()
+
+    def get(self, polygon_id):
+        """
+        Returns:
+            dict: {'row', 'checker', 'version'} atau None
+        """
+        with self._lock:
+            return self.entries.get(polygon_id)
+
+    def list(self, active_only=False):
+        """
+        Row polygon (format sama dengan StorageBackend.list_polygons), terbaru dulu
+        """
+        with self._lock:
+            rows = [e['row'] for e in self.entries.values() if not active_only or e['row']['is_active']]
+        return sorted(rows, key=lambda r: (str(r['created_at']), r['id']), reverse=True)
+
+    def active(self):
+        """
+        Polygon aktif yang paling baru dibuat (sama dengan get_active_polygon), atau None
+        """
+        rows = self.list(active_only=True)
+        return self.get(rows[0]['id']) if rows else None
+
+    def add_listener(self, callback):
+        """
+        callback(polygon_id, entry) dipanggil setiap area berubah; entry None jika dihapus
+        """
+        self._listeners.append(callback)
+
+    def notify(self, polygon_id=None):
+        """
+        Dipanggil setelah polygon ditulis: reload area tersebut (atau refresh penuh)
+        """
+        if polygon_id is None:
+            return self.refresh()
+
+        row = self.db.get_polygon(polygon_id)
+        with self._lock:
+            if row is None:
+                changed = self.entries.pop(polygon_id, None) is not None
+            else:
+                self.entries[polygon_id] = self._compile(row)
+                changed = True
+            if changed:
+                self.generation += 1
+
+        if changed:
+            self._emit(polygon_id)
+        return [polygon_id] if changed else []
+
+    def refresh(self):
+        """
+        Sinkronkan dengan database secara incremental
+
+        Returns:
+            list: ID polygon yang berubah / ditambah / dihapus
+        """
+        versions = self.db.get_polygon_versions()
+
+        with self._lock:
+            known = {pid: (e['version'], int(e['row']['is_active'])) for pid, e in self.entries.items()}
+        changed = [pid for pid, v in versions.items() if known.get(pid) != v]
+        removed = [pid for pid in known if pid not in versions]
+
+        rows = {}
+        for polygon_id in changed:
+            row = self.db.get_polygon(polygon_id)
+            if row is None:
+                removed.append(polygon_id)
+            else:
+                rows[polygon_id] = row
+
+        if not rows and not removed:
+            return []
+
+        with self._lock:
+            for polygon_id, row in rows.items():
+                self.entries[polygon_id] = self._compile(row)
+            for polygon_id in removed:
+                self.entries.pop(polygon_id, None)
+            self.generation += 1
+
+        updated = list(rows) + removed
+        for polygon_id in updated:
+            self._emit(polygon_id)
+        return updated
+
+    def set_frame_scale(self, scale):
+        """
+        Ganti skala frame (mis. capture dengan output resolusi lebih kecil): semua
+        checker di-compile ulang dan listener dipanggil untuk setiap area
+        """
+        scale = tuple(scale)
+        with self._lock:
+            if scale == self.frame_scale:
+                return
+            self.frame_scale = scale
+            self.entries = {pid: self._compile(e['row']) for pid, e in self.entries.items()}
+            self.generation += 1
+            updated = list(self.entries)
+
+        for polygon_id in updated:
+            self._emit(polygon_id)
+
+    def start_polling(self):
+        if self.poll_interval and self._thread is None:
+            self._thread = threading.Thread(target=self._poll_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _load_all(self):
+        # Load awal dengan satu query
+        rows = self.db.list_polygons()
+        with self._lock:
+            self.entries = {row['id']: self._compile(row) for row in rows}
+            self.generation += 1
+
+    def _compile(self, row):
+        points = scale_points(self.db.polygon_points(row), self.frame_scale)
+        return {
+            'row': row,
+            'checker': PolygonChecker(points) if len(points) >= 3 else None,
+            'version': row['updated_at']
+        }
+
+    def _emit(self, polygon_id):
+        entry = self.get(polygon_id)
+        for callback in self._listeners:
+            try:
+                callback(polygon_id, entry)
+            except Exception as e:
+                print(f"⚠️ Polygon registry listener error: {e}")
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Polygon registry refresh failed: {e}")
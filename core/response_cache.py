@@ -0,0 +1,134 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+
+class ResponseCache:
+    """
+    Cache response API in-process dengan TTL per endpoint dan LRU eviction.
+
+    Key berupa tuple dengan elemen pertama sebagai namespace endpoint,
+    misal ('polygon', 3), sehingga invalidasi bisa per endpoint.
+    """
+
+    def __init__(self, max_entries=256, ttls=None, default_ttl=10):
+        """
+        Args:
+            max_entries: Jumlah maksimum entry sebelum entry paling lama dipakai dibuang
+            ttls: Dict {namespace: ttl_detik}
+            default_ttl: TTL untuk namespace yang tidak ada di `ttls`
+        """
+        self.max_entries = max_entries
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+
+        self._entries = OrderedDict()  # {key: {'body', 'etag', 'last_modified', 'expires_at'}}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Ambil entry yang masih valid, atau None jika tidak ada / expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['expires_at'] <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, payload):
+        """
+        Serialize payload ke JSON (bytes disimpan apa adanya) dan simpan sebagai entry baru
+
+        Returns:
+            entry: Dict berisi body, etag dan last_modified
+        """
+        if isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload, default=str, separators=(',', ':')).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        ttl = self.ttls.get(key[0], self.default_ttl)
+
+        with self._lock:
+            previous = self._entries.get(key)
+
+            # Jika isi tidak berubah, Last-Modified tetap memakai waktu lama
+            if previous is not None and previous['etag'] == etag:
+                last_modified = previous['last_modified']
+            else:
+                last_modified = int(time.time())
+
+            entry = {
+                'body': body,
+                'etag': etag,
+                'last_modified': last_modified,
+                'expires_at': time.monotonic() + ttl
+            }
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return entry
+
+    def get_or_load(self, key, loader):
+        """
+        Ambil entry dari cache, atau panggil loader() jika belum ada / expired
+        """
+        entry = self.get(key)
+        if entry is None:
+            entry = self.set(key, loader())
+        return entry
+
+    def invalidate(self, *namespaces):
+        """
+        Hapus entry untuk namespace tertentu, atau semua entry jika kosong
+        """
+        with self._lock:
+            if not namespaces:
+                self._entries.clear()
+                return
+
+            for key in [k for k in self._entries if k[0] in namespaces]:
+                del self._entries[key]
+
+    @staticmethod
+    def headers(entry):
+        """
+        Header validasi HTTP untuk sebuah entry
+        """
+        return {
+            'ETag': entry['etag'],
+            'Last-Modified': formatdate(entry['last_modified'], usegmt=True),
+            'Cache-Control': 'no-cache'
+        }
+
+    @staticmethod
+    def is_not_modified(entry, if_none_match=None, if_modified_since=None):
+        """
+        Cek apakah client sudah punya versi terbaru (response 304)
+
+        Args:
+            if_none_match: Nilai header If-None-Match
+            if_modified_since: Nilai header If-Modified-Since
+
+        Returns:
+            bool: True jika boleh membalas 304 Not Modified
+        """
+        if if_none_match:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            return '*' in tags or entry['etag'] in tags or ('W/' + entry['etag']) in tags
+
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return entry['last_modified'] <= since
+
+        return False
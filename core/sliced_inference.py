@@ -0,0 +1,199 @@
+import cv2
+import numpy as np
+
+
+def slice_region(region, rows, cols, overlap):
+    """
+    Potong region (x0, y0, x1, y1) menjadi rows x cols tile yang saling overlap
+
+    Returns:
+        list: Tile (x0, y0, x1, y1), ukuran semua tile sama
+    """
+    x0, y0, x1, y1 = region
+    width, height = x1 - x0, y1 - y0
+
+    # Ukuran tile supaya cols tile dengan overlap pas menutup region
+    tile_w = int(np.ceil(width / (cols - (cols - 1) * overlap)))
+    tile_h = int(np.ceil(height / (rows - (rows - 1) * overlap)))
+    tile_w, tile_h = min(tile_w, width), min(tile_h, height)
+
+    xs = np.linspace(x0, x1 - tile_w, cols).astype(int) if cols > 1 else [x0]
+    ys = np.linspace(y0, y1 - tile_h, rows).astype(int) if rows > 1 else [y0]
+    return [(int(x), int(y), int(x) + tile_w, int(y) + tile_h) for y in ys for x in xs]
+
+
+def merge_detections(boxes, scores, iou_threshold=0.5, ios_threshold=0.8):
+    """
+    NMS lintas tile (class-agnostic). Box juga di-suppress jika sebagian besar
+    area-nya berada di dalam box lain yang lebih yakin (intersection over smaller),
+    untuk orang yang terpotong di batas tile.
+
+    Returns:
+        np.ndarray: Index box yang dipertahankan
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=int)
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    order = np.argsort(-scores)
+
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+
+        iw = np.maximum(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0)
+        ih = np.maximum(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0)
+        inter = iw * ih
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        ios = inter / np.maximum(np.minimum(areas[i], areas[rest]), 1e-9)
+
+        order = rest[(iou <= iou_threshold) & (ios <= ios_threshold)]
+
+    return np.array(keep, dtype=int)
+
+
+def load_tracker(tracker_type, frame_rate=30):
+    """
+    Tracker ultralytics (botsort / bytetrack) yang berdiri sendiri, di-update
+    dengan deteksi hasil merge (bukan lewat model.track)
+    """
+    import yaml
+    from ultralytics.trackers.track import TRACKER_MAP
+    from ultralytics.utils import IterableSimpleNamespace
+    from ultralytics.utils.checks import check_yaml
+
+    with open(check_yaml(f"{tracker_type}.yaml")) as f:
+        cfg = IterableSimpleNamespace(**yaml.safe_load(f))
+    return TRACKER_MAP[cfg.tracker_type](args=cfg, frame_rate=frame_rate)
+
+
+class SlicedTracker:
+    """
+    Sliced inference: frame (atau bounding box polygon ROI) dipotong menjadi tile
+    overlap, semua tile (+ opsional satu pass region penuh) masuk detector sebagai
+    satu batch, hasilnya di-merge dengan NMS lintas tile lalu di-track BoT-SORT.
+
+    Jumlah inference per frame = rows * cols (+1 jika full_frame).
+    Tracker terpisah dari model, jadi track ID tetap saat model di-swap.
+    """
+
+    def __init__(self, rows=2, cols=3, overlap=0.2, full_frame=True, roi_margin=64,
+                 iou_threshold=0.5, ios_threshold=0.8, tracker_type='botsort'):
+        """
+        Args:
+            rows, cols: Grid tile
+            overlap: Fraksi overlap antar tile (0..1)
+            full_frame: Tambah satu pass region penuh (orang besar yang terpotong tile)
+            roi_margin: Margin (pixel) di sekitar bounding box ROI
+            iou_threshold, ios_threshold: Threshold merge_detections
+            tracker_type: 'botsort' / 'bytetrack'
+        """
+        self.rows = max(1, rows)
+        self.cols = max(1, cols)
+        self.overlap = min(max(overlap, 0.0), 0.9)
+        self.full_frame = full_frame
+        self.roi_margin = roi_margin
+        self.iou_threshold = iou_threshold
+        self.ios_threshold = ios_threshold
+
+        self.tracker = load_tracker(tracker_type)
+        self.tile_shape = None  # (h, w) tile terakhir, untuk skala ukuran box di input model
+
+    def region(self, frame_shape, roi=None):
+        """
+        Region yang di-slice: seluruh frame, atau bounding box roi (polygon points) + margin
+        """
+        height, width = frame_shape[:2]
+        if roi is None:
+            return 0, 0, width, height
+
+        x, y, w, h = cv2.boundingRect(np.asarray(roi, dtype=np.int32))
+        m = self.roi_margin
+        return max(x - m, 0), max(y - m, 0), min(x + w + m, width), min(y + h + m, height)
+
+    def detect(self, model, frame, roi=None, **predict_args):
+        """
+        Deteksi semua tile dalam satu batch lalu merge
+
+        Returns:
+            (boxes, scores, classes): xyxy dalam koordinat frame
+        """
+        region = self.region(frame.shape, roi)
+        tiles = slice_region(region, self.rows, self.cols, self.overlap)
+        if self.full_frame and len(tiles) > 1:
+            tiles.append(region)
+        tx0, ty0, tx1, ty1 = tiles[0]
+        self.tile_shape = (ty1 - ty0, tx1 - tx0)
+
+        crops = [frame[y0:y1, x0:x1] for x0, y0, x1, y1 in tiles]
+        results = model.predict(crops, verbose=False, **predict_args)
+
+        boxes, scores, classes = [], [], []
+        for (x0, y0, _, _), result in zip(tiles, results):
+            if result.boxes is None or len(result.boxes) == 0:
+                continue
+            boxes.append(result.boxes.xyxy.cpu().numpy() + np.array([x0, y0, x0, y0], dtype=np.float32))
+            scores.append(result.boxes.conf.cpu().numpy())
+            classes.append(result.boxes.cls.cpu().numpy())
+
+        if not boxes:
+            return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+
+        boxes, scores, classes = np.concatenate(boxes), np.concatenate(scores), np.concatenate(classes)
+        keep = merge_detections(boxes, scores, self.iou_threshold, self.ios_threshold)
+        return boxes[keep], scores[keep], classes[keep]
+
+    def track(self, model, frame, roi=None, **predict_args):
+        """
+        Returns:
+            (detections, tracks): detections (N, 4) hasil merge, tracks (boxes, track_ids, confidences)
+        """
+        from ultralytics.engine.results import Boxes
+
+        boxes, scores, classes = self.detect(model, frame, roi, **predict_args)
+        data = np.hstack([boxes, scores[:, None], classes[:, None]]).astype(np.float32)
+        tracked = self.tracker.update(Boxes(data, frame.shape[:2]), frame)
+
+        if len(tracked) == 0:
+            return boxes, None
+        tracked = np.asarray(tracked)
+        return boxes, (tracked[:, :4], tracked[:, 4].astype(int), tracked[:, 5])
+
+
+def track_frame(model, frame, config, imgsz, max_det, sliced=None, roi=None):
+    """
+    Deteksi + tracking satu frame, lewat model.track atau SlicedTracker
+
+    Returns:
+        (detections, tracks): detections (N, 4) xyxy sebelum tracking (untuk AdaptiveResolution),
+        tracks (boxes, track_ids, confidences) atau None jika tidak ada track
+    """
+    predict_args = dict(classes=config.DETECT_CLASSES, conf=config.CONFIDENCE_THRESHOLD,
+                        iou=config.IOU_THRESHOLD, imgsz=imgsz, max_det=max_det, agnostic_nms=True)
+    if sliced is not None:
+        return sliced.track(model, frame, roi, **predict_args)
+
+    results = model.track(frame, persist=True, tracker=config.TRACKER_TYPE + '.yaml', verbose=False,
+                          **predict_args)
+    result_boxes = results[0].boxes
+    if result_boxes is None:
+        return np.empty((0, 4)), None
+
+    detections = result_boxes.xyxy.cpu().numpy()
+    if result_boxes.id is None:
+        return detections, None
+    return detections, (detections, result_boxes.id.cpu().numpy().astype(int), result_boxes.conf.cpu().numpy())
+
+
+def create_sliced_tracker(config):
+    """
+    SlicedTracker sesuai Config, atau None jika SLICED_INFERENCE mati
+    """
+    if not config.SLICED_INFERENCE:
+        return None
+    return SlicedTracker(config.SLICE_ROWS, config.SLICE_COLS, config.SLICE_OVERLAP,
+                         config.SLICE_FULL_FRAME, config.SLICE_ROI_MARGIN,
+                         config.SLICE_MERGE_IOU, config.SLICE_MERGE_IOS, config.TRACKER_TYPE)
@@ -0,0 +1,142 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+
+class SnapshotStore:
+    """
+    Crop JPEG orang saat event ENTER/EXIT, satu file per event ({event_uid}.jpg).
+
+    Frame loop hanya menyalin region bbox (crop()); encode JPEG dan tulis
+    file dilakukan thread pool. Jumlah crop yang menunggu dibatasi
+    max_pending (lebih dari itu snapshot dibuang), dan total ukuran folder
+    dibatasi quota_bytes dengan menghapus file paling lama.
+    """
+
+    def __init__(self, directory, quota_bytes, workers=2, max_pending=32, jpeg_quality=85, padding=0.1):
+        """
+        Args:
+            directory: Folder file snapshot
+            quota_bytes: Ukuran maksimum total file snapshot
+            workers: Thread encode / tulis
+            max_pending: Crop maksimum yang menunggu di thread pool
+            jpeg_quality: Kualitas JPEG
+            padding: Margin di sekitar bbox (fraksi lebar / tinggi bbox)
+        """
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.padding = padding
+
+        self.status = {'saved': 0, 'dropped': 0, 'failed': 0, 'evicted': 0}
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='snapshot')
+        self._lock = threading.Lock()
+
+        # {nama file: ukuran}, urut dari yang paling lama (untuk eviction)
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith('.jpg'):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        self._files = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self._total_bytes = sum(self._files.values())
+
+    def crop(self, frame, box):
+        """
+        Salin region bbox (+ padding) dari frame
+
+        Returns:
+            np.ndarray: Crop (copy, aman walaupun frame dianotasi setelahnya), atau None jika kosong
+        """
+        x1, y1, x2, y2 = box
+        pad_x, pad_y = (x2 - x1) * self.padding, (y2 - y1) * self.padding
+        height, width = frame.shape[:2]
+        x1, y1 = max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y))
+        x2, y2 = min(width, int(x2 + pad_x)), min(height, int(y2 + pad_y))
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return frame[y1:y2, x1:x2].copy()
+
+    def save(self, event_uid, crop):
+        """
+        Antrikan crop untuk ditulis sebagai {event_uid}.jpg
+
+        Returns:
+            bool: False jika antrian penuh (snapshot dibuang)
+        """
+        if not self._slots.acquire(blocking=False):
+            self.status['dropped'] += 1
+            return False
+        try:
+            self._executor.submit(self._write, event_uid, crop)
+        except RuntimeError:
+            # Executor sudah di-shutdown
+            self._slots.release()
+            return False
+        return True
+
+    def path(self, event_uid):
+        """
+        Path file snapshot event, atau None jika tidak ada / sudah di-evict
+        """
+        path = os.path.join(self.directory, f"{event_uid}.jpg")
+        return path if os.path.isfile(path) else None
+
+    def get_status(self):
+        with self._lock:
+            return {**self.status, 'files': len(self._files), 'total_bytes': self._total_bytes,
+                    'quota_bytes': self.quota_bytes}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def _write(self, event_uid, crop):
+        try:
+            ret, buffer = cv2.imencode('.jpg', crop, self.encode_params)
+            if not ret:
+                raise ValueError("JPEG encode failed")
+
+            name = f"{event_uid}.jpg"
+            path = os.path.join(self.directory, name)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.tobytes())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.status['failed'] += 1
+            print(f"❌ Error writing snapshot {event_uid}: {e}")
+            return
+        finally:
+            self._slots.release()
+
+        evicted = []
+        with self._lock:
+            self._total_bytes += len(buffer) - self._files.pop(name, 0)
+            self._files[name] = len(buffer)
+            self.status['saved'] += 1
+            while self._total_bytes > self.quota_bytes and len(self._files) > 1:
+                old_name, old_size = self._files.popitem(last=False)
+                self._total_bytes -= old_size
+                evicted.append(old_name)
+            self.status['evicted'] += len(evicted)
+
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old_name))
+            except OSError:
+                pass
+
+
+def create_snapshot_store(config):
+    """
+    SnapshotStore sesuai Config.SNAPSHOT_*, atau None jika SNAPSHOT_ENABLED = False
+    """
+    if not config.SNAPSHOT_ENABLED:
+        return None
+    return SnapshotStore(config.SNAPSHOT_DIR, config.SNAPSHOT_QUOTA_MB * 1024 * 1024, config.SNAPSHOT_WORKERS,
+                         config.SNAPSHOT_QUEUE_SIZE, config.SNAPSHOT_JPEG_QUALITY, config.SNAPSHOT_PADDING)
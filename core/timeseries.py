@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+
+class OccupancyTimeSeries:
+    """
+    Ring buffer ukuran tetap untuk histori occupancy, satu titik per detik
+    """
+
+    def __init__(self, capacity_seconds=7200, gap_tolerance=5):
+        """
+        Args:
+            capacity_seconds: Jumlah titik (detik) yang disimpan di memory
+            gap_tolerance: Selisih (detik) antar titik / dari titik terakhir yang masih dianggap kontinu
+        """
+        self.capacity = capacity_seconds
+        self.gap_tolerance = gap_tolerance
+
+        self.timestamps = np.zeros(capacity_seconds, dtype=np.int64)
+        self.inside = np.zeros(capacity_seconds, dtype=np.int32)
+        self.entered = np.zeros(capacity_seconds, dtype=np.int32)
+        self.exited = np.zeros(capacity_seconds, dtype=np.int32)
+
+        self.count = 0  # Total titik yang pernah ditulis
+        self.started_at = None  # Detik pertama yang direkam
+        self.last_recorded = None  # Detik terakhir yang direkam
+        self.gaps = deque()  # (detik terakhir sebelum gap, detik pertama setelah gap), mis. stream putus
+        self._lock = threading.Lock()
+
+    def record(self, stats, now=None):
+        """
+        Rekam statistik counter saat ini (dari PeopleCounter.get_stats)
+
+        Beberapa frame dalam detik yang sama ditimpa ke titik yang sama,
+        sehingga buffer berisi nilai terakhir setiap detik.
+        """
+        second = int(now if now is not None else time.time())
+
+        with self._lock:
+            if self.count and self.timestamps[(self.count - 1) % self.capacity] == second:
+                idx = (self.count - 1) % self.capacity
+            else:
+                idx = self.count % self.capacity
+                self.count += 1
+
+            if self.started_at is None:
+                self.started_at = second
+            elif second - self.last_recorded > self.gap_tolerance:
+                self.gaps.append((self.last_recorded, second))
+            self.last_recorded = second
+
+            self.timestamps[idx] = second
+            self.inside[idx] = stats['current_inside']
+            self.entered[idx] = stats['total_entered']
+            self.exited[idx] = stats['total_exited']
+
+    def covers(self, since, now=None):
+        """
+        Cek apakah window `since` (epoch detik) sampai sekarang tersedia lengkap di memory:
+        sudah di dalam buffer, titik terakhir masih baru, dan tidak ada gap di dalam window
+        """
+        now = now if now is not None else time.time()
+
+        with self._lock:
+            if not self.count:
+                return False
+            oldest = self.started_at if self.count <= self.capacity else self.timestamps[self.count % self.capacity]
+            if since < oldest:
+                return False
+            if now - self.last_recorded > self.gap_tolerance:
+                return False
+
+            # Gap yang sudah keluar dari buffer tidak relevan lagi
+            while self.gaps and self.gaps[0][1] <= oldest:
+                self.gaps.popleft()
+            return all(gap_end <= since for _, gap_end in self.gaps)
+
+    def query(self, since):
+        """
+        Ambil titik dengan timestamp >= since, urut dari yang paling lama
+
+        Returns:
+            dict: Format sama dengan /api/stats/history
+        """
+        with self._lock:
+            n = min(self.count, self.capacity)
+            order = (np.arange(n) + self.count - n) % self.capacity
+            ts = self.timestamps[order]
+            mask = ts >= since
+            order = order[mask]
+
+            times = [datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S") for t in ts[mask]]
+            return {
+                "times": times,
+                "counts": self.inside[order].tolist(),
+                "entered": self.entered[order].tolist(),
+                "exited": self.exited[order].tolist()
+            }
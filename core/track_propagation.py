@@ -0,0 +1,155 @@
+import numpy as np
+
+from core.hysteresis import CentroidKalmanFilter
+
+
+class DetectionScheduler:
+    """
+    Jalankan detector + tracker hanya setiap K frame; di frame antaranya posisi
+    track dipropagasi dengan prediksi Kalman (constant velocity), sehingga
+    PeopleCounter tetap mendapat centroid setiap frame.
+
+    K adaptif (AIMD): dibagi dua jika track tidak pasti (error prediksi besar
+    relatif tinggi box, banyak track baru / hilang, atau covariance prediksi
+    melebar), dan naik satu setelah beberapa deteksi berturut-turut stabil.
+    """
+
+    def __init__(self, min_interval=1, max_interval=4, uncertainty=0.5, churn=0.3, calm_cycles=2,
+                 process_noise=1.0, measurement_noise=10.0):
+        """
+        Args:
+            min_interval, max_interval: Batas K (frame per deteksi), max 1 = deteksi setiap frame
+            uncertainty: Error prediksi / tinggi box di atas ini = track tidak pasti
+            churn: Fraksi track baru + hilang per deteksi di atas ini = scene tidak pasti
+            calm_cycles: Deteksi stabil berturut-turut sebelum K dinaikkan
+            process_noise, measurement_noise: Parameter CentroidKalmanFilter
+        """
+        self.min_interval = max(1, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.uncertainty = uncertainty
+        self.churn = churn
+        self.calm_cycles = calm_cycles
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+
+        self.interval = self.min_interval
+        self.tracks = {}  # {track_id: {'kf', 'size': (w, h), 'conf'}}
+        self.detections = 0
+        self.propagated = 0
+        self.last_error = None
+
+        self._since_detect = None
+        self._calm = 0
+        self._force = False
+
+    def should_detect(self):
+        """
+        Dipanggil setiap frame yang diproses: True jika frame ini harus lewat detector
+        """
+        return (self.interval <= 1 or self._force or self._since_detect is None
+                or self._since_detect + 1 >= self.interval)
+
+    def observe(self, frame_number, tracks):
+        """
+        Hasil detector + tracker di frame ini: update filter dan sesuaikan K
+
+        Args:
+            tracks: (boxes, track_ids, confidences) atau None
+        """
+        self.detections += 1
+        self._since_detect = 0
+        self._force = False
+
+        # Deteksi setiap frame: propagate() tidak pernah dipanggil, filter per track tidak diperlukan
+        if self.max_interval <= 1:
+            return
+
+        boxes, track_ids, confidences = tracks if tracks is not None else (np.empty((0, 4)), [], [])
+        seen = {}
+        errors = []
+        new = 0
+        for box, track_id, conf in zip(boxes, track_ids, confidences):
+            track_id = int(track_id)
+            x1, y1, x2, y2 = box
+            centroid = ((x1 + x2) / 2, (y1 + y2) / 2)
+            size = (x2 - x1, y2 - y1)
+
+            track = self.tracks.get(track_id)
+            if track is None:
+                new += 1
+                track = {'kf': CentroidKalmanFilter(centroid, frame_number,
+                                                    self.process_noise, self.measurement_noise)}
+            else:
+                px, py = track['kf'].predict(frame_number)
+                errors.append(np.hypot(centroid[0] - px, centroid[1] - py) / max(size[1], 1.0))
+                track['kf'].update(centroid, frame_number)
+            track['size'] = size
+            track['conf'] = float(conf)
+            seen[track_id] = track
+
+        lost = len(set(self.tracks) - set(seen))
+        churn = (new + lost) / max(len(seen), len(self.tracks), 1)
+        self.last_error = round(float(max(errors)), 3) if errors else None
+        self.tracks = seen
+
+        # Track yang baru muncul belum punya velocity, jadi hanya churn yang dihitung untuk mereka
+        if (errors and max(errors) > self.uncertainty) or (self.tracks and churn > self.churn):
+            self.interval = max(self.min_interval, self.interval // 2)
+            self._calm = 0
+        else:
+            self._calm += 1
+            if self._calm >= self.calm_cycles:
+                self.interval = min(self.max_interval, self.interval + 1)
+                self._calm = 0
+
+    def propagate(self, frame_number):
+        """
+        Prediksi posisi semua track di frame tanpa deteksi
+
+        Returns:
+            (boxes, track_ids, confidences) atau None jika tidak ada track
+        """
+        self.propagated += 1
+        self._since_detect = (self._since_detect or 0) + 1
+        if not self.tracks:
+            return None
+
+        boxes, track_ids, confidences = [], [], []
+        for track_id, track in self.tracks.items():
+            cx, cy = track['kf'].predict(frame_number)
+            w, h = track['size']
+            boxes.append((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2))
+            track_ids.append(track_id)
+            confidences.append(track['conf'])
+
+            # Covariance posisi melebar melewati batas: deteksi di frame berikutnya
+            std = np.sqrt(max(track['kf'].P[0, 0], track['kf'].P[1, 1]))
+            if std > self.uncertainty * max(h, 1.0):
+                self._force = True
+
+        return np.array(boxes), np.array(track_ids, dtype=int), np.array(confidences)
+
+    def reset(self):
+        """
+        Buang semua track (mis. track ID tracker dimulai ulang setelah swap model)
+        """
+        self.tracks = {}
+        self._since_detect = None
+        self._calm = 0
+        self.interval = self.min_interval
+
+    def get_status(self):
+        return {
+            'interval': self.interval,
+            'tracks': len(self.tracks),
+            'detections': self.detections,
+            'propagated': self.propagated,
+            'last_error': self.last_error
+        }
+
+
+def create_detection_scheduler(config):
+    return DetectionScheduler(config.DETECT_INTERVAL_MIN, config.DETECT_INTERVAL_MAX,
+                              config.DETECT_UNCERTAINTY, config.DETECT_CHURN,
+                              process_noise=config.KALMAN_PROCESS_NOISE,
+                              measurement_noise=config.KALMAN_MEASUREMENT_NOISE)
@@ -0,0 +1,137 @@
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime
+
+import numpy as np
+
+# Header blob: magic, jumlah titik, frame awal, centroid awal (x, y), bbox awal (x1, y1, x2, y2)
+_HEADER = struct.Struct('<4sII6h')
+_MAGIC = b'TRJ1'
+
+_INT16_MIN, _INT16_MAX = -32768, 32767
+
+
+def _clip16(value):
+    return max(_INT16_MIN, min(_INT16_MAX, int(value)))
+
+
+class TrajectoryRecorder:
+    """
+    Rekam path setiap track (centroid + bbox per frame) secara delta-encoded.
+
+    Di memory, setiap track hanya menyimpan titik pertama dan array int16
+    berisi selisih terhadap titik sebelumnya. Saat track selesai (di-retire
+    oleh PeopleCounter.cleanup_old_tracks), hasilnya satu blob kompak.
+    """
+
+    def __init__(self, max_points=18000):
+        """
+        Args:
+            max_points: Maksimum titik per trajectory; jika tercapai, trajectory
+                        ditutup dan track melanjutkan di trajectory baru
+        """
+        self.max_points = max_points
+        self.tracks = {}  # {track_id: state}
+
+    def record(self, track_id, frame_number, centroid, bbox):
+        """
+        Tambah satu titik ke trajectory track
+
+        Returns:
+            trajectory: Dict trajectory yang ditutup karena max_points, atau None
+        """
+        point = (_clip16(centroid[0]), _clip16(centroid[1]),
+                 _clip16(bbox[0]), _clip16(bbox[1]), _clip16(bbox[2]), _clip16(bbox[3]))
+
+        state = self.tracks.get(track_id)
+        if state is None:
+            self.tracks[track_id] = {
+                'first': point,
+                'last': point,
+                'start_frame': int(frame_number),
+                'last_frame': int(frame_number),
+                'started_at': datetime.now(),
+                'frame_deltas': array('H'),
+                'point_deltas': array('h')  # 6 nilai per titik: cx, cy, x1, y1, x2, y2
+            }
+            return None
+
+        state['frame_deltas'].append(min(int(frame_number) - state['last_frame'], 0xFFFF))
+        state['point_deltas'].extend(_clip16(p - q) for p, q in zip(point, state['last']))
+        state['last'] = point
+        state['last_frame'] = int(frame_number)
+
+        if len(state['frame_deltas']) + 1 >= self.max_points:
+            return self.finish(track_id)
+        return None
+
+    def finish(self, track_id):
+        """
+        Tutup trajectory track dan encode menjadi blob
+
+        Returns:
+            dict: track_id, start_frame, end_frame, num_points, started_at, ended_at, data
+        """
+        state = self.tracks.pop(track_id, None)
+        if state is None:
+            return None
+
+        num_points = len(state['frame_deltas']) + 1
+
+        # Blob selalu little-endian
+        if sys.byteorder == 'big':
+            state['frame_deltas'].byteswap()
+            state['point_deltas'].byteswap()
+
+        header = _HEADER.pack(_MAGIC, num_points, state['start_frame'], *state['first'])
+        data = header + zlib.compress(state['frame_deltas'].tobytes() + state['point_deltas'].tobytes())
+
+        return {
+            'track_id': int(track_id),
+            'start_frame': state['start_frame'],
+            'end_frame': state['last_frame'],
+            'num_points': num_points,
+            'started_at': state['started_at'].strftime("%Y-%m-%d %H:%M:%S"),
+            'ended_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'data': data
+        }
+
+    def finish_all(self):
+        """
+        Tutup semua trajectory yang masih aktif (saat pipeline berhenti)
+        """
+        return [self.finish(track_id) for track_id in list(self.tracks)]
+
+
+def decode_trajectory(data):
+    """
+    Decode blob trajectory menjadi path lengkap
+
+    Returns:
+        dict: 'frames' (N,), 'centroids' (N, 2), 'bboxes' (N, 4) sebagai numpy int array
+    """
+    magic, num_points, start_frame, *first = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError("Not a trajectory blob")
+
+    payload = zlib.decompress(data[_HEADER.size:])
+    n = num_points - 1
+
+    frame_deltas = np.frombuffer(payload, dtype='<u2', count=n)
+    point_deltas = np.frombuffer(payload, dtype='<i2', count=n * 6, offset=n * 2).reshape(n, 6)
+
+    frames = np.empty(num_points, dtype=np.int64)
+    frames[0] = start_frame
+    frames[1:] = start_frame + np.cumsum(frame_deltas, dtype=np.int64)
+
+    points = np.empty((num_points, 6), dtype=np.int32)
+    points[0] = first
+    points[1:] = np.asarray(first, dtype=np.int32) + np.cumsum(point_deltas, axis=0, dtype=np.int32)
+
+    return {
+        'frames': frames,
+        'centroids': points[:, :2],
+        'bboxes': points[:, 2:]
+    }
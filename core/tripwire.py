@@ -0,0 +1,258 @@
+import threading
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+
+from core.event_buffer import EventBuffer
+
+
+def polygon_edges_as_lines(polygon_points):
+    """
+    Ubah edge polygon menjadi counting line dengan orientasi IN = masuk polygon
+
+    Returns:
+        np.ndarray: (M, 2, 2) float
+    """
+    pts = np.asarray(polygon_points, dtype=np.float64)
+    # Shoelace: orientasi dibuat supaya interior berada di sisi positif setiap edge
+    signed_area = np.sum(pts[:, 0] * np.roll(pts[:, 1], -1) - np.roll(pts[:, 0], -1) * pts[:, 1])
+    if signed_area < 0:
+        pts = pts[::-1]
+    return np.stack([pts, np.roll(pts, -1, axis=0)], axis=1)
+
+
+def segment_crossings(p0, p1, lines, half_open=False):
+    """
+    Intersection antara segment gerak (p0 -> p1) semua track dan semua line
+
+    Args:
+        p0, p1: (N, 2) posisi sebelumnya dan sekarang
+        lines: (M, 2, 2) line A -> B
+        half_open: Titik B tidak termasuk line (u pada [0, 1)), untuk edge polygon yang
+            saling berbagi vertex supaya gerak lewat vertex hanya dihitung sekali
+
+    Returns:
+        t: (N, M) posisi crossing di segment gerak (0..1), NaN jika tidak crossing
+        direction: (N, M) +1 = ke sisi positif line (IN), -1 = ke sisi negatif (OUT)
+    """
+    d = p1 - p0                                   # (N, 2)
+    a = lines[:, 0]                               # (M, 2)
+    e = lines[:, 1] - lines[:, 0]                 # (M, 2)
+
+    denom = d[:, None, 0] * e[None, :, 1] - d[:, None, 1] * e[None, :, 0]   # cross(d, e)
+    diff = a[None, :, :] - p0[:, None, :]                                   # (N, M, 2)
+    t_num = diff[..., 0] * e[None, :, 1] - diff[..., 1] * e[None, :, 0]     # cross(diff, e)
+    u_num = diff[..., 0] * d[:, None, 1] - diff[..., 1] * d[:, None, 0]     # cross(diff, d)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = t_num / denom
+        u = u_num / denom
+
+    # t pada (0, 1]: titik yang tepat di line dihitung sekali, saat pertama kali mencapainya
+    hit = (denom != 0) & (t > 0) & (t <= 1) & (u >= 0) & ((u < 1) if half_open else (u <= 1))
+    t = np.where(hit, t, np.nan)
+
+    # cross(e, d) = -cross(d, e): positif jika bergerak ke sisi positif line
+    # (koordinat gambar dengan y ke bawah: sisi kanan A -> B di layar)
+    direction = np.where(denom < 0, 1, -1)
+    return t, direction
+
+
+class TripwireCounter:
+    """
+    Counting berbasis garis (tripwire) dengan arah IN/OUT.
+
+    Setiap frame, segment gerak semua track (last_centroid -> centroid)
+    dites sekaligus terhadap semua counting line. Crossing tetap terdeteksi
+    walaupun track melompati area tipis karena FRAME_SKIP besar, dan waktu
+    crossing diinterpolasi di antara dua frame.
+    """
+
+    def __init__(self, lines, event_buffer=None, polygon_checker=None, area_id=None):
+        """
+        Args:
+            lines: List line [[x1, y1], [x2, y2]]; IN = bergerak ke sisi kanan A -> B di layar.
+                   None = edge polygon_checker dipakai sebagai line
+            event_buffer: EventBuffer untuk log event
+            polygon_checker: PolygonChecker area aktif
+            area_id: ID polygon_areas di database
+        """
+        self.lines_from_polygon = lines is None
+        if self.lines_from_polygon:
+            lines = polygon_edges_as_lines(polygon_checker.polygon.reshape(-1, 2))
+        self.lines = np.asarray(lines, dtype=np.float64).reshape(-1, 2, 2)
+        self.polygon_checker = polygon_checker
+        self.area_id = area_id
+        self.polygon_version = 1
+
+        self.tracked_objects = {}  # {track_id: {'last_centroid', 'last_frame', 'last_time', 'entered_at'}}
+
+        self.total_entered = 0
+        self.total_exited = 0
+        self.line_counts = np.zeros((len(self.lines), 2), dtype=np.int64)  # [IN, OUT] per line
+
+        self.events = event_buffer if event_buffer is not None else EventBuffer()
+        self._pending_seq = self.events.next_seq
+        self._lock = threading.RLock()
+
+    def update_batch(self, track_ids, centroids, frame_number):
+        """
+        Update semua track dalam satu frame
+
+        Returns:
+            dict: {track_id: 'IN' / 'OUT'} untuk track yang crossing di frame ini
+        """
+        with self._lock:
+            return self._update_batch(track_ids, centroids, frame_number)
+
+    def _update_batch(self, track_ids, centroids, frame_number):
+        now = datetime.now()
+        frame_events = {}
+
+        known = [i for i, tid in enumerate(track_ids) if tid in self.tracked_objects]
+        if known and len(self.lines):
+            p1 = np.asarray([centroids[i] for i in known], dtype=np.float64)
+            p0 = np.asarray([self.tracked_objects[track_ids[i]]['last_centroid'] for i in known],
+                            dtype=np.float64)
+            t, direction = segment_crossings(p0, p1, self.lines, half_open=self.lines_from_polygon)
+
+            for row in np.nonzero(~np.all(np.isnan(t), axis=1))[0]:
+                track_id = track_ids[known[row]]
+                state = self.tracked_objects[track_id]
+
+                # Beberapa line bisa dilewati dalam satu langkah, urutkan sesuai t
+                for col in sorted(np.nonzero(~np.isnan(t[row]))[0], key=lambda c: t[row, c]):
+                    frame_events[track_id] = self._emit(
+                        track_id, col, t[row, col], direction[row, col],
+                        p0[row], p1[row], state, frame_number, now)
+
+        for track_id, centroid in zip(track_ids, centroids):
+            state = self.tracked_objects.setdefault(track_id, {})
+            state['last_centroid'] = (int(centroid[0]), int(centroid[1]))
+            state['last_frame'] = frame_number
+            state['last_time'] = now
+
+        return frame_events
+
+    def update(self, track_id, centroid, frame_number):
+        """
+        Update satu track (kompatibel dengan PeopleCounter.update)
+        """
+        return self.update_batch([track_id], [centroid], frame_number).get(track_id)
+
+    def swap_polygon(self, polygon_checker, area_id=None):
+        """
+        Ganti polygon tanpa reset total IN/OUT. Jika line diambil dari edge
+        polygon, line ikut diganti (hitungan per line dimulai dari nol).
+
+        Returns:
+            int: Versi polygon baru
+        """
+        with self._lock:
+            if self.lines_from_polygon:
+                self.lines = polygon_edges_as_lines(polygon_checker.polygon.reshape(-1, 2))
+                self.line_counts = np.zeros((len(self.lines), 2), dtype=np.int64)
+            self.polygon_checker = polygon_checker
+            self.area_id = area_id
+            self.polygon_version += 1
+            return self.polygon_version
+
+    def detach_area(self):
+        """
+        Area di database dihapus (kompatibel dengan PeopleCounter.detach_area)
+        """
+        with self._lock:
+            self.area_id = None
+
+    def is_track_inside(self, track_id):
+        """
+        Tripwire tidak punya state inside: posisi terakhir track di dalam polygon aktif
+        (kompatibel dengan PeopleCounter.is_track_inside)
+        """
+        with self._lock:
+            state = self.tracked_objects.get(track_id)
+            if state is None or self.polygon_checker is None:
+                return False
+            return bool(self.polygon_checker.is_inside(state['last_centroid']))
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'total_entered': self.total_entered,
+                'total_exited': self.total_exited,
+                'current_inside': max(0, self.total_entered - self.total_exited),
+                'total_tracked': len(self.tracked_objects),
+                'polygon_version': self.polygon_version,
+                'lines': [{'in': int(c[0]), 'out': int(c[1])} for c in self.line_counts]
+            }
+
+    def get_pending_events(self):
+        events, self._pending_seq = self.events.events_since(self._pending_seq)
+        return events
+
+    def events_since(self, seq):
+        return self.events.events_since(seq)
+
+    def cleanup_old_tracks(self, active_track_ids):
+        """
+        Hapus track yang sudah tidak aktif
+
+        Returns:
+            list: Track ID yang di-retire
+        """
+        with self._lock:
+            inactive_ids = set(self.tracked_objects.keys()) - set(active_track_ids)
+            for track_id in inactive_ids:
+                del self.tracked_objects[track_id]
+            return list(inactive_ids)
+
+    def draw_lines(self, frame, color=(0, 255, 255), thickness=2):
+        """
+        Gambar counting line dan jumlah IN/OUT per line
+        """
+        with self._lock:
+            lines, line_counts = self.lines.astype(int), self.line_counts.copy()
+
+        for (a, b), (n_in, n_out) in zip(lines, line_counts):
+            cv2.line(frame, tuple(a), tuple(b), color, thickness)
+            cv2.putText(frame, f"IN:{n_in} OUT:{n_out}", tuple(b),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        return frame
+
+    def _emit(self, track_id, line_index, t, direction, p0, p1, state, frame_number, now):
+        event_type = 'IN' if direction > 0 else 'OUT'
+        if direction > 0:
+            self.total_entered += 1
+            self.line_counts[line_index, 0] += 1
+        else:
+            self.total_exited += 1
+            self.line_counts[line_index, 1] += 1
+
+        # Interpolasi sub-frame: posisi, frame dan waktu saat crossing
+        crossing_point = p0 + t * (p1 - p0)
+        crossing_frame = state['last_frame'] + t * (frame_number - state['last_frame'])
+        crossing_time = state['last_time'] + timedelta(
+            seconds=t * (now - state['last_time']).total_seconds())
+
+        # Dwell time: dari IN terakhir track ini sampai OUT (hanya jika IN-nya teramati)
+        dwell_seconds = None
+        if direction > 0:
+            state['entered_at'] = crossing_time
+        else:
+            entered_at = state.pop('entered_at', None)
+            dwell_seconds = (crossing_time - entered_at).total_seconds() if entered_at else None
+
+        self.events.append({
+            'track_id': track_id,
+            'event_type': event_type,
+            'line_index': int(line_index),
+            'timestamp': crossing_time,
+            'frame_number': frame_number,
+            'crossing_frame': float(crossing_frame),
+            'centroid': (int(crossing_point[0]), int(crossing_point[1])),
+            'dwell_seconds': dwell_seconds
+        })
+
+        print(f"{'✅' if event_type == 'IN' else '⬅️'} {event_type}: Track ID {track_id} | Line {line_index}")
+        return event_type
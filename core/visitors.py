@@ -0,0 +1,106 @@
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from core.sketches import HyperLogLog
+
+
+class UniqueVisitorCounter:
+    """
+    Hitung pengunjung unik per (kamera, area, jam) dengan HyperLogLog.
+
+    Track ID dari tracker di-reset setiap pipeline restart, jadi setiap ID
+    di-salt dengan camera_id dan session ID sebelum masuk sketch. Sketch
+    jam yang sedang berjalan di-flush berkala ke database (lewat WAL) dan
+    digabung (register max) dengan isi yang sudah ada di database.
+
+    Catatan: satu orang yang terlihat di dua kamera tetap terhitung dua
+    track; merge antar kamera menghasilkan jumlah track unik, bukan re-ID.
+    """
+
+    def __init__(self, camera_id, precision=12, flush_interval=60):
+        """
+        Args:
+            camera_id: ID kamera (Config.CAMERA_ID)
+            precision: Precision HyperLogLog (register = 2^precision byte)
+            flush_interval: Interval (detik) flush sketch ke database
+        """
+        self.camera_id = camera_id
+        self.precision = precision
+        self.flush_interval = flush_interval
+
+        self.salt = f"{camera_id}:{uuid.uuid4().hex}"
+        self.sketches = {}  # {(area_id, hour_start): HyperLogLog}
+        self._seen = {}  # {(area_id, hour_start): set(track_id)}, supaya hash hanya sekali per track per jam
+        self._dirty = set()
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    def observe(self, track_ids, area_id, now=None):
+        """
+        Masukkan track ID yang terlihat di frame ini
+        """
+        hour = (now or datetime.now()).replace(minute=0, second=0, microsecond=0)
+        key = (area_id, hour)
+
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is None:
+                # Jam baru: set track jam sebelumnya tidak diperlukan lagi
+                self._seen = {k: v for k, v in self._seen.items() if k[1] >= hour}
+                seen = self._seen[key] = set()
+
+            sketch = self.sketches.get(key)
+            if sketch is None:
+                sketch = self.sketches[key] = HyperLogLog(self.precision)
+            for track_id in track_ids:
+                track_id = int(track_id)
+                if track_id not in seen:
+                    seen.add(track_id)
+                    sketch.add(f"{self.salt}:{track_id}")
+                    self._dirty.add(key)
+
+    def reset_tracks(self):
+        """
+        Track ID tracker dimulai ulang (swap model): salt baru supaya ID yang dipakai ulang
+        dihitung sebagai pengunjung baru, bukan dianggap sudah terlihat
+        """
+        with self._lock:
+            self.salt = f"{self.camera_id}:{uuid.uuid4().hex}"
+            self._seen = {}
+
+    def live_rows(self, start, end, area_id=None):
+        """
+        Sketch di memory dalam format row get_visitor_sketches (untuk data yang belum di-flush)
+        """
+        with self._lock:
+            return [{
+                'camera_id': self.camera_id,
+                'polygon_area_id': key_area,
+                'summary_date': hour.strftime("%Y-%m-%d"),
+                'summary_hour': hour.hour,
+                'registers': sketch.to_bytes()
+            } for (key_area, hour), sketch in self.sketches.items()
+                if start <= hour < end and (area_id is None or key_area == area_id)]
+
+    def maybe_flush(self, writer, force=False):
+        """
+        Tulis sketch yang berubah ke writer (DurableWriter.save_visitor_sketch)
+        """
+        if not force and time.time() - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = time.time()
+
+        with self._lock:
+            dirty = [(key, self.sketches[key].to_bytes()) for key in self._dirty]
+            self._dirty.clear()
+
+            # Sketch jam yang sudah lewat dan sudah di-flush tidak perlu disimpan di memory
+            current_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+            for key in [k for k in self.sketches if k[1] < current_hour]:
+                del self.sketches[key]
+
+        for (area_id, hour), data in dirty:
+            if area_id is not None:
+                writer.save_visitor_sketch(self.camera_id, area_id, hour, data)
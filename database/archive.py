@@ -0,0 +1,240 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from database.wal import oldest_pending_timestamp
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet archive requires pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def archive_schema(table):
+    """
+    Schema Arrow untuk tabel arsip ('events' atau 'detections')
+    """
+    pa = _require_pyarrow()
+
+    if table == 'events':
+        return pa.schema([
+            ('event_uid', pa.string()),
+            ('polygon_area_id', pa.int32()),
+            ('tracking_id', pa.int32()),
+            ('event_type', pa.string()),
+            ('frame_number', pa.int32()),
+            ('video_source', pa.string()),
+            ('timestamp', pa.timestamp('s'))
+        ])
+
+    if table == 'detections':
+        return pa.schema([
+            ('detection_uid', pa.string()),
+            ('tracking_id', pa.int32()),
+            ('polygon_area_id', pa.int32()),
+            ('bbox_x1', pa.int32()),
+            ('bbox_y1', pa.int32()),
+            ('bbox_x2', pa.int32()),
+            ('bbox_y2', pa.int32()),
+            ('centroid_x', pa.int32()),
+            ('centroid_y', pa.int32()),
+            ('confidence', pa.float32()),
+            ('is_inside_polygon', pa.bool_()),
+            ('frame_number', pa.int32()),
+            ('video_source', pa.string()),
+            ('timestamp', pa.timestamp('s'))
+        ])
+
+    raise ValueError(f"Unknown archive table: {table}")
+
+
+class ParquetArchiver:
+    """
+    Export hari yang sudah selesai (closed range) dari database ke Parquet.
+
+    Hari dianggap selesai setelah grace period lewat dan tidak ada record WAL
+    hari itu yang belum di-replay (mis. setelah database down), karena row
+    yang masuk setelah hari diarsip tidak akan ikut terarsip.
+
+    Layout: <archive_dir>/<table>/date=YYYY-MM-DD/part-0.parquet
+    Row diurutkan per timestamp dan ditulis dengan statistik kolom, sehingga
+    query dengan filter waktu hanya membaca partition dan row group yang relevan.
+    """
+
+    def __init__(self, db, archive_dir, compression='zstd', row_group_size=100000, grace_hours=6, wal_dir=None):
+        """
+        Args:
+            db: StorageBackend (MySQL atau SQLite)
+            archive_dir: Folder root arsip
+            compression: Codec Parquet (zstd, snappy, gzip, ...)
+            row_group_size: Jumlah row per row group
+            grace_hours: Jam setelah pergantian hari sebelum hari tersebut boleh diarsip
+            wal_dir: Folder WAL DurableWriter (None = backlog tidak dicek)
+        """
+        _require_pyarrow()
+
+        self.db = db
+        self.archive_dir = archive_dir
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.grace_hours = grace_hours
+        self.wal_dir = wal_dir
+        self._state_path = os.path.join(archive_dir, '_state.json')
+
+    def export_day(self, table, day):
+        """
+        Export satu hari penuh dari tabel ke satu file Parquet
+
+        Returns:
+            rows: Jumlah row yang diexport
+        """
+        pa = _require_pyarrow()
+        import pyarrow.parquet as pq
+
+        schema = archive_schema(table)
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+
+        partition_dir = os.path.join(self.archive_dir, table, f"date={day.isoformat()}")
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, 'part-0.parquet')
+        tmp_path = path + '.tmp'
+
+        rows = 0
+        with pq.ParquetWriter(tmp_path, schema, compression=self.compression,
+                              write_statistics=True) as parquet_writer:
+            for batch in self.db.iter_archive_rows(table, start, end):
+                for row in batch:
+                    if isinstance(row['timestamp'], str):
+                        row['timestamp'] = datetime.strptime(row['timestamp'], "%Y-%m-%d %H:%M:%S")
+                    if 'is_inside_polygon' in row and row['is_inside_polygon'] is not None:
+                        row['is_inside_polygon'] = bool(row['is_inside_polygon'])
+
+                parquet_writer.write_table(pa.Table.from_pylist(batch, schema=schema),
+                                           row_group_size=self.row_group_size)
+                rows += len(batch)
+
+        os.replace(tmp_path, path)
+        return rows
+
+    def export_closed_ranges(self, tables=('events', 'detections'), until=None):
+        """
+        Export semua hari yang sudah selesai dan belum diarsip
+
+        Args:
+            until: Tanggal terakhir (exclusive); default closed_until()
+
+        Returns:
+            dict: {table: jumlah hari yang diexport}
+        """
+        until = until or self.closed_until()
+        state = self._load_state()
+        exported = {}
+
+        for table in tables:
+            last = state.get(table)
+            if last:
+                day = date.fromisoformat(last) + timedelta(days=1)
+            else:
+                first = self.db.get_archive_min_timestamp(table)
+                if first is None:
+                    exported[table] = 0
+                    continue
+                if isinstance(first, str):
+                    first = datetime.strptime(first, "%Y-%m-%d %H:%M:%S")
+                day = first.date()
+
+            count = 0
+            while day < until:
+                rows = self.export_day(table, day)
+                print(f"📦 Archived {table} {day.isoformat()}: {rows} rows")
+
+                state[table] = day.isoformat()
+                self._save_state(state)
+                day += timedelta(days=1)
+                count += 1
+
+            exported[table] = count
+
+        return exported
+
+    def closed_until(self):
+        """
+        Tanggal pertama (exclusive) yang belum boleh diarsip: hari ini dikurangi grace period,
+        dan tanggal record WAL paling lama yang belum di-replay
+        """
+        until = (datetime.now() - timedelta(hours=self.grace_hours)).date()
+        if self.wal_dir:
+            pending = oldest_pending_timestamp(self.wal_dir)
+            if pending is not None:
+                until = min(until, datetime.fromtimestamp(pending).date())
+        return until
+
+    def run_forever(self, interval=3600):
+        """
+        Export periodik (dipanggil dari tools/archive_exporter.py)
+        """
+        while True:
+            try:
+                self.export_closed_ranges()
+            except Exception as e:
+                print(f"❌ Archive export error: {e}")
+            time.sleep(interval)
+
+    def _load_state(self):
+        try:
+            with open(self._state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        tmp_path = self._state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path)
+
+
+def query_archive(archive_dir, table, columns=None, start=None, end=None, where=None):
+    """
+    Scan arsip Parquet dengan predicate pushdown
+
+    Args:
+        archive_dir: Folder root arsip
+        table: 'events' atau 'detections'
+        columns: List kolom yang dibaca (default semua)
+        start, end: datetime, filter timestamp start <= ts < end
+        where: Expression pyarrow.dataset tambahan, misal ds.field('polygon_area_id') == 1
+
+    Returns:
+        pandas.DataFrame
+    """
+    pa = _require_pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        os.path.join(archive_dir, table),
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+    )
+
+    expr = None
+    if start is not None:
+        # Partition pruning lewat kolom date, row group pruning lewat statistik timestamp
+        expr = (ds.field('date') >= start.date().isoformat()) & \
+               (ds.field('timestamp') >= pa.scalar(start, type=pa.timestamp('s')))
+    if end is not None:
+        end_expr = (ds.field('date') <= end.date().isoformat()) & \
+                   (ds.field('timestamp') < pa.scalar(end, type=pa.timestamp('s')))
+        expr = end_expr if expr is None else expr & end_expr
+    if where is not None:
+        expr = where if expr is None else expr & where
+
+    return dataset.to_table(columns=columns, filter=expr).to_pandas()
@@ -0,0 +1,295 @@
+import base64
+import json
+from datetime import datetime
+
+from core.sketches import HyperLogLog
+
+
+class StorageBackend:
+    """
+    Interface storage untuk pipeline dan API (MySQL, SQLite, ...).
+
+    Method CRUD polygon dan query raise exception saat gagal (ditangani API),
+    sedangkan save_* / update_summary tetap print dan menelan error seperti
+    perilaku DatabaseManager sebelumnya.
+    """
+
+    TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+    # Tabel yang bisa diarsip ke Parquet: {nama arsip: (tabel, kolom)}
+    ARCHIVE_TABLES = {
+        'events': ('people_counting', (
+            'event_uid', 'polygon_area_id', 'tracking_id', 'event_type',
+            'frame_number', 'video_source', 'timestamp'
+        )),
+        'detections': ('detections', (
+            'detection_uid', 'tracking_id', 'polygon_area_id',
+            'bbox_x1', 'bbox_y1', 'bbox_x2', 'bbox_y2', 'centroid_x', 'centroid_y',
+            'confidence', 'is_inside_polygon', 'frame_number', 'video_source', 'timestamp'
+        ))
+    }
+
+    def ensure_connection(self):
+        """
+        Pastikan backend bisa dipakai, raise jika tidak (default: selalu siap)
+        """
+
+    # Polygon areas
+    def get_polygon_area(self, area_id=1):
+        raise NotImplementedError
+
+    def list_polygons(self, active_only=False):
+        """
+        Returns:
+            list: Row polygon_areas dengan 'coordinates' sudah di-parse
+        """
+        raise NotImplementedError
+
+    def get_polygon(self, polygon_id):
+        raise NotImplementedError
+
+    def get_polygon_versions(self):
+        """
+        Query ringan untuk deteksi perubahan (PolygonRegistry)
+
+        Returns:
+            dict: {polygon_id: (updated_at str, is_active int)}
+        """
+        raise NotImplementedError
+
+    def get_active_polygon(self):
+        """
+        Dapatkan polygon aktif yang paling baru dibuat, atau None
+        """
+        raise NotImplementedError
+
+    def create_polygon(self, name, description, coordinates, is_active=False):
+        """
+        Returns:
+            polygon_id: ID polygon baru
+        """
+        raise NotImplementedError
+
+    def update_polygon(self, polygon_id, name=None, description=None, coordinates=None):
+        """
+        Returns:
+            bool: False jika polygon tidak ditemukan
+        """
+        raise NotImplementedError
+
+    def delete_polygon(self, polygon_id, hard_delete=False):
+        raise NotImplementedError
+
+    def activate_polygon(self, polygon_id):
+        raise NotImplementedError
+
+    def toggle_polygon_active(self, polygon_id):
+        raise NotImplementedError
+
+    # Pipeline writes
+    def save_detection(self, tracking_id, polygon_area_id, bbox, centroid,
+                       confidence, is_inside, frame_number, video_source):
+        raise NotImplementedError
+
+    def save_counting_event(self, polygon_area_id, tracking_id, event_type,
+                            frame_number, video_source):
+        raise NotImplementedError
+
+    def update_summary(self, polygon_area_id, total_entered, total_exited, current_count):
+        raise NotImplementedError
+
+    def get_event(self, event_id):
+        """
+        Returns:
+            dict: Row people_counting (timestamp sebagai string), atau None
+        """
+        raise NotImplementedError
+
+    def save_trajectory(self, polygon_area_id, trajectory, video_source):
+        """
+        Simpan satu trajectory track (dict dari TrajectoryRecorder)
+        """
+        raise NotImplementedError
+
+    def get_trajectory(self, trajectory_id):
+        """
+        Returns:
+            dict: Row track_trajectories (kolom 'data' berisi blob), atau None
+        """
+        raise NotImplementedError
+
+    def get_visitor_sketches(self, start, end, camera_id=None, area_id=None):
+        """
+        Sketch pengunjung unik dengan start <= jam sketch < end
+
+        Returns:
+            list: [{'camera_id', 'polygon_area_id', 'summary_date', 'summary_hour', 'registers'}, ...]
+        """
+        raise NotImplementedError
+
+    def list_event_clips(self, start, end, area_id=None):
+        """
+        Klip event dengan start <= started_at < end, terbaru dulu
+
+        Returns:
+            list: Row event_clips ('event_uids' sudah di-parse)
+        """
+        raise NotImplementedError
+
+    def get_event_clip(self, clip_id):
+        """
+        Returns:
+            dict: Row event_clips, atau None
+        """
+        raise NotImplementedError
+
+    def apply_wal_batch(self, records):
+        raise NotImplementedError
+
+    def is_transient_error(self, error):
+        """
+        True jika error apply_wal_batch karena koneksi / database sibuk (batch di-retry),
+        False jika karena isi record (mis. FK ke polygon yang sudah dihapus)
+        """
+        return isinstance(error, (ConnectionError, TimeoutError, OSError))
+
+    # Stats
+    def get_summary_history(self, since):
+        """
+        Returns:
+            list: [{'updated_at': str, 'current_count': int}, ...] urut waktu
+        """
+        raise NotImplementedError
+
+    # Archive
+    def get_archive_min_timestamp(self, table):
+        """
+        Timestamp row paling lama di tabel arsip (untuk mulai export), atau None
+        """
+        raise NotImplementedError
+
+    def iter_archive_rows(self, table, start, end, batch_size=50000):
+        """
+        Yield batch row (list of dict) dengan start <= timestamp < end, urut timestamp
+        """
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def split_wal_records(records):
+        """
+        Kelompokkan record WAL per kind, dalam bentuk tuple parameter query
+
+        Returns:
+            dict: {'event': [...], 'detection': [...], 'summary': [...], 'trajectory': [...],
+                   'visitor_sketch': [...], 'clip': [...]}
+        """
+        rows = {'event': [], 'detection': [], 'summary': [], 'trajectory': [], 'visitor_sketch': [], 'clip': []}
+        summaries = {}  # Satu row per (area, tanggal, jam): record terakhir yang dipakai
+
+        for record in records:
+            p = record['payload']
+            if record['kind'] == 'event':
+                rows['event'].append((
+                    record['uid'], p['polygon_area_id'], p['tracking_id'], p['event_type'],
+                    p['frame_number'], p['video_source'], p['timestamp']
+                ))
+            elif record['kind'] == 'detection':
+                rows['detection'].append((
+                    record['uid'], p['tracking_id'], p['polygon_area_id'],
+                    p['bbox'][0], p['bbox'][1], p['bbox'][2], p['bbox'][3],
+                    p['centroid'][0], p['centroid'][1],
+                    p['confidence'], p['is_inside'],
+                    p['frame_number'], p['video_source'], p['timestamp']
+                ))
+            elif record['kind'] == 'summary':
+                summaries[(p['polygon_area_id'], p['summary_date'], p['summary_hour'])] = (
+                    p['polygon_area_id'], p['summary_date'], p['summary_hour'],
+                    p['total_entered'], p['total_exited'], p['current_count'], p['updated_at']
+                )
+            elif record['kind'] == 'trajectory':
+                rows['trajectory'].append((
+                    record['uid'], p['track_id'], p['polygon_area_id'],
+                    p['start_frame'], p['end_frame'], p['num_points'],
+                    p['started_at'], p['ended_at'], p['video_source'],
+                    base64.b64decode(p['data'])
+                ))
+            elif record['kind'] == 'visitor_sketch':
+                rows['visitor_sketch'].append((
+                    p['camera_id'], p['polygon_area_id'], p['summary_date'], p['summary_hour'],
+                    base64.b64decode(p['registers']), p['updated_at']
+                ))
+            elif record['kind'] == 'clip':
+                rows['clip'].append((
+                    record['uid'], p['polygon_area_id'], p['camera_id'], p['trigger_type'],
+                    json.dumps(p['event_uids']), p['started_at'], p['ended_at'], p['num_frames'],
+                    p['file_path'], p['file_size'], p['video_source']
+                ))
+
+        rows['summary'] = list(summaries.values())
+        return rows
+
+    @staticmethod
+    def merge_visitor_sketch_rows(rows, load_existing):
+        """
+        Gabungkan sketch dalam satu batch dan dengan isi database (register max)
+
+        Args:
+            rows: Tuple (camera_id, area_id, date, hour, registers, updated_at) dari split_wal_records
+            load_existing: fn(camera_id, area_id, date, hour) -> registers bytes atau None
+
+        Returns:
+            list: Tuple dengan format sama, satu per key, siap di-upsert
+        """
+        merged = {}
+        for camera_id, area_id, date, hour, registers, updated_at in rows:
+            key = (camera_id, area_id, date, hour)
+            sketch = HyperLogLog.from_bytes(registers)
+            if key in merged:
+                merged[key][0].merge(sketch)
+                merged[key][1] = max(merged[key][1], updated_at)
+            else:
+                merged[key] = [sketch, updated_at]
+
+        result = []
+        for key, (sketch, updated_at) in merged.items():
+            existing = load_existing(*key)
+            if existing:
+                sketch.merge(HyperLogLog.from_bytes(existing))
+            result.append(key + (sketch.to_bytes(), updated_at))
+        return result
+
+    @classmethod
+    def format_polygon_row(cls, row):
+        """
+        Normalisasi row polygon_areas: parse coordinates, timestamp jadi string
+        """
+        row = dict(row)
+        if isinstance(row.get('coordinates'), (str, bytes)):
+            row['coordinates'] = json.loads(row['coordinates'])
+        for key in ('created_at', 'updated_at'):
+            if isinstance(row.get(key), datetime):
+                row[key] = row[key].strftime(cls.TIME_FORMAT)
+        return row
+
+    @classmethod
+    def format_clip_row(cls, row):
+        """
+        Normalisasi row event_clips: parse event_uids, timestamp jadi string
+        """
+        row = dict(row)
+        if isinstance(row.get('event_uids'), (str, bytes)):
+            row['event_uids'] = json.loads(row['event_uids'])
+        for key in ('started_at', 'ended_at', 'created_at'):
+            if isinstance(row.get(key), datetime):
+                row[key] = row[key].strftime(cls.TIME_FORMAT)
+        return row
+
+    @staticmethod
+    def polygon_points(row):
+        """
+        List (x, y) dari row polygon yang sudah dinormalisasi
+        """
+        return [(int(p['x']), int(p['y'])) for p in row['coordinates']['points']]
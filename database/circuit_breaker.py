@@ -0,0 +1,62 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker sederhana untuk koneksi database.
+
+    closed    - request normal
+    open      - database dianggap down, request langsung ditolak
+    half_open - setelah reset_timeout, satu request percobaan diizinkan
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        """
+        Args:
+            failure_threshold: Jumlah kegagalan berturut-turut sebelum breaker open
+            reset_timeout: Detik menunggu sebelum mencoba lagi (half_open)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        Cek apakah boleh mencoba akses database sekarang
+        """
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = 'half_open'
+                return True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                print("✅ Database reachable again, circuit closed")
+            self.state = 'closed'
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"⚠️ Database unavailable, circuit open for {self.reset_timeout}s")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def get_status(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures
+            }
@@ -1,28 +1,63 @@
 import mysql.connector
 from datetime import datetime, date
+import functools
 import json
+import threading
+import uuid
 from config.config import Config
+from database.base import StorageBackend
 
 
-class DatabaseManager:
+def synchronized(method):
+    """
+    Jalankan method di bawah self._lock: satu koneksi mysql.connector dipakai
+    frame loop, WAL replay thread, polling registry dan handler API
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class DatabaseManager(StorageBackend):
     def __init__(self):
         self.config = Config()
         self.connection = None
+        self._lock = threading.RLock()
         self.connect()
 
+    @synchronized
+    def _new_connection(self):
+        return mysql.connector.connect(
+            host=self.config.DB_HOST,
+            database=self.config.DB_NAME,
+            user=self.config.DB_USER,
+            password=self.config.DB_PASSWORD,
+            connection_timeout=self.config.DB_CONNECT_TIMEOUT
+        )
+
     def connect(self):
         """Connect ke database"""
         try:
-            self.connection = mysql.connector.connect(
-                host=self.config.DB_HOST,
-                database=self.config.DB_NAME,
-                user=self.config.DB_USER,
-                password=self.config.DB_PASSWORD
-            )
+            self.connection = self._new_connection()
             print("✅ Database connected")
         except Exception as e:
             print(f"❌ Database connection error: {e}")
 
+    @synchronized
+    def ensure_connection(self):
+        """
+        Pastikan koneksi aktif, reconnect jika perlu (raise jika database down)
+        """
+        if self.connection is None:
+            self.connect()
+            if self.connection is None:
+                raise ConnectionError("Database is not reachable")
+        else:
+            self.connection.ping(reconnect=True, attempts=1, delay=0)
+
+    @synchronized
     def get_polygon_area(self, area_id=1):
         try:
             cursor = self.connection.cursor(dictionary=True)
@@ -47,20 +82,266 @@ class DatabaseManager:
             print(f"❌ Error fetching polygon: {e}")
             return None
 
+    @synchronized
+    def list_polygons(self, active_only=False):
+        cursor = self.connection.cursor(dictionary=True)
+        if active_only:
+            cursor.execute("SELECT * FROM polygon_areas WHERE is_active = TRUE ORDER BY created_at DESC")
+        else:
+            cursor.execute("SELECT * FROM polygon_areas ORDER BY created_at DESC")
+        rows = cursor.fetchall()
+        cursor.close()
+        return [self.format_polygon_row(r) for r in rows]
+
+    @synchronized
+    def get_polygon(self, polygon_id):
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM polygon_areas WHERE id = %s", (polygon_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        return self.format_polygon_row(row) if row else None
+
+    @synchronized
+    def get_polygon_versions(self):
+        self.ensure_connection()
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT id, updated_at, is_active FROM polygon_areas")
+        rows = cursor.fetchall()
+        cursor.close()
+        return {
+            polygon_id: (updated_at.strftime(self.TIME_FORMAT) if updated_at else None, int(is_active))
+            for polygon_id, updated_at, is_active in rows
+        }
+
+    @synchronized
+    def get_active_polygon(self):
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT * FROM polygon_areas
+            WHERE is_active = TRUE
+            ORDER BY created_at DESC
+            LIMIT 1
+        """)
+        row = cursor.fetchone()
+        cursor.close()
+        return self.format_polygon_row(row) if row else None
+
+    @synchronized
+    def create_polygon(self, name, description, coordinates, is_active=False):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO polygon_areas (name, description, coordinates, is_active)
+                VALUES (%s, %s, %s, %s)
+            """, (name, description, json.dumps(coordinates), is_active))
+            self.connection.commit()
+            return cursor.lastrowid
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @synchronized
+    def update_polygon(self, polygon_id, name=None, description=None, coordinates=None):
+        updates = []
+        values = []
+
+        if name:
+            updates.append("name = %s")
+            values.append(name)
+
+        if description is not None:
+            updates.append("description = %s")
+            values.append(description)
+
+        if coordinates is not None:
+            updates.append("coordinates = %s")
+            values.append(json.dumps(coordinates))
+
+        updates.append("updated_at = NOW()")
+        values.append(polygon_id)
+
+        return self._execute_write(
+            f"UPDATE polygon_areas SET {', '.join(updates)} WHERE id = %s", values) > 0
+
+    @synchronized
+    def delete_polygon(self, polygon_id, hard_delete=False):
+        if hard_delete:
+            sql = "DELETE FROM polygon_areas WHERE id = %s"
+        else:
+            sql = "UPDATE polygon_areas SET is_active = FALSE WHERE id = %s"
+        return self._execute_write(sql, (polygon_id,)) > 0
+
+    @synchronized
+    def activate_polygon(self, polygon_id):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("SELECT id FROM polygon_areas WHERE id = %s", (polygon_id,))
+            if not cursor.fetchone():
+                return False
+
+            cursor.execute("UPDATE polygon_areas SET is_active = FALSE")
+            cursor.execute("UPDATE polygon_areas SET is_active = TRUE, updated_at = NOW() WHERE id = %s",
+                           (polygon_id,))
+            self.connection.commit()
+            return True
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @synchronized
+    def toggle_polygon_active(self, polygon_id):
+        return self._execute_write("""
+            UPDATE polygon_areas
+            SET is_active = NOT is_active
+            WHERE id = %s
+        """, (polygon_id,)) > 0
+
+    @synchronized
+    def get_summary_history(self, since):
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT updated_at, current_count FROM counting_summary WHERE updated_at >= %s ORDER BY updated_at",
+            (since,)
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+        for row in rows:
+            row['updated_at'] = row['updated_at'].strftime(self.TIME_FORMAT)
+        return rows
+
+    @synchronized
+    def get_visitor_sketches(self, start, end, camera_id=None, area_id=None):
+        sql = """
+            SELECT camera_id, polygon_area_id, summary_date, summary_hour, registers
+            FROM visitor_sketches
+            WHERE summary_date BETWEEN %s AND %s
+        """
+        values = [start.date(), end.date()]
+        if camera_id is not None:
+            sql += " AND camera_id = %s"
+            values.append(camera_id)
+        if area_id is not None:
+            sql += " AND polygon_area_id = %s"
+            values.append(area_id)
+
+        self.ensure_connection()
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute(sql, values)
+        rows = cursor.fetchall()
+        cursor.close()
+
+        result = []
+        for row in rows:
+            row['summary_date'] = row['summary_date'].strftime("%Y-%m-%d")
+            hour_start = datetime.strptime(row['summary_date'], "%Y-%m-%d").replace(hour=row['summary_hour'])
+            if start <= hour_start < end:
+                result.append(row)
+        return result
+
+    @synchronized
+    def get_event(self, event_id):
+        self.ensure_connection()
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM people_counting WHERE id = %s", (event_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        if row and isinstance(row.get('timestamp'), datetime):
+            row['timestamp'] = row['timestamp'].strftime(self.TIME_FORMAT)
+        return row
+
+    @synchronized
+    def list_event_clips(self, start, end, area_id=None):
+        sql = "SELECT * FROM event_clips WHERE started_at >= %s AND started_at < %s"
+        values = [start, end]
+        if area_id is not None:
+            sql += " AND polygon_area_id = %s"
+            values.append(area_id)
+        sql += " ORDER BY started_at DESC"
+
+        self.ensure_connection()
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute(sql, values)
+        rows = cursor.fetchall()
+        cursor.close()
+        return [self.format_clip_row(row) for row in rows]
+
+    @synchronized
+    def get_event_clip(self, clip_id):
+        self.ensure_connection()
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM event_clips WHERE id = %s", (clip_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        return self.format_clip_row(row) if row else None
+
+    @synchronized
+    def get_archive_min_timestamp(self, table):
+        table_name, _ = self.ARCHIVE_TABLES[table]
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT MIN(timestamp) FROM {table_name}")
+        row = cursor.fetchone()
+        cursor.close()
+        return row[0] if row else None
+
+    def iter_archive_rows(self, table, start, end, batch_size=50000):
+        table_name, columns = self.ARCHIVE_TABLES[table]
+        # Koneksi sendiri: result set unbuffered di-stream selama export, koneksi bersama
+        # (frame loop, WAL replay, API) tidak boleh terblokir / tercampur selama itu
+        connection = self._new_connection()
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM {table_name} "
+                f"WHERE timestamp >= %s AND timestamp < %s ORDER BY timestamp",
+                (start, end)
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            connection.close()
+
+    @synchronized
+    def _execute_write(self, sql, values):
+        """
+        Jalankan satu query write dan commit
+
+        Returns:
+            rowcount: Jumlah row yang terpengaruh
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, values)
+            self.connection.commit()
+            return cursor.rowcount
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @synchronized
     def save_detection(self, tracking_id, polygon_area_id, bbox, centroid,
                        confidence, is_inside, frame_number, video_source):
         try:
             cursor = self.connection.cursor()
             query = """
                 INSERT INTO detections 
-                (tracking_id, polygon_area_id, bbox_x1, bbox_y1, bbox_x2, bbox_y2,
+                (detection_uid, tracking_id, polygon_area_id, bbox_x1, bbox_y1, bbox_x2, bbox_y2,
                  centroid_x, centroid_y, confidence, is_inside_polygon, 
                  frame_number, video_source)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """
 
             cursor.execute(query, (
-                tracking_id, polygon_area_id,
+                uuid.uuid4().hex, tracking_id, polygon_area_id,
                 bbox[0], bbox[1], bbox[2], bbox[3],
                 centroid[0], centroid[1],
                 confidence, is_inside,
@@ -73,6 +354,7 @@ class DatabaseManager:
         except Exception as e:
             print(f"❌ Error saving detection: {e}")
 
+    @synchronized
     def save_counting_event(self, polygon_area_id, tracking_id, event_type,
                             frame_number, video_source):
         """
@@ -82,12 +364,12 @@ class DatabaseManager:
             cursor = self.connection.cursor()
             query = """
                 INSERT INTO people_counting 
-                (polygon_area_id, tracking_id, event_type, frame_number, video_source)
-                VALUES (%s, %s, %s, %s, %s)
+                (event_uid, polygon_area_id, tracking_id, event_type, frame_number, video_source)
+                VALUES (%s, %s, %s, %s, %s, %s)
             """
 
             cursor.execute(query, (
-                polygon_area_id, tracking_id, event_type,
+                uuid.uuid4().hex, polygon_area_id, tracking_id, event_type,
                 frame_number, video_source
             ))
 
@@ -97,6 +379,7 @@ class DatabaseManager:
         except Exception as e:
             print(f"❌ Error saving counting event: {e}")
 
+    @synchronized
     def update_summary(self, polygon_area_id, total_entered, total_exited, current_count):
         try:
             cursor = self.connection.cursor()
@@ -126,6 +409,7 @@ class DatabaseManager:
         except Exception as e:
             print(f"❌ Error updating summary: {e}")
 
+    @synchronized
     def update_counting_summary(self, polygon_area_id, total_entered, total_exited, current_count):
         try:
             from datetime import datetime
@@ -168,6 +452,140 @@ class DatabaseManager:
             traceback.print_exc()
             return False
 
+    @synchronized
+    def apply_wal_batch(self, records):
+        """
+        Tulis batch record WAL dalam satu transaksi.
+
+        Event dan detection memakai INSERT IGNORE dengan uid unik, summary
+        memakai upsert, sehingga replay batch yang sama berulang kali aman.
+        Exception tidak ditelan supaya batch di-retry oleh DurableWriter.
+        """
+        rows = self.split_wal_records(records)
+
+        self.ensure_connection()
+        cursor = self.connection.cursor()
+        try:
+            if rows['event']:
+                cursor.executemany("""
+                    INSERT IGNORE INTO people_counting
+                    (event_uid, polygon_area_id, tracking_id, event_type,
+                     frame_number, video_source, timestamp)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, rows['event'])
+
+            if rows['detection']:
+                cursor.executemany("""
+                    INSERT IGNORE INTO detections
+                    (detection_uid, tracking_id, polygon_area_id,
+                     bbox_x1, bbox_y1, bbox_x2, bbox_y2,
+                     centroid_x, centroid_y, confidence, is_inside_polygon,
+                     frame_number, video_source, timestamp)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, rows['detection'])
+
+            if rows['summary']:
+                # Unique key tidak berlaku untuk polygon_area_id NULL (polygon default): hapus row jam yang sama dulu
+                null_area_keys = [(date, hour) for area_id, date, hour, *_ in rows['summary'] if area_id is None]
+                if null_area_keys:
+                    cursor.executemany("""
+                        DELETE FROM counting_summary
+                        WHERE polygon_area_id IS NULL AND summary_date = %s AND summary_hour = %s
+                    """, null_area_keys)
+                cursor.executemany("""
+                    INSERT INTO counting_summary
+                    (polygon_area_id, summary_date, summary_hour, total_entered,
+                     total_exited, current_count, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        total_entered = VALUES(total_entered),
+                        total_exited = VALUES(total_exited),
+                        current_count = VALUES(current_count),
+                        updated_at = VALUES(updated_at)
+                """, rows['summary'])
+
+            if rows['trajectory']:
+                cursor.executemany("""
+                    INSERT IGNORE INTO track_trajectories
+                    (trajectory_uid, track_id, polygon_area_id, start_frame, end_frame,
+                     num_points, started_at, ended_at, video_source, data)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, rows['trajectory'])
+
+            if rows['visitor_sketch']:
+                def load_existing(camera_id, area_id, date, hour):
+                    cursor.execute("""
+                        SELECT registers FROM visitor_sketches
+                        WHERE camera_id = %s AND polygon_area_id = %s
+                          AND summary_date = %s AND summary_hour = %s
+                        FOR UPDATE
+                    """, (camera_id, area_id, date, hour))
+                    row = cursor.fetchone()
+                    return row[0] if row else None
+
+                cursor.executemany("""
+                    INSERT INTO visitor_sketches
+                    (camera_id, polygon_area_id, summary_date, summary_hour, registers, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        registers = VALUES(registers),
+                        updated_at = VALUES(updated_at)
+                """, self.merge_visitor_sketch_rows(rows['visitor_sketch'], load_existing))
+
+            if rows['clip']:
+                cursor.executemany("""
+                    INSERT IGNORE INTO event_clips
+                    (clip_uid, polygon_area_id, camera_id, trigger_type, event_uids,
+                     started_at, ended_at, num_frames, file_path, file_size, video_source)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, rows['clip'])
+
+            self.connection.commit()
+        except Exception:
+            try:
+                self.connection.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            cursor.close()
+
+    # Lock wait timeout, deadlock: transaksi boleh diulang
+    TRANSIENT_ERRNOS = {1205, 1213}
+
+    def is_transient_error(self, error):
+        if isinstance(error, (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError)):
+            return True
+        if isinstance(error, mysql.connector.Error) and error.errno in self.TRANSIENT_ERRNOS:
+            return True
+        return super().is_transient_error(error)
+
+    @synchronized
+    def save_trajectory(self, polygon_area_id, trajectory, video_source):
+        try:
+            self._execute_write("""
+                INSERT INTO track_trajectories
+                (trajectory_uid, track_id, polygon_area_id, start_frame, end_frame,
+                 num_points, started_at, ended_at, video_source, data)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                uuid.uuid4().hex, trajectory['track_id'], polygon_area_id,
+                trajectory['start_frame'], trajectory['end_frame'], trajectory['num_points'],
+                trajectory['started_at'], trajectory['ended_at'], video_source, trajectory['data']
+            ))
+
+        except Exception as e:
+            print(f"❌ Error saving trajectory: {e}")
+
+    @synchronized
+    def get_trajectory(self, trajectory_id):
+        cursor = self.connection.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM track_trajectories WHERE id = %s", (trajectory_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        return row
+
+    @synchronized
     def close(self):
         if self.connection:
             self.connection.close()
@@ -0,0 +1,194 @@
+import base64
+import threading
+from datetime import datetime
+
+from database.circuit_breaker import CircuitBreaker
+from database.wal import WriteAheadLog
+
+
+class DurableWriter:
+    """
+    Writer database untuk frame loop: semua record ditulis dulu ke WAL lokal,
+    lalu di-replay ke database secara batch oleh background thread.
+
+    Method save_detection / save_counting_event / update_summary memiliki
+    signature yang sama dengan DatabaseManager, sehingga frame loop tidak
+    pernah menunggu timeout koneksi saat database down.
+    """
+
+    def __init__(self, db, config):
+        """
+        Args:
+            db: DatabaseManager (harus punya apply_wal_batch)
+            config: Config
+        """
+        self.db = db
+        self.wal = WriteAheadLog(config.WAL_DIR,
+                                 fsync_interval=config.WAL_FSYNC_INTERVAL,
+                                 fsync_batch=config.WAL_FSYNC_BATCH)
+        self.breaker = CircuitBreaker(config.DB_BREAKER_FAILURES, config.DB_BREAKER_RESET)
+        self.replay_batch = config.WAL_REPLAY_BATCH
+        self.replay_interval = config.WAL_REPLAY_INTERVAL
+
+        self.replayed = 0
+        self.quarantined = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._replay_loop, daemon=True)
+        self._thread.start()
+
+    def save_detection(self, tracking_id, polygon_area_id, bbox, centroid,
+                       confidence, is_inside, frame_number, video_source):
+        return self.wal.append('detection', {
+            'tracking_id': int(tracking_id),
+            'polygon_area_id': polygon_area_id,
+            'bbox': [int(v) for v in bbox],
+            'centroid': [int(v) for v in centroid],
+            'confidence': float(confidence),
+            'is_inside': bool(is_inside),
+            'frame_number': int(frame_number),
+            'video_source': video_source,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+    def save_counting_event(self, polygon_area_id, tracking_id, event_type,
+                            frame_number, video_source, timestamp=None):
+        """
+        Simpan counting event (ENTER/EXIT/IN/OUT) ke WAL
+
+        Args:
+            timestamp: Waktu event (default: sekarang), mis. waktu crossing hasil interpolasi
+
+        Returns:
+            uid: ID event, sama dengan kolom event_uid di database
+        """
+        return self.wal.append('event', {
+            'polygon_area_id': polygon_area_id,
+            'tracking_id': int(tracking_id),
+            'event_type': event_type,
+            'frame_number': int(frame_number),
+            'video_source': video_source,
+            'timestamp': (timestamp or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+    def update_summary(self, polygon_area_id, total_entered, total_exited, current_count):
+        # Jam summary diambil saat record dibuat, bukan saat replay
+        now = datetime.now()
+        return self.wal.append('summary', {
+            'polygon_area_id': polygon_area_id,
+            'total_entered': int(total_entered),
+            'total_exited': int(total_exited),
+            'current_count': int(current_count),
+            'summary_date': now.strftime("%Y-%m-%d"),
+            'summary_hour': now.hour,
+            'updated_at': now.strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+    def save_trajectory(self, polygon_area_id, trajectory, video_source):
+        """
+        Simpan trajectory (dari TrajectoryRecorder.finish) ke WAL
+        """
+        payload = dict(trajectory)
+        payload['data'] = base64.b64encode(trajectory['data']).decode('ascii')
+        payload['polygon_area_id'] = polygon_area_id
+        payload['video_source'] = video_source
+        return self.wal.append('trajectory', payload)
+
+    def save_event_clip(self, clip, camera_id, video_source):
+        """
+        Simpan referensi klip video (dari ClipRecorder) ke WAL
+        """
+        return self.wal.append('clip', {
+            'polygon_area_id': clip['polygon_area_id'],
+            'camera_id': camera_id,
+            'trigger_type': clip['trigger_type'],
+            'event_uids': list(clip['event_uids']),
+            'started_at': clip['started_at'].strftime("%Y-%m-%d %H:%M:%S"),
+            'ended_at': clip['ended_at'].strftime("%Y-%m-%d %H:%M:%S"),
+            'num_frames': int(clip['num_frames']),
+            'file_path': clip['file_path'],
+            'file_size': int(clip['file_size']),
+            'video_source': video_source
+        })
+
+    def save_visitor_sketch(self, camera_id, polygon_area_id, hour_start, registers):
+        """
+        Simpan sketch HyperLogLog satu jam ke WAL (digabung dengan isi database saat replay)
+        """
+        return self.wal.append('visitor_sketch', {
+            'camera_id': camera_id,
+            'polygon_area_id': polygon_area_id,
+            'summary_date': hour_start.strftime("%Y-%m-%d"),
+            'summary_hour': hour_start.hour,
+            'registers': base64.b64encode(registers).decode('ascii'),
+            'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+    def flush(self):
+        """
+        Replay semua record yang tertunda (jika database tersedia)
+
+        Returns:
+            bool: True jika WAL sudah kosong
+        """
+        while self.breaker.allow_request():
+            records, position = self.wal.read_batch(self.replay_batch)
+            if not records:
+                return True
+
+            try:
+                self.db.apply_wal_batch(records)
+            except Exception as e:
+                if self.db.is_transient_error(e):
+                    print(f"⚠️ WAL replay failed, will retry: {e}")
+                    self.breaker.record_failure()
+                    return False
+                # Error data (bukan database down): cari record bermasalah satu per satu
+                print(f"⚠️ WAL batch rejected ({e}), replaying record by record")
+                if not self._apply_each(records):
+                    return False
+
+            self.wal.commit(position)
+            self.breaker.record_success()
+            self.replayed += len(records)
+
+        return False
+
+    def get_status(self):
+        return {
+            'breaker': self.breaker.get_status(),
+            'replayed': self.replayed,
+            'quarantined': self.quarantined
+        }
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.wal.sync(force=True)
+        if not self.flush():
+            print("⚠️ Some records are still pending in the WAL, they will be replayed on next start")
+        self.wal.close()
+
+    def _apply_each(self, records):
+        """
+        Replay record satu per satu, record yang ditolak database dikarantina
+
+        Returns:
+            bool: False jika database tidak tersedia di tengah jalan (batch di-retry nanti)
+        """
+        for record in records:
+            try:
+                self.db.apply_wal_batch([record])
+            except Exception as e:
+                if self.db.is_transient_error(e):
+                    print(f"⚠️ WAL replay failed, will retry: {e}")
+                    self.breaker.record_failure()
+                    return False
+                self.wal.quarantine(record, e)
+                self.quarantined += 1
+                print(f"❌ WAL record {record['uid']} ({record['kind']}) quarantined: {e}")
+        return True
+
+    def _replay_loop(self):
+        while not self._stop.wait(self.replay_interval):
+            self.wal.sync()
+            self.flush()
@@ -0,0 +1,18 @@
+from config.config import Config
+
+
+def create_database_manager(config=None):
+    """
+    Buat storage backend sesuai Config.DB_BACKEND ('mysql' atau 'sqlite')
+    """
+    config = config or Config()
+
+    if config.DB_BACKEND == 'sqlite':
+        from database.sqlite_manager import SQLiteManager
+        return SQLiteManager(config.SQLITE_PATH)
+
+    if config.DB_BACKEND == 'mysql':
+        from database.db_manager import DatabaseManager
+        return DatabaseManager()
+
+    raise ValueError(f"Unknown DB_BACKEND: {config.DB_BACKEND}")
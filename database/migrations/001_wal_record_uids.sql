@@ -0,0 +1,72 @@
+-- Migration untuk database yang dibuat sebelum WAL replay (DurableWriter)
+-- Menambahkan uid unik supaya replay idempotent, dan kolom + unique key summary per jam.
+-- Jalankan pada database aplikasi (DB_NAME), aman dijalankan ulang:
+--     mysql -u <user> -p <DB_NAME> < database/migrations/001_wal_record_uids.sql
+
+-- people_counting.event_uid
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.COLUMNS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'people_counting' AND COLUMN_NAME = 'event_uid') = 0,
+              'ALTER TABLE people_counting ADD COLUMN event_uid CHAR(32) NULL AFTER id',
+              'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+UPDATE people_counting SET event_uid = REPLACE(UUID(), '-', '') WHERE event_uid IS NULL;
+ALTER TABLE people_counting MODIFY event_uid CHAR(32) NOT NULL;
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'people_counting' AND INDEX_NAME = 'uq_event_uid') = 0,
+              'ALTER TABLE people_counting ADD UNIQUE KEY uq_event_uid (event_uid)',
+              'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- detections.detection_uid
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.COLUMNS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'detections' AND COLUMN_NAME = 'detection_uid') = 0,
+              'ALTER TABLE detections ADD COLUMN detection_uid CHAR(32) NULL AFTER id',
+              'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+UPDATE detections SET detection_uid = REPLACE(UUID(), '-', '') WHERE detection_uid IS NULL;
+ALTER TABLE detections MODIFY detection_uid CHAR(32) NOT NULL;
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'detections' AND INDEX_NAME = 'uq_detection_uid') = 0,
+              'ALTER TABLE detections ADD UNIQUE KEY uq_detection_uid (detection_uid)',
+              'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- counting_summary.summary_date / summary_hour (schema lama hanya punya updated_at)
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.COLUMNS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'counting_summary' AND COLUMN_NAME = 'summary_date') = 0,
+              'ALTER TABLE counting_summary ADD COLUMN summary_date DATE NULL AFTER polygon_area_id',
+              'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.COLUMNS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'counting_summary' AND COLUMN_NAME = 'summary_hour') = 0,
+              'ALTER TABLE counting_summary ADD COLUMN summary_hour TINYINT NULL AFTER summary_date',
+              'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+UPDATE counting_summary
+SET summary_date = DATE(updated_at), summary_hour = HOUR(updated_at)
+WHERE summary_date IS NULL OR summary_hour IS NULL;
+
+-- Tanpa unique key, update_summary lama menambah row baru setiap update:
+-- simpan hanya row terbaru per (area, jam) sebelum unique key dibuat
+DELETE older FROM counting_summary older
+JOIN counting_summary newer
+  ON newer.polygon_area_id <=> older.polygon_area_id
+ AND newer.summary_date = older.summary_date
+ AND newer.summary_hour = older.summary_hour
+ AND newer.id > older.id;
+
+ALTER TABLE counting_summary
+    MODIFY summary_date DATE NOT NULL,
+    MODIFY summary_hour TINYINT NOT NULL;
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'counting_summary' AND INDEX_NAME = 'uq_area_hour') = 0,
+              'ALTER TABLE counting_summary ADD UNIQUE KEY uq_area_hour (polygon_area_id, summary_date, summary_hour)',
+              'DO 0');
+PREPARE stmt FROM @ddl; EXECUTE stmt; DEALLOCATE PREPARE stmt;
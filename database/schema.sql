@@ -21,15 +21,58 @@ CREATE TABLE IF NOT EXISTS polygon_areas (
 CREATE TABLE IF NOT EXISTS counting_summary (
     id INT AUTO_INCREMENT PRIMARY KEY,
     polygon_area_id INT,
+    summary_date DATE NOT NULL,
+    summary_hour TINYINT NOT NULL,
     total_entered INT DEFAULT 0,
     total_exited INT DEFAULT 0,
     current_count INT DEFAULT 0,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (polygon_area_id) REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_area_hour (polygon_area_id, summary_date, summary_hour),
     INDEX idx_polygon (polygon_area_id),
     INDEX idx_updated (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Table: people_counting (ENTER/EXIT events dari pipeline)
+-- event_uid berasal dari WAL, sehingga replay tidak menghasilkan duplikat
+CREATE TABLE IF NOT EXISTS people_counting (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    event_uid CHAR(32) NOT NULL,
+    polygon_area_id INT,
+    tracking_id INT NOT NULL,
+    event_type VARCHAR(16) NOT NULL,
+    frame_number INT,
+    video_source VARCHAR(512),
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (polygon_area_id) REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_event_uid (event_uid),
+    INDEX idx_polygon_time (polygon_area_id, timestamp),
+    INDEX idx_timestamp (timestamp)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Table: detections (sample deteksi per track)
+CREATE TABLE IF NOT EXISTS detections (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    detection_uid CHAR(32) NOT NULL,
+    tracking_id INT NOT NULL,
+    polygon_area_id INT,
+    bbox_x1 INT,
+    bbox_y1 INT,
+    bbox_x2 INT,
+    bbox_y2 INT,
+    centroid_x INT,
+    centroid_y INT,
+    confidence FLOAT,
+    is_inside_polygon BOOLEAN,
+    frame_number INT,
+    video_source VARCHAR(512),
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (polygon_area_id) REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_detection_uid (detection_uid),
+    INDEX idx_track (tracking_id),
+    INDEX idx_timestamp (timestamp)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Table: detection_events
 CREATE TABLE IF NOT EXISTS detection_events (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -45,4 +88,54 @@ CREATE TABLE IF NOT EXISTS detection_events (
     INDEX idx_polygon (polygon_area_id),
     INDEX idx_track (track_id),
     INDEX idx_timestamp (timestamp)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
\ No newline at end of file
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+-- Table: track_trajectories (satu blob delta-encoded per track yang selesai)
+CREATE TABLE IF NOT EXISTS track_trajectories (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    trajectory_uid CHAR(32) NOT NULL,
+    track_id INT NOT NULL,
+    polygon_area_id INT,
+    start_frame INT,
+    end_frame INT,
+    num_points INT,
+    started_at TIMESTAMP NULL,
+    ended_at TIMESTAMP NULL,
+    video_source VARCHAR(512),
+    data MEDIUMBLOB NOT NULL,
+    FOREIGN KEY (polygon_area_id) REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_trajectory_uid (trajectory_uid),
+    INDEX idx_track (track_id),
+    INDEX idx_started (started_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+-- Table: visitor_sketches (HyperLogLog pengunjung unik per kamera, area, jam)
+CREATE TABLE IF NOT EXISTS visitor_sketches (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    camera_id VARCHAR(64) NOT NULL,
+    polygon_area_id INT NOT NULL,
+    summary_date DATE NOT NULL,
+    summary_hour TINYINT NOT NULL,
+    registers BLOB NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (polygon_area_id) REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_camera_area_hour (camera_id, polygon_area_id, summary_date, summary_hour),
+    INDEX idx_date (summary_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+-- Table: event_clips (klip MP4 di sekitar event / lonjakan occupancy, file di CLIP_DIR)
+CREATE TABLE IF NOT EXISTS event_clips (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    clip_uid CHAR(32) NOT NULL,
+    polygon_area_id INT,
+    camera_id VARCHAR(64),
+    trigger_type VARCHAR(16) NOT NULL,
+    event_uids JSON,
+    started_at TIMESTAMP NULL,
+    ended_at TIMESTAMP NULL,
+    num_frames INT,
+    file_path VARCHAR(512) NOT NULL,
+    file_size BIGINT,
+    video_source VARCHAR(512),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (polygon_area_id) REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_clip_uid (clip_uid),
+    INDEX idx_started (started_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
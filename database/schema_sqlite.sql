@@ -0,0 +1,105 @@
+-- People Counting System Database Schema
+-- SQLite (embedded, untuk edge deployment)
+
+CREATE TABLE IF NOT EXISTS polygon_areas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    coordinates TEXT NOT NULL,
+    is_active INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT (datetime('now', 'localtime')),
+    updated_at TEXT DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_polygon_active ON polygon_areas (is_active);
+CREATE INDEX IF NOT EXISTS idx_polygon_name ON polygon_areas (name);
+
+CREATE TABLE IF NOT EXISTS counting_summary (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    polygon_area_id INTEGER REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    summary_date TEXT NOT NULL,
+    summary_hour INTEGER NOT NULL,
+    total_entered INTEGER DEFAULT 0,
+    total_exited INTEGER DEFAULT 0,
+    current_count INTEGER DEFAULT 0,
+    updated_at TEXT DEFAULT (datetime('now', 'localtime')),
+    UNIQUE (polygon_area_id, summary_date, summary_hour)
+);
+CREATE INDEX IF NOT EXISTS idx_summary_updated ON counting_summary (updated_at);
+
+CREATE TABLE IF NOT EXISTS people_counting (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_uid TEXT NOT NULL UNIQUE,
+    polygon_area_id INTEGER REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    tracking_id INTEGER NOT NULL,
+    event_type TEXT NOT NULL,
+    frame_number INTEGER,
+    video_source TEXT,
+    timestamp TEXT DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_events_polygon_time ON people_counting (polygon_area_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_time ON people_counting (timestamp);
+
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    detection_uid TEXT NOT NULL UNIQUE,
+    tracking_id INTEGER NOT NULL,
+    polygon_area_id INTEGER REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    bbox_x1 INTEGER,
+    bbox_y1 INTEGER,
+    bbox_x2 INTEGER,
+    bbox_y2 INTEGER,
+    centroid_x INTEGER,
+    centroid_y INTEGER,
+    confidence REAL,
+    is_inside_polygon INTEGER,
+    frame_number INTEGER,
+    video_source TEXT,
+    timestamp TEXT DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_detections_track ON detections (tracking_id);
+CREATE INDEX IF NOT EXISTS idx_detections_time ON detections (timestamp);
+
+CREATE TABLE IF NOT EXISTS track_trajectories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    trajectory_uid TEXT NOT NULL UNIQUE,
+    track_id INTEGER NOT NULL,
+    polygon_area_id INTEGER REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    start_frame INTEGER,
+    end_frame INTEGER,
+    num_points INTEGER,
+    started_at TEXT,
+    ended_at TEXT,
+    video_source TEXT,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trajectories_track ON track_trajectories (track_id);
+CREATE INDEX IF NOT EXISTS idx_trajectories_started ON track_trajectories (started_at);
+
+CREATE TABLE IF NOT EXISTS visitor_sketches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    camera_id TEXT NOT NULL,
+    polygon_area_id INTEGER NOT NULL REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    summary_date TEXT NOT NULL,
+    summary_hour INTEGER NOT NULL,
+    registers BLOB NOT NULL,
+    updated_at TEXT DEFAULT (datetime('now', 'localtime')),
+    UNIQUE (camera_id, polygon_area_id, summary_date, summary_hour)
+);
+CREATE INDEX IF NOT EXISTS idx_visitor_date ON visitor_sketches (summary_date);
+
+CREATE TABLE IF NOT EXISTS event_clips (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    clip_uid TEXT NOT NULL UNIQUE,
+    polygon_area_id INTEGER REFERENCES polygon_areas(id) ON DELETE CASCADE,
+    camera_id TEXT,
+    trigger_type TEXT NOT NULL,
+    event_uids TEXT,
+    started_at TEXT,
+    ended_at TEXT,
+    num_frames INTEGER,
+    file_path TEXT NOT NULL,
+    file_size INTEGER,
+    video_source TEXT,
+    created_at TEXT DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_clips_started ON event_clips (started_at);
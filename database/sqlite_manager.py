@@ -0,0 +1,400 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+from database.base import StorageBackend
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_sqlite.sql')
+
+
+class SQLiteManager(StorageBackend):
+    """
+    Storage backend SQLite untuk edge deployment tanpa server MySQL.
+
+    Memakai WAL journaling dan synchronous=NORMAL, sehingga write dari
+    DurableWriter (batch dalam satu transaksi) cukup cepat di disk lokal.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Path file database SQLite (dibuat jika belum ada)
+        """
+        self.path = path
+        self.connection = None
+        self._lock = threading.RLock()
+        self.connect()
+
+    def connect(self):
+        """Buka database dan buat schema jika belum ada"""
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+            self.connection = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("PRAGMA foreign_keys=ON")
+
+            with open(SCHEMA_PATH) as f:
+                self.connection.executescript(f.read())
+            print(f"✅ SQLite database ready: {self.path}")
+        except Exception as e:
+            print(f"❌ SQLite database error: {e}")
+
+    def get_polygon_area(self, area_id=1):
+        try:
+            row = self._fetchone("SELECT * FROM polygon_areas WHERE id = ? AND is_active = 1", (area_id,))
+            if row:
+                coords = json.loads(row['coordinates'])
+                return {
+                    'id': row['id'],
+                    'name': row['name'],
+                    'points': [(p['x'], p['y']) for p in coords['points']]
+                }
+            return None
+
+        except Exception as e:
+            print(f"❌ Error fetching polygon: {e}")
+            return None
+
+    def list_polygons(self, active_only=False):
+        if active_only:
+            rows = self._fetchall("SELECT * FROM polygon_areas WHERE is_active = 1 ORDER BY created_at DESC, id DESC")
+        else:
+            rows = self._fetchall("SELECT * FROM polygon_areas ORDER BY created_at DESC, id DESC")
+        return [self.format_polygon_row(r) for r in rows]
+
+    def get_polygon(self, polygon_id):
+        row = self._fetchone("SELECT * FROM polygon_areas WHERE id = ?", (polygon_id,))
+        return self.format_polygon_row(row) if row else None
+
+    def get_polygon_versions(self):
+        rows = self._fetchall("SELECT id, updated_at, is_active FROM polygon_areas")
+        return {r['id']: (r['updated_at'], int(r['is_active'])) for r in rows}
+
+    def get_active_polygon(self):
+        row = self._fetchone("""
+            SELECT * FROM polygon_areas
+            WHERE is_active = 1
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1
+        """)
+        return self.format_polygon_row(row) if row else None
+
+    def create_polygon(self, name, description, coordinates, is_active=False):
+        with self._lock, self.connection:
+            cursor = self.connection.execute("""
+                INSERT INTO polygon_areas (name, description, coordinates, is_active)
+                VALUES (?, ?, ?, ?)
+            """, (name, description, json.dumps(coordinates), int(is_active)))
+            return cursor.lastrowid
+
+    def update_polygon(self, polygon_id, name=None, description=None, coordinates=None):
+        updates = []
+        values = []
+
+        if name:
+            updates.append("name = ?")
+            values.append(name)
+
+        if description is not None:
+            updates.append("description = ?")
+            values.append(description)
+
+        if coordinates is not None:
+            updates.append("coordinates = ?")
+            values.append(json.dumps(coordinates))
+
+        updates.append("updated_at = datetime('now', 'localtime')")
+        values.append(polygon_id)
+
+        return self._execute_write(
+            f"UPDATE polygon_areas SET {', '.join(updates)} WHERE id = ?", values) > 0
+
+    def delete_polygon(self, polygon_id, hard_delete=False):
+        if hard_delete:
+            sql = "DELETE FROM polygon_areas WHERE id = ?"
+        else:
+            sql = "UPDATE polygon_areas SET is_active = 0, updated_at = datetime('now', 'localtime') WHERE id = ?"
+        return self._execute_write(sql, (polygon_id,)) > 0
+
+    def activate_polygon(self, polygon_id):
+        with self._lock, self.connection:
+            if not self.connection.execute("SELECT id FROM polygon_areas WHERE id = ?", (polygon_id,)).fetchone():
+                return False
+
+            self.connection.execute("""
+                UPDATE polygon_areas SET is_active = 0, updated_at = datetime('now', 'localtime')
+                WHERE is_active = 1 AND id != ?
+            """, (polygon_id,))
+            self.connection.execute("""
+                UPDATE polygon_areas SET is_active = 1, updated_at = datetime('now', 'localtime')
+                WHERE id = ?
+            """, (polygon_id,))
+            return True
+
+    def toggle_polygon_active(self, polygon_id):
+        return self._execute_write("""
+            UPDATE polygon_areas
+            SET is_active = 1 - is_active, updated_at = datetime('now', 'localtime')
+            WHERE id = ?
+        """, (polygon_id,)) > 0
+
+    def save_detection(self, tracking_id, polygon_area_id, bbox, centroid,
+                       confidence, is_inside, frame_number, video_source):
+        try:
+            self._execute_write("""
+                INSERT INTO detections
+                (detection_uid, tracking_id, polygon_area_id, bbox_x1, bbox_y1, bbox_x2, bbox_y2,
+                 centroid_x, centroid_y, confidence, is_inside_polygon,
+                 frame_number, video_source, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                uuid.uuid4().hex, tracking_id, polygon_area_id,
+                bbox[0], bbox[1], bbox[2], bbox[3],
+                centroid[0], centroid[1],
+                confidence, int(is_inside),
+                frame_number, video_source, self._now()
+            ))
+
+        except Exception as e:
+            print(f"❌ Error saving detection: {e}")
+
+    def save_counting_event(self, polygon_area_id, tracking_id, event_type,
+                            frame_number, video_source):
+        """
+        Simpan counting event (ENTER/EXIT)
+        """
+        try:
+            self._execute_write("""
+                INSERT INTO people_counting
+                (event_uid, polygon_area_id, tracking_id, event_type, frame_number, video_source, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                uuid.uuid4().hex, polygon_area_id, tracking_id, event_type,
+                frame_number, video_source, self._now()
+            ))
+
+        except Exception as e:
+            print(f"❌ Error saving counting event: {e}")
+
+    def update_summary(self, polygon_area_id, total_entered, total_exited, current_count):
+        try:
+            now = datetime.now()
+            with self._lock, self.connection:
+                self._upsert_summaries_rows(self.connection, [(
+                    polygon_area_id, now.strftime("%Y-%m-%d"), now.hour,
+                    int(total_entered), int(total_exited), int(current_count),
+                    now.strftime(self.TIME_FORMAT)
+                )])
+            return True
+
+        except Exception as e:
+            print(f"❌ Error updating summary: {e}")
+            return False
+
+    def update_counting_summary(self, polygon_area_id, total_entered, total_exited, current_count):
+        return self.update_summary(polygon_area_id, total_entered, total_exited, current_count)
+
+    def apply_wal_batch(self, records):
+        """
+        Tulis batch record WAL dalam satu transaksi (idempotent via uid / upsert)
+        """
+        rows = self.split_wal_records(records)
+
+        with self._lock, self.connection:
+            if rows['event']:
+                self.connection.executemany("""
+                    INSERT OR IGNORE INTO people_counting
+                    (event_uid, polygon_area_id, tracking_id, event_type,
+                     frame_number, video_source, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, rows['event'])
+
+            if rows['detection']:
+                self.connection.executemany("""
+                    INSERT OR IGNORE INTO detections
+                    (detection_uid, tracking_id, polygon_area_id,
+                     bbox_x1, bbox_y1, bbox_x2, bbox_y2,
+                     centroid_x, centroid_y, confidence, is_inside_polygon,
+                     frame_number, video_source, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows['detection'])
+
+            if rows['summary']:
+                self._upsert_summaries_rows(self.connection, rows['summary'])
+
+            if rows['trajectory']:
+                self.connection.executemany("""
+                    INSERT OR IGNORE INTO track_trajectories
+                    (trajectory_uid, track_id, polygon_area_id, start_frame, end_frame,
+                     num_points, started_at, ended_at, video_source, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows['trajectory'])
+
+            if rows['visitor_sketch']:
+                def load_existing(camera_id, area_id, date, hour):
+                    row = self.connection.execute("""
+                        SELECT registers FROM visitor_sketches
+                        WHERE camera_id = ? AND polygon_area_id = ? AND summary_date = ? AND summary_hour = ?
+                    """, (camera_id, area_id, date, hour)).fetchone()
+                    return row[0] if row else None
+
+                self.connection.executemany("""
+                    INSERT INTO visitor_sketches
+                    (camera_id, polygon_area_id, summary_date, summary_hour, registers, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (camera_id, polygon_area_id, summary_date, summary_hour) DO UPDATE SET
+                        registers = excluded.registers,
+                        updated_at = excluded.updated_at
+                """, self.merge_visitor_sketch_rows(rows['visitor_sketch'], load_existing))
+
+            if rows['clip']:
+                self.connection.executemany("""
+                    INSERT OR IGNORE INTO event_clips
+                    (clip_uid, polygon_area_id, camera_id, trigger_type, event_uids,
+                     started_at, ended_at, num_frames, file_path, file_size, video_source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows['clip'])
+
+    def is_transient_error(self, error):
+        # OperationalError: database locked / busy, disk I/O; IntegrityError dll. = record bermasalah
+        return isinstance(error, sqlite3.OperationalError) or super().is_transient_error(error)
+
+    def save_trajectory(self, polygon_area_id, trajectory, video_source):
+        try:
+            self._execute_write("""
+                INSERT INTO track_trajectories
+                (trajectory_uid, track_id, polygon_area_id, start_frame, end_frame,
+                 num_points, started_at, ended_at, video_source, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                uuid.uuid4().hex, trajectory['track_id'], polygon_area_id,
+                trajectory['start_frame'], trajectory['end_frame'], trajectory['num_points'],
+                trajectory['started_at'], trajectory['ended_at'], video_source, trajectory['data']
+            ))
+
+        except Exception as e:
+            print(f"❌ Error saving trajectory: {e}")
+
+    def get_trajectory(self, trajectory_id):
+        row = self._fetchone("SELECT * FROM track_trajectories WHERE id = ?", (trajectory_id,))
+        return dict(row) if row else None
+
+    def get_summary_history(self, since):
+        rows = self._fetchall(
+            "SELECT updated_at, current_count FROM counting_summary WHERE updated_at >= ? ORDER BY updated_at",
+            (since.strftime(self.TIME_FORMAT),)
+        )
+        return [dict(r) for r in rows]
+
+    def get_visitor_sketches(self, start, end, camera_id=None, area_id=None):
+        sql = """
+            SELECT camera_id, polygon_area_id, summary_date, summary_hour, registers
+            FROM visitor_sketches
+            WHERE summary_date BETWEEN ? AND ?
+        """
+        values = [start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")]
+        if camera_id is not None:
+            sql += " AND camera_id = ?"
+            values.append(camera_id)
+        if area_id is not None:
+            sql += " AND polygon_area_id = ?"
+            values.append(area_id)
+
+        result = []
+        for row in self._fetchall(sql, values):
+            hour_start = datetime.strptime(row['summary_date'], "%Y-%m-%d").replace(hour=row['summary_hour'])
+            if start <= hour_start < end:
+                result.append(dict(row))
+        return result
+
+    def get_event(self, event_id):
+        row = self._fetchone("SELECT * FROM people_counting WHERE id = ?", (event_id,))
+        return dict(row) if row else None
+
+    def list_event_clips(self, start, end, area_id=None):
+        sql = "SELECT * FROM event_clips WHERE started_at >= ? AND started_at < ?"
+        values = [start.strftime(self.TIME_FORMAT), end.strftime(self.TIME_FORMAT)]
+        if area_id is not None:
+            sql += " AND polygon_area_id = ?"
+            values.append(area_id)
+        sql += " ORDER BY started_at DESC"
+        return [self.format_clip_row(r) for r in self._fetchall(sql, values)]
+
+    def get_event_clip(self, clip_id):
+        row = self._fetchone("SELECT * FROM event_clips WHERE id = ?", (clip_id,))
+        return self.format_clip_row(row) if row else None
+
+    def get_archive_min_timestamp(self, table):
+        table_name, _ = self.ARCHIVE_TABLES[table]
+        row = self._fetchone(f"SELECT MIN(timestamp) FROM {table_name}")
+        if row is None or row[0] is None:
+            return None
+        return datetime.strptime(row[0], self.TIME_FORMAT)
+
+    def iter_archive_rows(self, table, start, end, batch_size=50000):
+        table_name, columns = self.ARCHIVE_TABLES[table]
+        sql = (f"SELECT {', '.join(columns)} FROM {table_name} "
+               f"WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp")
+
+        # Cursor terpisah supaya iterasi panjang tidak memegang lock terus-menerus
+        with self._lock:
+            cursor = self.connection.cursor()
+            cursor.execute(sql, (start.strftime(self.TIME_FORMAT), end.strftime(self.TIME_FORMAT)))
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dict(r) for r in rows]
+        finally:
+            cursor.close()
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            print("✅ Database connection closed")
+
+    @staticmethod
+    def _upsert_summaries_rows(cursor, rows):
+        """
+        Upsert counting_summary tanpa commit (dipanggil di dalam transaksi caller)
+        """
+        # UNIQUE tidak berlaku untuk polygon_area_id NULL (polygon default): hapus row jam yang sama dulu
+        cursor.executemany("""
+            DELETE FROM counting_summary
+            WHERE polygon_area_id IS NULL AND summary_date = ? AND summary_hour = ?
+        """, [(date, hour) for area_id, date, hour, *_ in rows if area_id is None])
+        cursor.executemany("""
+            INSERT INTO counting_summary
+            (polygon_area_id, summary_date, summary_hour, total_entered,
+             total_exited, current_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (polygon_area_id, summary_date, summary_hour) DO UPDATE SET
+                total_entered = excluded.total_entered,
+                total_exited = excluded.total_exited,
+                current_count = excluded.current_count,
+                updated_at = excluded.updated_at
+        """, rows)
+
+    def _execute_write(self, sql, values):
+        with self._lock, self.connection:
+            return self.connection.execute(sql, values).rowcount
+
+    def _fetchone(self, sql, values=()):
+        with self._lock:
+            return self.connection.execute(sql, values).fetchone()
+
+    def _fetchall(self, sql, values=()):
+        with self._lock:
+            return self.connection.execute(sql, values).fetchall()
+
+    def _now(self):
+        return datetime.now().strftime(self.TIME_FORMAT)
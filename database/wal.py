@@ -0,0 +1,228 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+
+def oldest_pending_timestamp(directory):
+    """
+    Waktu (ts) record paling lama yang belum di-replay, None jika WAL kosong.
+    Read-only, untuk proses lain yang perlu tahu backlog DurableWriter (mis. archive exporter)
+    """
+    try:
+        with open(os.path.join(directory, 'checkpoint.json')) as f:
+            data = json.load(f)
+        read_segment, read_offset = data['segment'], data['offset']
+    except (OSError, ValueError, KeyError):
+        read_segment, read_offset = 0, 0
+
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return None
+    segments = sorted(int(f[4:12]) for f in names if f.startswith('wal_') and f.endswith('.log'))
+
+    for segment in segments:
+        if segment < read_segment:
+            continue
+        with open(os.path.join(directory, f"wal_{segment:08d}.log"), 'rb') as f:
+            if segment == read_segment:
+                f.seek(read_offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    return json.loads(line)['ts']
+                except (ValueError, KeyError):
+                    continue
+    return None
+
+
+class WriteAheadLog:
+    """
+    Write-ahead log lokal (append-only JSONL) untuk record yang akan ditulis ke database.
+
+    Record ditulis ke segment file `wal_<n>.log` dan di-fsync per batch
+    (jumlah record atau interval waktu). Posisi replay disimpan di
+    checkpoint.json, segment yang sudah selesai di-replay dihapus.
+    """
+
+    def __init__(self, directory, fsync_interval=0.5, fsync_batch=50,
+                 segment_max_bytes=16 * 1024 * 1024):
+        """
+        Args:
+            directory: Folder WAL
+            fsync_interval: Maksimum detik antara dua fsync
+            fsync_batch: Jumlah record sebelum fsync dipaksa
+            segment_max_bytes: Ukuran segment sebelum rotate
+        """
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.segment_max_bytes = segment_max_bytes
+
+        os.makedirs(directory, exist_ok=True)
+        self._checkpoint_path = os.path.join(directory, 'checkpoint.json')
+        self.quarantine_path = os.path.join(directory, 'quarantine.log')
+        self._lock = threading.Lock()
+
+        # Posisi replay: (nomor segment, byte offset)
+        self.read_pos = self._load_checkpoint()
+
+        segments = self._segments()
+        self._write_segment = max(segments[-1] if segments else 1, self.read_pos[0])
+        self._file = open(self._segment_path(self._write_segment), 'ab')
+
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, kind, payload):
+        """
+        Tulis record ke WAL
+
+        Args:
+            kind: Jenis record ('event', 'detection', 'summary', ...)
+            payload: Dict data record
+
+        Returns:
+            uid: ID unik record (dipakai untuk replay idempotent)
+        """
+        record = {
+            'uid': uuid.uuid4().hex,
+            'kind': kind,
+            'ts': time.time(),
+            'payload': payload
+        }
+        line = (json.dumps(record, default=str) + '\n').encode('utf-8')
+
+        with self._lock:
+            if self._file.tell() >= self.segment_max_bytes:
+                self._rotate()
+
+            self._file.write(line)
+            self._unsynced += 1
+
+            if self._unsynced >= self.fsync_batch:
+                self._sync()
+            else:
+                self._sync_if_due()
+
+        return record['uid']
+
+    def sync(self, force=False):
+        """
+        fsync record yang belum tersimpan permanen (jika sudah waktunya, atau force)
+        """
+        with self._lock:
+            if force:
+                self._sync()
+            else:
+                self._sync_if_due()
+
+    def read_batch(self, max_records):
+        """
+        Baca record setelah checkpoint
+
+        Returns:
+            (records, position): position diberikan ke commit() setelah batch berhasil ditulis
+        """
+        with self._lock:
+            self._file.flush()
+            write_segment = self._write_segment
+
+        segment, offset = self.read_pos
+        records = []
+
+        while len(records) < max_records:
+            path = self._segment_path(segment)
+            if not os.path.exists(path):
+                if segment >= write_segment:
+                    break
+                segment, offset = segment + 1, 0
+                continue
+
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                while len(records) < max_records:
+                    line = f.readline()
+                    if not line.endswith(b'\n'):
+                        break  # EOF atau record yang belum selesai ditulis
+                    offset += len(line)
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        print(f"⚠️ Skipping corrupt WAL record in {path} at offset {offset}")
+
+            if len(records) >= max_records or segment >= write_segment:
+                break
+            segment, offset = segment + 1, 0
+
+        return records, (segment, offset)
+
+    def commit(self, position):
+        """
+        Simpan checkpoint replay dan hapus segment yang sudah selesai
+        """
+        self.read_pos = tuple(position)
+
+        tmp_path = self._checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'segment': self.read_pos[0], 'offset': self.read_pos[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._checkpoint_path)
+
+        for segment in self._segments():
+            if segment < self.read_pos[0]:
+                os.remove(self._segment_path(segment))
+
+    def quarantine(self, record, error):
+        """
+        Pindahkan record yang tidak bisa ditulis ke database ke quarantine.log
+        (JSONL, diperiksa / di-replay manual), supaya tidak menahan record setelahnya
+        """
+        line = json.dumps({'record': record, 'error': str(error), 'quarantined_at': time.time()},
+                          default=str) + '\n'
+        with open(self.quarantine_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        with self._lock:
+            self._sync()
+            self._file.close()
+
+    def _sync(self):
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _sync_if_due(self):
+        if self._unsynced and time.monotonic() - self._last_sync >= self.fsync_interval:
+            self._sync()
+
+    def _rotate(self):
+        self._sync()
+        self._file.close()
+        self._write_segment += 1
+        self._file = open(self._segment_path(self._write_segment), 'ab')
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"wal_{segment:08d}.log")
+
+    def _segments(self):
+        return sorted(int(f[4:12]) for f in os.listdir(self.directory)
+                      if f.startswith('wal_') and f.endswith('.log'))
+
+    def _load_checkpoint(self):
+        try:
+            with open(self._checkpoint_path) as f:
+                data = json.load(f)
+            return data['segment'], data['offset']
+        except (OSError, ValueError, KeyError):
+            segments = self._segments()
+            return (segments[0] if segments else 1), 0
@@ -3,6 +3,8 @@ import time
 import threading
 from queue import Queue
 
+from core.backoff import Backoff
+
 
 class LiveStreamReader:
     """
@@ -14,6 +16,7 @@ class LiveStreamReader:
         self.queue = Queue(maxsize=queue_size)
         self.stopped = False
         self.cap = None
+        self.backoff = Backoff(0.5, 30)
 
     def start(self):
         """Start thread untuk membaca frame"""
@@ -38,13 +41,15 @@ class LiveStreamReader:
             ret, frame = self.cap.read()
 
             if not ret:
-                # Reconnect jika gagal
-                print("⚠️ Reconnecting...")
+                # Reconnect jika gagal (exponential backoff + jitter)
+                delay = self.backoff.next_delay()
+                print(f"⚠️ Reconnecting in {delay:.1f}s...")
                 self.cap.release()
-                time.sleep(2)
+                time.sleep(delay)
                 self.cap = cv2.VideoCapture(self.url)
                 self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
                 continue
+            self.backoff.reset()
 
             # Clear queue dan masukkan frame terbaru (untuk live streaming)
             if not self.queue.empty():
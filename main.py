@@ -1,14 +1,27 @@
 import cv2
 import torch
 from ultralytics import YOLO
-import numpy as np
 from datetime import datetime
 import time
 
 from config.config import Config
-from core.polygon import PolygonChecker
-from core.counter import PeopleCounter
-from database.db_manager import DatabaseManager
+from core.polygon import PolygonChecker, scale_points
+from core.capture import open_capture
+from core.backoff import Backoff
+from core.polygon_registry import PolygonRegistry
+from core.counter import create_counter
+from core.event_buffer import EventBuffer
+from core.trajectory import TrajectoryRecorder
+from core.heatmap import OccupancyHeatmap
+from core.visitors import UniqueVisitorCounter
+from core.clip_recorder import create_clip_recorder
+from core.snapshots import create_snapshot_store
+from core.inference_profile import load_profile, apply_profile, prepare_model
+from core.adaptive_resolution import create_resolution_controller
+from core.sliced_inference import create_sliced_tracker, track_frame
+from core.track_propagation import create_detection_scheduler
+from database.factory import create_database_manager
+from database.durable_writer import DurableWriter
 
 
 def main():
@@ -23,27 +36,32 @@ def main():
     if device == 'cuda':
         print(f"🎮 GPU: {torch.cuda.get_device_name(0)}")
 
+    # Profile hasil tools/autotune.py (thread torch harus di-set sebelum inference pertama)
+    inference_profile = load_profile(config)
+    apply_profile(inference_profile)
+    resolution = create_resolution_controller(config, inference_profile['imgsz'])
+    scheduler = create_detection_scheduler(config)
+
     print(f"\n📦 Loading YOLOv11 Medium...")
     model = YOLO(config.YOLO_MODEL)
     model.to(device)
+    prepare_model(model, inference_profile)
     print(f"✅ Model loaded on {device}")
+    sliced = create_sliced_tracker(config)
+    if sliced is not None:
+        print(f"🔪 Sliced inference: {sliced.rows}x{sliced.cols} tiles, overlap {sliced.overlap}")
     print(f"\n💾 Connecting to database...")
-    db = DatabaseManager()
+    db = create_database_manager(config)
+    writer = DurableWriter(db, config)
 
     print(f"\n📐 Loading polygon configuration from database...")
 
     try:
-        cursor = db.connection.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id, name, coordinates, description, is_active
-            FROM polygon_areas
-            WHERE is_active = TRUE
-            ORDER BY created_at DESC
-        """)
-        available_polygons = cursor.fetchall()
-        cursor.close()
+        polygon_registry = PolygonRegistry(db, config.POLYGON_REGISTRY_POLL_INTERVAL)
+        available_polygons = polygon_registry.list(active_only=True)
     except Exception as e:
         print(f"❌ Error querying polygons: {e}")
+        polygon_registry = None
         available_polygons = []
 
     polygon_config = None
@@ -60,9 +78,7 @@ def main():
             print("\n📋 Available Polygons:")
             print("-" * 70)
             for i, poly in enumerate(available_polygons, 1):
-                import json
-                coords = json.loads(poly['coordinates'])
-                print(f"  [{i}] ID: {poly['id']} | Name: {poly['name']} | Points: {len(coords['points'])}")
+                print(f"  [{i}] ID: {poly['id']} | Name: {poly['name']} | Points: {len(poly['coordinates']['points'])}")
                 print(f"      Description: {poly['description']}")
             print("-" * 70)
 
@@ -86,9 +102,7 @@ def main():
                     print("⚠️ Invalid input. Enter a number or 'q'")
 
         if polygon_config:
-            import json
-            coords = json.loads(polygon_config['coordinates'])
-            polygon_points = [(p['x'], p['y']) for p in coords['points']]
+            polygon_points = db.polygon_points(polygon_config)
             polygon_name = polygon_config['name']
             polygon_id = polygon_config['id']
 
@@ -132,21 +146,15 @@ def main():
                     print("\n🔄 Reloading polygons from database...")
 
                     # Reload polygons after editor closes
-                    cursor = db.connection.cursor(dictionary=True)
-                    cursor.execute("""
-                        SELECT id, name, coordinates, description
-                        FROM polygon_areas
-                        WHERE is_active = TRUE
-                        ORDER BY created_at DESC
-                        LIMIT 1
-                    """)
-                    polygon_config = cursor.fetchone()
-                    cursor.close()
+                    if polygon_registry is not None:
+                        polygon_registry.refresh()
+                        entry = polygon_registry.active()
+                        polygon_config = entry['row'] if entry else None
+                    else:
+                        polygon_config = db.get_active_polygon()
 
                     if polygon_config:
-                        import json
-                        coords = json.loads(polygon_config['coordinates'])
-                        polygon_points = [(p['x'], p['y']) for p in coords['points']]
+                        polygon_points = db.polygon_points(polygon_config)
                         polygon_name = polygon_config['name']
                         polygon_id = polygon_config['id']
                         print(f"✅ Polygon loaded: {polygon_name}")
@@ -192,79 +200,137 @@ def main():
     print(f"   Total Points: {len(polygon_points)}")
     print("=" * 70)
 
-    polygon_checker = PolygonChecker(polygon_points)
-
-    counter = PeopleCounter(polygon_checker)
+    entry = polygon_registry.get(polygon_id) if polygon_registry is not None and polygon_id else None
+    polygon_checker = entry['checker'] if entry and entry['checker'] is not None else PolygonChecker(polygon_points)
+
+    counter = create_counter(config, polygon_checker, EventBuffer(config.EVENT_BUFFER_CAPACITY,
+                                                                  config.EVENT_BUFFER_OVERFLOW,
+                                                                  config.EVENT_SPILL_DIR), polygon_id)
+    print(f"✅ Counting mode: {config.COUNTING_MODE}")
+    trajectories = TrajectoryRecorder(config.TRAJECTORY_MAX_POINTS) if config.TRAJECTORY_ENABLED else None
+    heatmap = OccupancyHeatmap(config.HEATMAP_SCALE, config.HEATMAP_HALF_LIFE,
+                               config.HEATMAP_DIR, config.HEATMAP_SNAPSHOT_INTERVAL) if config.HEATMAP_ENABLED else None
+    visitor_counter = UniqueVisitorCounter(config.CAMERA_ID, config.HLL_PRECISION, config.VISITOR_FLUSH_INTERVAL)
+    snapshots = create_snapshot_store(config)
+    clips = create_clip_recorder(config, lambda clip: writer.save_event_clip(clip, config.CAMERA_ID,
+                                                                             config.VIDEO_SOURCE))
+
+    detached = False  # Area counter dihapus, menunggu polygon aktif baru
+
+    def on_polygon_change(changed_id, changed_entry):
+        nonlocal detached
+        if changed_id == counter.area_id:
+            if changed_entry is None:
+                # Hard delete: berhenti menulis sampai polygon aktif baru di-load
+                counter.detach_area()
+                detached = True
+                print(f"⚠️ Polygon {changed_id} deleted, counting is no longer saved")
+            elif changed_entry['checker'] is not None:
+                # Polygon yang sedang dihitung diedit (mis. lewat API / polygon_editor): swap geometry
+                version = counter.swap_polygon(changed_entry['checker'], changed_id)
+                print(f"🔄 Polygon {changed_id} changed, geometry swapped (v{version})")
+        elif (detached and changed_entry and changed_entry['row']['is_active']
+              and changed_entry['checker'] is not None):
+            version = counter.swap_polygon(changed_entry['checker'], changed_id)
+            detached = False
+            print(f"✅ Polygon {changed_id} activated, counting resumed (v{version})")
+
+    if polygon_registry is not None:
+        polygon_registry.add_listener(on_polygon_change)
+        polygon_registry.start_polling()
+
+    def save_trajectory(trajectory):
+        if trajectory:
+            writer.save_trajectory(polygon_id, trajectory, config.VIDEO_SOURCE)
 
 
     print(f"\n🎥 Opening video stream...")
     print(f"📡 Source: {config.VIDEO_SOURCE[:60]}...")
 
-    cap = cv2.VideoCapture(config.VIDEO_SOURCE)
-    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    cap = open_capture(config)
 
     if not cap.isOpened():
         print("❌ Failed to open video stream!")
         return
 
-    print("✅ Video stream opened")
+    print(f"✅ Video stream opened ({config.CAPTURE_BACKEND}, {cap.source_size[0]}x{cap.source_size[1]} -> "
+          f"{cap.output_size[0]}x{cap.output_size[1]})")
+
+    # Frame di-scale capture: polygon (koordinat source) ikut di-scale ke ukuran output
+    if cap.scale != (1.0, 1.0):
+        if polygon_registry is not None:
+            polygon_registry.set_frame_scale(cap.scale)
+        if counter.area_id is None or polygon_registry is None:
+            counter.swap_polygon(PolygonChecker(scale_points(polygon_points, cap.scale)), counter.area_id)
     print("\n" + "=" * 70)
     print("🚀 STARTING DETECTION & TRACKING...")
     print("Press 'q' to quit | 's' to save screenshot")
     print("=" * 70 + "\n")
 
     frame_count = 0
+    reconnect_backoff = Backoff(config.RECONNECT_BACKOFF_BASE, config.RECONNECT_BACKOFF_MAX)
     fps_start_time = time.time()
     fps = 0
+    event_cursor = counter.events.next_seq
 
     try:
         while True:
             ret, frame = cap.read()
 
             if not ret:
-                print("⚠️ Stream interrupted, reconnecting...")
+                delay = reconnect_backoff.next_delay()
+                print(f"⚠️ Stream interrupted, reconnecting in {delay:.1f}s...")
                 cap.release()
-                time.sleep(2)
-                cap = cv2.VideoCapture(config.VIDEO_SOURCE)
-                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                time.sleep(delay)
+                cap = open_capture(config)
                 continue
+            reconnect_backoff.reset()
 
             frame_count += 1
             if frame_count % config.FRAME_SKIP != 0:
                 continue
-            results = model.track(
-                frame,
-                persist=True,
-                tracker=config.TRACKER_TYPE + '.yaml',
-                classes=config.DETECT_CLASSES,
-                conf=config.CONFIDENCE_THRESHOLD,  # Now 0.25
-                iou=config.IOU_THRESHOLD,  # Now 0.3
-                imgsz=640,  # High resolution processing
-                max_det=30,  # Allow more detections
-                verbose=False,
-                agnostic_nms=True  # ← TAMBAHKAN: Better NMS for crowded scenes
-            )
-
-            if results[0].boxes is not None and results[0].boxes.id is not None:
-                boxes = results[0].boxes.xyxy.cpu().numpy()
-                track_ids = results[0].boxes.id.cpu().numpy().astype(int)
-                confidences = results[0].boxes.conf.cpu().numpy()
 
-                active_track_ids = []
+            # Geometry / area bisa di-swap oleh polygon registry di thread lain
+            polygon_checker = counter.polygon_checker
+            polygon_id = counter.area_id
+            if scheduler.should_detect():
+                detected, tracks = track_frame(model, frame, config, resolution.imgsz, resolution.max_det, sliced,
+                                               polygon_checker.polygon if config.SLICE_ROI_ONLY else None)
 
-                for box, track_id, conf in zip(boxes, track_ids, confidences):
-                    x1, y1, x2, y2 = box
+                # imgsz / max_det frame berikutnya dipilih dari hasil deteksi frame ini
+                resolution.observe(detected, sliced.tile_shape if sliced is not None else frame.shape)
+                scheduler.observe(frame_count, tracks)
+            else:
+                # Frame tanpa detector: posisi track dari prediksi Kalman
+                tracks = scheduler.propagate(frame_count)
 
-                    centroid_x = int((x1 + x2) / 2)
-                    centroid_y = int((y1 + y2) / 2)
-                    centroid = (centroid_x, centroid_y)
+            snapshot_crops = {}
+            if tracks is not None:
+                boxes, track_ids, confidences = tracks
 
-                    is_inside = polygon_checker.is_inside(centroid)
+                active_track_ids = []
+                inside_track_ids = []
+
+                centroids = [(int((x1 + x2) / 2), int((y1 + y2) / 2)) for x1, y1, x2, y2 in boxes]
+                frame_events = counter.update_batch(track_ids, centroids, frame_count)
+                # Crop bbox track yang menghasilkan event, sebelum frame dianotasi
+                if snapshots is not None and frame_events:
+                    snapshot_crops = {track_id: snapshots.crop(frame, box)
+                                      for box, track_id in zip(boxes, track_ids) if track_id in frame_events}
+                if heatmap is not None:
+                    heatmap.accumulate(centroids, frame.shape)
+
+                for box, track_id, conf, centroid in zip(boxes, track_ids, confidences, centroids):
+                    x1, y1, x2, y2 = box
 
-                    event = counter.update(track_id, centroid, frame_count)
+                    # Status dari counter (hysteresis / Kalman), sama dengan hitungan ENTER/EXIT
+                    is_inside = counter.is_track_inside(track_id)
 
-                    if frame_count % 30 == 0:
-                        db.save_detection(
+                    if trajectories is not None:
+                        save_trajectory(trajectories.record(
+                            track_id, frame_count, centroid, (x1, y1, x2, y2)))
+                    elif frame_count % 30 == 0:
+                        writer.save_detection(
                             tracking_id=int(track_id),
                             polygon_area_id=polygon_id,
                             bbox=(int(x1), int(y1), int(x2), int(y2)),
@@ -275,16 +341,9 @@ def main():
                             video_source=config.VIDEO_SOURCE
                         )
 
-                    if event:
-                        db.save_counting_event(
-                            polygon_area_id=polygon_id,
-                            tracking_id=int(track_id),
-                            event_type=event,
-                            frame_number=frame_count,
-                            video_source=config.VIDEO_SOURCE
-                        )
-
                     active_track_ids.append(track_id)
+                    if is_inside:
+                        inside_track_ids.append(track_id)
 
                     color = (0, 255, 0) if is_inside else (0, 0, 255)
                     cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
@@ -295,19 +354,47 @@ def main():
 
                     cv2.circle(frame, centroid, 5, color, -1)
 
-                counter.cleanup_old_tracks(active_track_ids)
+                retired_ids = counter.cleanup_old_tracks(active_track_ids)
+                visitor_counter.observe(inside_track_ids, polygon_id)
+                if trajectories is not None:
+                    for retired_id in retired_ids:
+                        save_trajectory(trajectories.finish(retired_id))
 
             frame = polygon_checker.draw_polygon(frame, color=(255, 0, 255), thickness=3)
+            if config.COUNTING_MODE == 'tripwire':
+                frame = counter.draw_lines(frame)
 
             stats = counter.get_stats()
 
-            if frame_count % 100 == 0:
-                db.update_summary(
+            # Event baru dari counter (termasuk waktu crossing hasil interpolasi tripwire)
+            new_events, event_cursor = counter.events_since(event_cursor)
+            for ev in new_events:
+                event_uid = None
+                if polygon_id:
+                    event_uid = writer.save_counting_event(
+                        polygon_area_id=polygon_id,
+                        tracking_id=int(ev['track_id']),
+                        event_type=ev['event_type'],
+                        frame_number=ev['frame_number'],
+                        video_source=config.VIDEO_SOURCE,
+                        timestamp=ev['timestamp']
+                    )
+                    crop = snapshot_crops.get(ev['track_id'])
+                    if crop is not None:
+                        snapshots.save(event_uid, crop)
+                if clips is not None and ev['event_type'] in config.CLIP_TRIGGER_EVENTS:
+                    clips.trigger(ev['event_type'], polygon_id, event_uid)
+            if clips is not None:
+                clips.observe_occupancy(stats['current_inside'], polygon_id)
+
+            if polygon_id and frame_count % 100 == 0:
+                writer.update_summary(
                     polygon_area_id=polygon_id,
                     total_entered=stats['total_entered'],
                     total_exited=stats['total_exited'],
                     current_count=stats['current_inside']
                 )
+            visitor_counter.maybe_flush(writer)
 
             fps_end_time = time.time()
             time_diff = fps_end_time - fps_start_time
@@ -317,14 +404,14 @@ def main():
 
             info_height = 180
             overlay = frame.copy()
-            cv2.rectangle(overlay, (10, 10), (400, info_height), (0, 0, 0), -1)
+            cv2.rectangle(overlay, (10, 10), (480, info_height), (0, 0, 0), -1)
             cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
 
             y_offset = 35
             cv2.putText(frame, f"FPS: {fps:.1f}", (20, y_offset),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
             y_offset += 30
-            cv2.putText(frame, f"Frame: {frame_count}", (20, y_offset),
+            cv2.putText(frame, f"Frame: {frame_count}  imgsz: {resolution.imgsz}  K: {scheduler.interval}", (20, y_offset),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
             y_offset += 30
             cv2.putText(frame, f"Entered: {stats['total_entered']}", (20, y_offset),
@@ -336,7 +423,13 @@ def main():
             cv2.putText(frame, f"Inside: {stats['current_inside']}", (20, y_offset),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
 
-            display_frame = cv2.resize(frame, (config.DISPLAY_WIDTH, config.DISPLAY_HEIGHT))
+            # Frame beranotasi masuk pre-roll klip (encode JPEG, mux MP4 di background)
+            if clips is not None:
+                clips.push(frame)
+
+            display_frame = frame
+            if (frame.shape[1], frame.shape[0]) != (config.DISPLAY_WIDTH, config.DISPLAY_HEIGHT):
+                display_frame = cv2.resize(frame, (config.DISPLAY_WIDTH, config.DISPLAY_HEIGHT))
 
             cv2.imshow('People Counting - YOLOv11 + BoT-SORT', display_frame)
 
@@ -355,6 +448,19 @@ def main():
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        if trajectories is not None:
+            for trajectory in trajectories.finish_all():
+                save_trajectory(trajectory)
+        if polygon_registry is not None:
+            polygon_registry.stop()
+        if heatmap is not None:
+            heatmap.snapshot()
+        visitor_counter.maybe_flush(writer, force=True)
+        if clips is not None:
+            clips.close()
+        if snapshots is not None:
+            snapshots.close()
+        writer.close()
         db.close()
 
         print("\n" + "=" * 70)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul repo di-import dari root (core/, database/, config/), sama seperti main.py / api_app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,36 @@
+from core.counter import PeopleCounter
+from core.hysteresis import CountingStateMachine
+from core.polygon import PolygonChecker
+
+SQUARE = [[0, 0], [100, 0], [100, 100], [0, 100]]
+
+
+def make_counter():
+    return PeopleCounter(PolygonChecker(SQUARE), state_machine=CountingStateMachine(10, 10, 2))
+
+
+def test_jitter_inside_band_does_not_count():
+    counter = make_counter()
+    counter.update(1, (120, 50), 0)
+
+    # Bolak-balik di sekitar edge (x = 100) tanpa keluar dari band
+    for frame, x in enumerate([95, 105, 95, 105, 95], start=1):
+        assert counter.update(1, (x, 50), frame) is None
+
+    assert counter.get_stats()['total_entered'] == 0
+    assert not counter.is_track_inside(1)
+
+
+def test_enter_and_exit_after_min_frames_past_band():
+    counter = make_counter()
+    counter.update(1, (120, 50), 0)
+
+    assert counter.update(1, (50, 50), 1) is None  # Baru satu observasi di dalam band
+    assert counter.update(1, (50, 50), 2) == 'ENTER'
+    assert counter.is_track_inside(1)
+
+    assert counter.update(1, (150, 50), 3) is None
+    assert counter.update(1, (150, 50), 4) == 'EXIT'
+
+    stats = counter.get_stats()
+    assert (stats['total_entered'], stats['total_exited'], stats['current_inside']) == (1, 1, 0)
@@ -0,0 +1,31 @@
+from core.event_buffer import EventBuffer
+
+
+def fill(buffer, n):
+    for i in range(n):
+        buffer.append({'track_id': i, 'event_type': 'ENTER'})
+
+
+def test_drop_oldest_keeps_last_capacity_events():
+    buffer = EventBuffer(capacity=3)
+    fill(buffer, 5)
+
+    events, cursor = buffer.events_since(0)
+    assert [ev['seq'] for ev in events] == [2, 3, 4]
+    assert (cursor, buffer.dropped) == (5, 2)
+
+
+def test_spill_seq_continues_after_restart(tmp_path):
+    first = EventBuffer(capacity=2, overflow_policy='spill', spill_dir=str(tmp_path))
+    fill(first, 5)
+    first.close()
+
+    second = EventBuffer(capacity=2, overflow_policy='spill', spill_dir=str(tmp_path))
+    assert second.next_seq == 3  # Seq 0..2 sudah di disk
+    assert second.events_since(0) == ([], 3)
+
+    fill(second, 5)
+    second.close()
+
+    seqs = [ev['seq'] for ev in second.read_spilled()]
+    assert seqs == sorted(set(seqs)) == list(range(6))
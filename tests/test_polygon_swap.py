@@ -0,0 +1,65 @@
+from core.counter import PeopleCounter
+from core.hysteresis import CountingStateMachine
+from core.polygon import PolygonChecker
+
+SQUARE = [[0, 0], [100, 0], [100, 100], [0, 100]]
+SHIFTED = [[100, 0], [200, 0], [200, 100], [100, 100]]
+
+
+def enter_square(counter):
+    """Track 1 masuk SQUARE (ENTER), track 2 diam di luar (x = 150)"""
+    counter.update(1, (-20, 50), 0)
+    counter.update(2, (150, 50), 0)
+    for frame in range(1, 4):
+        counter.update(1, (50, 50), frame)
+        counter.update(2, (150, 50), frame)
+
+
+def test_swap_keeps_totals_and_recomputes_inside():
+    counter = PeopleCounter(PolygonChecker(SQUARE), area_id=1)
+    enter_square(counter)
+    assert (counter.total_entered, counter.current_inside) == (1, 1)
+    pending_seq = counter.events.next_seq
+
+    version = counter.swap_polygon(PolygonChecker(SHIFTED), area_id=2)
+
+    assert version == 2
+    assert counter.area_id == 2
+    assert (counter.total_entered, counter.total_exited) == (1, 0)
+    assert not counter.is_track_inside(1)
+    assert counter.is_track_inside(2)
+    assert counter.current_inside == 1
+    assert counter.events.next_seq == pending_seq  # Geometry berubah tidak menghasilkan event
+
+    # Track berikutnya dihitung terhadap geometry baru
+    assert counter.update(2, (160, 50), 4) is None
+    assert counter.update(1, (150, 50), 4) == 'ENTER'
+    assert counter.update(2, (250, 50), 5) == 'EXIT'
+
+    stats = counter.get_stats()
+    assert (stats['total_entered'], stats['total_exited'], stats['current_inside']) == (2, 1, 1)
+
+
+def test_swap_drops_dwell_for_tracks_moved_outside():
+    counter = PeopleCounter(PolygonChecker(SQUARE))
+    enter_square(counter)
+    assert 'entered_at' in counter.tracked_objects[1]
+
+    counter.swap_polygon(PolygonChecker(SHIFTED))
+
+    assert 'entered_at' not in counter.tracked_objects[1]
+
+
+def test_swap_resets_hysteresis_candidates():
+    counter = PeopleCounter(PolygonChecker(SQUARE), state_machine=CountingStateMachine(10, 10, 2))
+    enter_square(counter)
+    assert counter.is_track_inside(1)
+
+    counter.update(1, (150, 50), 4)  # Satu observasi di luar band, belum EXIT
+    counter.swap_polygon(PolygonChecker(SHIFTED))
+
+    # Inside-state dari geometry baru, kandidat perpindahan lama dibuang
+    assert counter.is_track_inside(1)
+    assert counter.tracked_objects[1]['candidate_frames'] == 0
+    assert counter.update(1, (150, 50), 5) is None
+    assert counter.total_exited == 0
@@ -0,0 +1,87 @@
+from starlette.requests import Request
+
+import api_app
+from core import response_cache as response_cache_module
+from core.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_request(**headers):
+    return Request({
+        'type': 'http',
+        'method': 'GET',
+        'path': '/',
+        'headers': [(k.replace('_', '-').encode(), v.encode()) for k, v in headers.items()]
+    })
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.set(('a',), 1)
+    cache.set(('b',), 2)
+
+    assert cache.get(('a',)) is not None  # 'a' jadi paling baru dipakai
+    cache.set(('c',), 3)
+
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',))['body'] == b'1'
+    assert cache.get(('c',))['body'] == b'3'
+
+
+def test_ttl_expiry_per_namespace(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache_module.time, 'monotonic', clock)
+
+    cache = ResponseCache(ttls={'polygon': 60}, default_ttl=5)
+    cache.set(('polygon', 1), {'id': 1})
+    cache.set(('stats',), {'total': 3})
+
+    clock.now += 5
+    assert cache.get(('stats',)) is None
+    assert cache.get(('polygon', 1)) is not None
+
+    clock.now += 55
+    assert cache.get(('polygon', 1)) is None
+
+    loads = []
+    entry = cache.get_or_load(('polygon', 1), lambda: loads.append(1) or {'id': 1})
+    assert loads == [1] and entry['body'] == b'{"id":1}'
+
+
+def test_etag_returns_304(monkeypatch):
+    monkeypatch.setattr(api_app, 'response_cache', ResponseCache())
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {'id': 3}
+
+    first = api_app.cached_response(make_request(), ('polygon', 3), load)
+    assert first.status_code == 200
+    assert first.body == b'{"id":3}'
+    etag = first.headers['etag']
+
+    second = api_app.cached_response(make_request(if_none_match=etag), ('polygon', 3), load)
+    assert second.status_code == 304
+    assert second.headers['etag'] == etag
+    assert loads == [1]  # Response kedua dari cache
+
+    stale = api_app.cached_response(make_request(if_none_match='"other"'), ('polygon', 3), load)
+    assert stale.status_code == 200
+
+
+def test_unchanged_body_keeps_etag_and_last_modified():
+    cache = ResponseCache()
+    first = cache.set(('polygon', 1), {'id': 1})
+    second = cache.set(('polygon', 1), {'id': 1})
+
+    assert second['etag'] == first['etag']
+    assert second['last_modified'] == first['last_modified']
+    assert ResponseCache.is_not_modified(second, if_none_match='W/' + first['etag'])
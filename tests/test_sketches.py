@@ -0,0 +1,35 @@
+import numpy as np
+
+from core.sketches import DDSketch, HyperLogLog
+
+
+def test_ddsketch_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(0).exponential(60, 10000)
+    sketch = DDSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.99):
+        exact = np.quantile(values, q, method='lower')
+        assert abs(sketch.quantile(q) - exact) <= 0.02 * exact
+
+
+def test_hyperloglog_merge_matches_union():
+    a, b, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        a.add(i)
+        union.add(i)
+    for i in range(2000, 5000):
+        b.add(i)
+        union.add(i)
+
+    merged = HyperLogLog.from_bytes(a.to_bytes())
+    merged.merge(b)
+
+    assert merged.count() == union.count()
+    assert abs(merged.count() - 5000) <= 0.05 * 5000
+
+    # Track yang sama terlihat ulang tidak menambah hitungan
+    before = merged.count()
+    merged.add(42)
+    assert merged.count() == before
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from core.trajectory import TrajectoryRecorder, decode_trajectory
+
+
+def test_round_trip():
+    recorder = TrajectoryRecorder()
+    path = [(10, (50, 60), (40, 40, 60, 80)),
+            (11, (52, 61), (42, 41, 62, 81)),
+            (14, (47, 70), (37, 50, 57, 90))]
+    for frame, centroid, bbox in path:
+        recorder.record(7, frame, centroid, bbox)
+
+    trajectory = recorder.finish(7)
+    assert (trajectory['start_frame'], trajectory['end_frame'], trajectory['num_points']) == (10, 14, 3)
+
+    decoded = decode_trajectory(trajectory['data'])
+    assert decoded['frames'].tolist() == [10, 11, 14]
+    assert decoded['centroids'].tolist() == [list(c) for _, c, _ in path]
+    assert decoded['bboxes'].tolist() == [list(b) for _, _, b in path]
+
+
+def test_single_point_track():
+    recorder = TrajectoryRecorder()
+    recorder.record(1, 5, (100, 200), (90, 180, 110, 220))
+
+    trajectory = recorder.finish(1)
+    assert trajectory['num_points'] == 1
+
+    decoded = decode_trajectory(trajectory['data'])
+    assert decoded['frames'].tolist() == [5]
+    assert decoded['centroids'].tolist() == [[100, 200]]
+    assert decoded['bboxes'].tolist() == [[90, 180, 110, 220]]
+
+
+def test_large_jump_clamps_to_int16():
+    recorder = TrajectoryRecorder()
+    recorder.record(1, 0, (30000, 0), (0, 0, 10, 10))
+    recorder.record(1, 1, (-30000, 0), (0, 0, 10, 10))  # Delta -60000 di luar int16
+    recorder.record(1, 2, (40000, 0), (0, 0, 10, 10))  # Koordinat di luar int16
+
+    decoded = decode_trajectory(recorder.finish(1)['data'])
+    x = decoded['centroids'][:, 0].tolist()
+
+    # Delta di-clamp (bukan wrap-around), jadi arah gerak tetap benar
+    assert x[0] == 30000
+    assert x[1] == 30000 - 32768
+    assert x[2] == x[1] + 32767
+
+
+def test_frame_gap_clamps_to_uint16():
+    recorder = TrajectoryRecorder()
+    recorder.record(1, 0, (0, 0), (0, 0, 1, 1))
+    recorder.record(1, 100000, (0, 0), (0, 0, 1, 1))
+
+    decoded = decode_trajectory(recorder.finish(1)['data'])
+    assert decoded['frames'].tolist() == [0, 0xFFFF]
+
+
+def test_max_points_closes_trajectory():
+    recorder = TrajectoryRecorder(max_points=3)
+    closed = [recorder.record(1, frame, (frame, frame), (0, 0, 1, 1)) for frame in range(4)]
+
+    assert closed[:2] == [None, None]
+    assert closed[2]['num_points'] == 3
+    assert np.array_equal(decode_trajectory(closed[2]['data'])['frames'], [0, 1, 2])
+
+    # Track melanjutkan di trajectory baru
+    assert recorder.finish(1)['start_frame'] == 3
+
+
+def test_rejects_foreign_blob():
+    with pytest.raises(ValueError):
+        decode_trajectory(b'XXXX' + bytes(28))
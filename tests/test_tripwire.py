@@ -0,0 +1,82 @@
+import numpy as np
+
+from core.polygon import PolygonChecker
+from core.tripwire import TripwireCounter, segment_crossings
+
+# Garis horizontal A -> B ke kanan: sisi kanan di layar (y ke bawah) adalah bawah garis
+LINE = [[[0, 50], [100, 50]]]
+
+
+def crossing(counter, track_id, start, end):
+    counter.update_batch([track_id], [start], 1)
+    return counter.update_batch([track_id], [end], 2).get(track_id)
+
+
+def test_moving_to_right_side_of_line_is_in():
+    counter = TripwireCounter(LINE)
+
+    assert crossing(counter, 1, (50, 20), (50, 80)) == 'IN'
+    stats = counter.get_stats()
+    assert (stats['total_entered'], stats['total_exited']) == (1, 0)
+    assert stats['lines'] == [{'in': 1, 'out': 0}]
+
+
+def test_moving_to_left_side_of_line_is_out():
+    counter = TripwireCounter(LINE)
+
+    assert crossing(counter, 1, (50, 80), (50, 20)) == 'OUT'
+    stats = counter.get_stats()
+    assert (stats['total_entered'], stats['total_exited']) == (0, 1)
+    assert stats['lines'] == [{'in': 0, 'out': 1}]
+
+
+def test_no_event_without_crossing():
+    counter = TripwireCounter(LINE)
+
+    assert crossing(counter, 1, (50, 20), (60, 40)) is None  # Belum sampai garis
+    assert crossing(counter, 2, (150, 20), (150, 80)) is None  # Di luar ujung garis
+    assert counter.get_stats()['total_entered'] == 0
+
+
+def test_reversed_line_swaps_direction():
+    counter = TripwireCounter([[[100, 50], [0, 50]]])
+
+    assert crossing(counter, 1, (50, 20), (50, 80)) == 'OUT'
+
+
+def test_polygon_edges_count_entering_polygon_as_in():
+    # Titik polygon searah dan berlawanan jarum jam harus memberi arah yang sama
+    for points in ([[0, 0], [100, 0], [100, 100], [0, 100]], [[0, 0], [0, 100], [100, 100], [100, 0]]):
+        counter = TripwireCounter(None, polygon_checker=PolygonChecker(points))
+
+        assert crossing(counter, 1, (-20, 50), (20, 50)) == 'IN'
+        assert crossing(counter, 2, (50, 80), (50, 120)) == 'OUT'
+        assert counter.is_track_inside(1) and not counter.is_track_inside(2)
+
+
+def test_crossing_point_is_interpolated():
+    t, direction = segment_crossings(np.array([[50.0, 20.0]]), np.array([[50.0, 80.0]]),
+                                     np.asarray(LINE, dtype=np.float64))
+
+    assert t[0, 0] == 0.5
+    assert direction[0, 0] == 1
+
+
+def test_movement_through_shared_vertex_counts_once():
+    counter = TripwireCounter(None, polygon_checker=PolygonChecker([[0, 0], [100, 0], [100, 100], [0, 100]]))
+
+    # Diagonal tepat lewat vertex (0, 0), yang dimiliki dua edge
+    assert crossing(counter, 1, (-20, -20), (20, 20)) == 'IN'
+    assert counter.get_stats()['total_entered'] == 1
+
+
+def test_out_event_carries_dwell_since_in():
+    counter = TripwireCounter(LINE)
+    counter.update_batch([1], [(50, 20)], 1)
+    counter.update_batch([1], [(50, 80)], 2)
+    counter.update_batch([1], [(50, 20)], 3)
+
+    events, _ = counter.events_since(0)
+    assert [ev['event_type'] for ev in events] == ['IN', 'OUT']
+    assert events[0]['dwell_seconds'] is None
+    assert events[1]['dwell_seconds'] >= 0
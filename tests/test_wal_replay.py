@@ -0,0 +1,118 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from core.sketches import HyperLogLog
+from database.durable_writer import DurableWriter
+from database.sqlite_manager import SQLiteManager
+
+TABLES = ('people_counting', 'detections', 'counting_summary', 'track_trajectories', 'visitor_sketches')
+
+
+class WalConfig:
+    WAL_FSYNC_INTERVAL = 0.5
+    WAL_FSYNC_BATCH = 50
+    WAL_REPLAY_BATCH = 200
+    WAL_REPLAY_INTERVAL = 3600  # Replay hanya lewat pemanggilan langsung di test
+    DB_BREAKER_FAILURES = 3
+    DB_BREAKER_RESET = 30
+
+    def __init__(self, wal_dir):
+        self.WAL_DIR = wal_dir
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = SQLiteManager(str(tmp_path / 'people_counting.db'))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def writer(tmp_path, db):
+    durable = DurableWriter(db, WalConfig(str(tmp_path / 'wal')))
+    yield durable
+    durable.close()
+
+
+def dump_tables(db):
+    """Isi semua tabel WAL tanpa kolom id autoincrement"""
+    dump = {}
+    for table in TABLES:
+        rows = db.connection.execute(f"SELECT * FROM {table}").fetchall()
+        dump[table] = sorted(tuple(v for k, v in zip(row.keys(), row) if k != 'id') for row in rows)
+    return dump
+
+
+def write_records(writer, area_id):
+    writer.save_counting_event(area_id, 1, 'ENTER', 10, 'test.mp4', datetime(2026, 1, 1, 9, 0, 0))
+    writer.save_counting_event(area_id, 1, 'EXIT', 40, 'test.mp4', datetime(2026, 1, 1, 9, 0, 5))
+    writer.save_detection(2, area_id, (10, 20, 30, 60), (20, 40), 0.9, True, 30, 'test.mp4')
+    writer.update_summary(area_id, 1, 0, 1)
+    writer.update_summary(area_id, 1, 1, 0)
+    writer.save_trajectory(area_id, {
+        'uid': 'a' * 32, 'track_id': 1, 'start_frame': 10, 'end_frame': 40, 'num_points': 2,
+        'started_at': '2026-01-01 09:00:00', 'ended_at': '2026-01-01 09:00:05', 'data': b'\x01\x02'
+    }, 'test.mp4')
+    if area_id is not None:
+        # UniqueVisitorCounter tidak menyimpan sketch polygon default (tanpa area)
+        sketch = HyperLogLog(precision=4)
+        for track_id in range(5):
+            sketch.add(track_id)
+        writer.save_visitor_sketch('cam-01', area_id, datetime(2026, 1, 1, 9), sketch.to_bytes())
+    writer.wal.sync(force=True)
+
+
+@pytest.mark.parametrize('with_area', [True, False])
+def test_replaying_same_batch_twice_gives_identical_rows(db, writer, with_area):
+    area_id = db.create_polygon('area', None, [[0, 0], [10, 0], [10, 10]]) if with_area else None
+    write_records(writer, area_id)
+
+    records, _ = writer.wal.read_batch(1000)
+    assert len(records) == (7 if with_area else 6)
+
+    db.apply_wal_batch(records)
+    first = dump_tables(db)
+    db.apply_wal_batch(records)
+    assert dump_tables(db) == first
+
+    assert len(first['people_counting']) == 2
+    assert len(first['detections']) == 1
+    assert len(first['counting_summary']) == 1
+    assert first['counting_summary'][0][3:6] == (1, 1, 0)
+
+
+def test_replay_after_uncommitted_batch_does_not_duplicate(db, writer):
+    area_id = db.create_polygon('area', None, [[0, 0], [10, 0], [10, 10]])
+    write_records(writer, area_id)
+
+    # Batch sudah masuk database tapi checkpoint belum di-commit (mis. crash di antaranya)
+    records, _ = writer.wal.read_batch(1000)
+    db.apply_wal_batch(records)
+    before = dump_tables(db)
+
+    assert writer.flush()
+    assert dump_tables(db) == before
+    assert writer.wal.read_batch(1000)[0] == []
+
+
+def test_records_for_deleted_polygon_are_quarantined(db, writer):
+    area_id = db.create_polygon('area', None, [[0, 0], [10, 0], [10, 10]])
+    write_records(writer, area_id)
+    db.delete_polygon(area_id, hard_delete=True)
+    # Record berikutnya (polygon default) tidak boleh ikut tertahan
+    writer.save_counting_event(None, 5, 'ENTER', 50, 'test.mp4')
+    writer.wal.sync(force=True)
+
+    assert writer.flush()
+
+    events = db.connection.execute("SELECT polygon_area_id, tracking_id FROM people_counting").fetchall()
+    assert [tuple(row) for row in events] == [(None, 5)]
+    assert writer.wal.read_batch(1000)[0] == []
+    assert writer.breaker.get_status()['state'] == 'closed'
+
+    with open(writer.wal.quarantine_path) as f:
+        quarantined = [json.loads(line)['record'] for line in f]
+    assert writer.quarantined == len(quarantined) == 7
+    assert all(record['payload']['polygon_area_id'] == area_id for record in quarantined)
@@ -0,0 +1,45 @@
+"""
+Archive Exporter - Export events dan detections ke Parquet (partisi per tanggal)
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from database.archive import ParquetArchiver
+from database.factory import create_database_manager
+
+
+def main():
+    import argparse
+
+    config = Config()
+
+    parser = argparse.ArgumentParser(description='Export closed days to Parquet archive')
+    parser.add_argument('--once', action='store_true', help='Export once and exit')
+    parser.add_argument('--dir', type=str, default=config.ARCHIVE_DIR, help='Archive directory')
+    parser.add_argument('--interval', type=int, default=config.ARCHIVE_INTERVAL,
+                        help='Seconds between exports (loop mode)')
+
+    args = parser.parse_args()
+
+    db = create_database_manager(config)
+    archiver = ParquetArchiver(db, args.dir, compression=config.ARCHIVE_COMPRESSION,
+                               grace_hours=config.ARCHIVE_GRACE_HOURS, wal_dir=config.WAL_DIR)
+
+    try:
+        if args.once:
+            exported = archiver.export_closed_ranges()
+            print(f"✅ Archive updated: {exported}")
+        else:
+            archiver.run_forever(args.interval)
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted by user")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Autotune - Benchmark kombinasi thread torch, imgsz, channels_last dan torch.compile
+pada sample frame dari video source, lalu simpan profile terbaik untuk main.py / api_app.py
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import itertools
+import json
+import subprocess
+import tempfile
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from config.config import Config
+from core.inference_profile import (PROFILE_KEYS, apply_profile, benchmark, describe_profile,
+                                    prepare_model, save_profile, select_profile)
+from core.model_manager import detect_device, load_yolo
+
+
+def capture_frames(source, count, stride):
+    """
+    Ambil sample frame dari source (setiap stride frame, supaya isi scene bervariasi)
+    """
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video source: {source}")
+
+    frames = []
+    index = 0
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % stride == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+
+    if not frames:
+        raise RuntimeError(f"No frames read from video source: {source}")
+    return frames
+
+
+def candidate_profiles(threads, interop, imgsz, channels_last, compile_options):
+    for t, i, size, cl, comp in itertools.product(threads, interop, imgsz, channels_last, compile_options):
+        yield dict(zip(PROFILE_KEYS, (t, i, size, cl, comp)))
+
+
+def run_candidate(profile, frames_path, runs):
+    """
+    Benchmark satu profile di proses terpisah: thread torch (terutama inter-op)
+    hanya bisa di-set sekali per proses, dan torch.compile tidak bocor ke kandidat lain
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker', json.dumps(profile),
+           '--frames-file', frames_path, '--runs', str(runs)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=900)
+    except subprocess.TimeoutExpired:
+        return None, "timeout"
+
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        error = proc.stderr.strip().splitlines()
+        return None, error[-1] if error else f"exit code {proc.returncode}"
+    return json.loads(lines[-1]), None
+
+
+def worker(profile, frames_path, runs):
+    config = Config()
+    frames = list(np.load(frames_path)['frames'])
+
+    apply_profile(profile)
+    model = prepare_model(load_yolo(config.YOLO_MODEL, detect_device()), profile)
+    latency = benchmark(model, frames, profile, config, runs=runs)
+
+    # Baris terakhir stdout dibaca proses utama
+    print(json.dumps(latency))
+
+
+def parse_list(value, cast=int):
+    return [cast(v) for v in value.split(',') if v.strip()]
+
+
+def main():
+    import argparse
+
+    config = Config()
+    cpus = os.cpu_count() or 1
+
+    parser = argparse.ArgumentParser(description='Benchmark inference settings and save the best profile')
+    parser.add_argument('--source', type=str, default=config.VIDEO_SOURCE, help='Video source for sample frames')
+    parser.add_argument('--frames', type=int, default=20, help='Number of sample frames')
+    parser.add_argument('--stride', type=int, default=10, help='Take every N-th frame from the source')
+    parser.add_argument('--runs', type=int, default=20, help='Timed inferences per candidate')
+    parser.add_argument('--threads', type=str, default=','.join(str(t) for t in sorted({max(1, cpus // 2), cpus})),
+                        help='Comma separated torch intra-op thread counts')
+    parser.add_argument('--interop', type=str, default='1,2', help='Comma separated inter-op thread counts')
+    parser.add_argument('--imgsz', type=str, default='320,416,512,640', help='Comma separated input sizes')
+    parser.add_argument('--compile', action='store_true', help='Also try torch.compile (slow to benchmark)')
+    parser.add_argument('--target-ms', type=float, default=config.INFERENCE_LATENCY_TARGET_MS,
+                        help='p95 latency target per frame (ms)')
+    parser.add_argument('--output', type=str, default=config.INFERENCE_PROFILE_PATH, help='Profile output path')
+    parser.add_argument('--worker', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--frames-file', type=str, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(json.loads(args.worker), args.frames_file, args.runs)
+        return
+
+    print(f"🎥 Capturing {args.frames} sample frames from {args.source}")
+    frames = capture_frames(args.source, args.frames, args.stride)
+
+    candidates = list(candidate_profiles(parse_list(args.threads), parse_list(args.interop),
+                                         parse_list(args.imgsz), [False, True],
+                                         [False, True] if args.compile else [False]))
+    print(f"🔧 Benchmarking {len(candidates)} candidate profiles ({config.YOLO_MODEL})")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        frames_path = os.path.join(tmp, 'frames.npz')
+        np.savez(frames_path, frames=np.stack(frames))
+
+        try:
+            for n, profile in enumerate(candidates, 1):
+                latency, error = run_candidate(profile, frames_path, args.runs)
+                if latency is None:
+                    print(f"  [{n}/{len(candidates)}] ❌ {describe_profile(profile)}: {error}")
+                    continue
+                print(f"  [{n}/{len(candidates)}] {describe_profile(profile)}: "
+                      f"p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms")
+                results.append({**profile, 'latency_ms': latency})
+        except KeyboardInterrupt:
+            print("\n⚠️ Interrupted by user, selecting from the candidates benchmarked so far")
+
+    best, meets_target = select_profile(results, args.target_ms)
+
+    if best is None:
+        print("❌ No candidate profile could be benchmarked")
+        sys.exit(1)
+
+    if not meets_target:
+        print(f"⚠️ No profile meets the {args.target_ms:.0f} ms target, saving the fastest one")
+
+    best.update({
+        'model': config.YOLO_MODEL,
+        'device': detect_device(),
+        'latency_target_ms': args.target_ms,
+        'meets_target': meets_target,
+        'frame_shape': list(frames[0].shape),
+        'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    })
+    save_profile(best, args.output)
+    print(f"✅ Saved profile to {args.output}: {describe_profile(best)}, p95 {best['latency_ms']['p95']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Frame Ingest - Decode video source sekali dan publish setiap frame ke frame bus
+(shared memory), supaya main.py, api_app.py dan polygon_editor.py berbagi satu
+koneksi / decode per kamera
+
+    python tools/frame_ingest.py --backend pyav
+    CAPTURE_BACKEND=framebus python main.py
+    CAPTURE_BACKEND=framebus uvicorn api_app:app
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import signal
+import time
+
+from config.config import Config
+from core.backoff import Backoff
+from core.capture import open_capture
+from core.frame_bus import FrameBusWriter, bus_name
+
+
+def open_source(config):
+    """
+    Buka source sampai berhasil (reconnect dengan backoff)
+    """
+    backoff = Backoff(config.RECONNECT_BACKOFF_BASE, config.RECONNECT_BACKOFF_MAX)
+    while True:
+        cap = open_capture(config)
+        if cap.isOpened():
+            return cap
+        cap.release()
+        delay = backoff.next_delay()
+        print(f"⚠️ Failed to open video source, retrying in {delay:.1f}s...")
+        time.sleep(delay)
+
+
+def run(config, name, slots):
+    print(f"📡 Source: {config.VIDEO_SOURCE[:60]}...")
+    cap = open_source(config)
+    # Bus dibuat sesuai frame pertama (CAPTURE_WIDTH / CAPTURE_HEIGHT diterapkan di sini, bukan di reader)
+    ret, frame = cap.read()
+    while not ret:
+        cap.release()
+        cap = open_source(config)
+        ret, frame = cap.read()
+
+    height, width = frame.shape[:2]
+    try:
+        writer = FrameBusWriter(name, width, height, frame.shape[2], slots, cap.source_size)
+    except RuntimeError as e:
+        # Ingest lain masih menulis ke bus yang sama
+        print(f"❌ {e}")
+        cap.release()
+        return
+    print(f"✅ Frame bus {name} ready ({config.CAPTURE_BACKEND}, {cap.source_size[0]}x{cap.source_size[1]} -> "
+          f"{width}x{height}, {slots} slots)")
+
+    reconnect_backoff = Backoff(config.RECONNECT_BACKOFF_BASE, config.RECONNECT_BACKOFF_MAX)
+    published = 0
+    report_at = time.time()
+
+    try:
+        while True:
+            if not ret:
+                delay = reconnect_backoff.next_delay()
+                print(f"⚠️ Stream interrupted, reconnecting in {delay:.1f}s...")
+                cap.release()
+                time.sleep(delay)
+                cap = open_source(config)
+                ret, frame = cap.read()
+                continue
+            reconnect_backoff.reset()
+
+            writer.publish(frame, cap.pts)
+            published += 1
+
+            now = time.time()
+            if now - report_at >= 30:
+                print(f"📊 Published {published} frames ({published / (now - report_at):.1f} fps)")
+                published, report_at = 0, now
+
+            ret, frame = cap.read()
+    finally:
+        cap.release()
+        writer.close()
+        print(f"✅ Frame bus {name} closed")
+
+
+def handle_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    """
+    Main function untuk menjalankan frame ingest
+    """
+    import argparse
+
+    config = Config()
+
+    parser = argparse.ArgumentParser(description='Decode a camera once and publish frames to shared memory')
+    parser.add_argument('--source', '-s', type=str, default=None,
+                        help='Video source (URL or file path). If not provided, uses config.')
+    parser.add_argument('--backend', type=str, default=config.FRAME_BUS_BACKEND,
+                        choices=['opencv', 'pyav', 'hls'], help='Capture backend used to decode the source')
+    parser.add_argument('--name', type=str, default=None,
+                        help='Shared memory name (default: FRAME_BUS_NAME or pc_frames_<CAMERA_ID>)')
+    parser.add_argument('--slots', type=int, default=config.FRAME_BUS_SLOTS, help='Ring buffer slots')
+
+    args = parser.parse_args()
+
+    if args.source:
+        config.VIDEO_SOURCE = args.source
+    config.CAPTURE_BACKEND = args.backend
+    name = args.name or config.FRAME_BUS_NAME or bus_name(config.CAMERA_ID)
+
+    # SIGTERM (systemd / docker stop) lewat jalur cleanup yang sama dengan Ctrl+C: shared memory di-unlink
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    try:
+        run(config, name, max(2, args.slots))
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted by user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+HLS Test Server - Live HLS lokal dengan segment sintetis dan simulasi gangguan,
+untuk menguji CAPTURE_BACKEND = 'hls' (core/hls_ingest.py) tanpa CCTV asli
+
+    python tools/hls_test_server.py --port 8088 --outage-every 60 --outage-duration 8
+    VIDEO_SOURCE=http://127.0.0.1:8088/live.m3u8 CAPTURE_BACKEND=hls python main.py
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+
+def render_frame(seq, index, fps, width, height):
+    """
+    Frame sintetis: kotak bergerak + nomor segment / frame (supaya gap terlihat di viewer)
+    """
+    frame = np.full((height, width, 3), 40, dtype=np.uint8)
+    t = seq * 1000 + index
+    x = int((t * 4) % max(width - 60, 1))
+    cv2.rectangle(frame, (x, height // 2 - 60), (x + 60, height // 2 + 60), (0, 200, 255), -1)
+    cv2.putText(frame, f"seg {seq} frame {index}/{fps}", (20, 40),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+    return frame
+
+
+def encode_segment_pyav(seq, duration, fps, width, height):
+    import io
+    import av
+
+    buffer = io.BytesIO()
+    container = av.open(buffer, 'w', format='mpegts')
+    stream = container.add_stream('mpeg2video', rate=fps)
+    stream.width, stream.height, stream.pix_fmt = width, height, 'yuv420p'
+    stream.gop_size = int(fps * duration)  # Satu keyframe di awal setiap segment
+
+    for i in range(int(fps * duration)):
+        frame = av.VideoFrame.from_ndarray(render_frame(seq, i, fps, width, height), format='bgr24')
+        frame.pts = seq * int(fps * duration) + i
+        for packet in stream.encode(frame):
+            container.mux(packet)
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+    return buffer.getvalue()
+
+
+def encode_segment_opencv(seq, duration, fps, width, height):
+    # Tanpa PyAV: segment MJPEG/AVI (cukup untuk HLSIngest + decoder OpenCV, bukan player HLS umum)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'segment.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+        for i in range(int(fps * duration)):
+            writer.write(render_frame(seq, i, fps, width, height))
+        writer.release()
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+class LiveHLS:
+    """
+    Playlist live sliding window: segment ke-n tersedia setelah (n + 1) * duration detik
+    """
+
+    def __init__(self, duration=2.0, window=5, fps=10, width=640, height=360,
+                 outage_every=0, outage_duration=0, error_rate=0.0):
+        self.duration = duration
+        self.window = window
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.outage_every = outage_every
+        self.outage_duration = outage_duration
+        self.error_rate = error_rate
+
+        try:
+            import av  # noqa: F401
+            self.encoder, self.extension = encode_segment_pyav, 'ts'
+        except ImportError:
+            self.encoder, self.extension = encode_segment_opencv, 'avi'
+
+        self.started_at = time.time()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def current_seq(self):
+        return int((time.time() - self.started_at) / self.duration)
+
+    def in_outage(self):
+        if not self.outage_every:
+            return False
+        return (time.time() - self.started_at) % self.outage_every >= self.outage_every - self.outage_duration
+
+    def playlist(self):
+        last = self.current_seq() - 1
+        first = max(0, last - self.window + 1)
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3',
+                 f'#EXT-X-TARGETDURATION:{int(np.ceil(self.duration))}',
+                 f'#EXT-X-MEDIA-SEQUENCE:{first}']
+        for seq in range(first, last + 1):
+            lines += [f'#EXTINF:{self.duration:.3f},', f'seg_{seq}.{self.extension}']
+        return '\n'.join(lines) + '\n'
+
+    def segment(self, seq):
+        if seq < 0 or seq >= self.current_seq():
+            return None
+        with self._lock:
+            data = self._cache.get(seq)
+            if data is None:
+                data = self._cache[seq] = self.encoder(seq, self.duration, self.fps, self.width, self.height)
+                while len(self._cache) > self.window * 2:
+                    self._cache.popitem(last=False)
+            return data
+
+
+def make_handler(live):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if live.in_outage() or random.random() < live.error_rate:
+                self.send_error(503, "Simulated outage")
+                return
+
+            path = self.path.split('?')[0].lstrip('/')
+            if path == 'live.m3u8':
+                self._reply(live.playlist().encode(), 'application/vnd.apple.mpegurl')
+            elif path.startswith('seg_'):
+                try:
+                    data = live.segment(int(path[4:].split('.')[0]))
+                except ValueError:
+                    data = None
+                if data is None:
+                    self.send_error(404)
+                else:
+                    self._reply(data, 'video/mp2t' if path.endswith('.ts') else 'video/x-msvideo')
+            else:
+                self.send_error(404)
+
+        def _reply(self, body, content_type):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve a generated live HLS stream with simulated outages')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--duration', type=float, default=2.0, help='Segment duration (seconds)')
+    parser.add_argument('--window', type=int, default=5, help='Segments in the live playlist')
+    parser.add_argument('--fps', type=int, default=10)
+    parser.add_argument('--size', type=str, default='640x360', help='WIDTHxHEIGHT')
+    parser.add_argument('--outage-every', type=float, default=0, help='Simulate an outage every N seconds (0 = off)')
+    parser.add_argument('--outage-duration', type=float, default=5, help='Outage length (seconds)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    live = LiveHLS(args.duration, args.window, args.fps, width, height,
+                   args.outage_every, args.outage_duration if args.outage_every else 0, args.error_rate)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(live))
+
+    print(f"✅ Serving live HLS ({live.extension} segments) at http://{args.host}:{args.port}/live.m3u8")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted by user")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,9 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.db_manager import DatabaseManager
+from database.factory import create_database_manager
 from config.config import Config
+from core.capture import open_capture
 
 
 class PolygonEditor:
@@ -20,10 +21,11 @@ class PolygonEditor:
         self.drawing = False
         self.frame = None
         self.original_frame = None
+        self.frame_scale = (1.0, 1.0)  # output / source capture, titik disimpan dalam koordinat source
         self.polygon_name = ""
         self.polygon_description = ""
         self.window_name = "Polygon Editor - Click to add points | Press 'h' for help"
-        self.db = DatabaseManager()
+        self.db = create_database_manager(self.config)
         self.color_point = (0, 255, 0)  # Green
         self.color_line = (255, 0, 0)  # Blue
         self.color_polygon = (0, 255, 255)  # Yellow
@@ -115,10 +117,12 @@ class PolygonEditor:
         print("=" * 70 + "\n")
 
     def capture_frame(self):
-        print(f"📹 Capturing frame from: {self.video_source[:60]}...")
+        if self.config.CAPTURE_BACKEND == 'framebus':
+            print("📹 Capturing frame from frame bus...")
+        else:
+            print(f"📹 Capturing frame from: {self.video_source[:60]}...")
 
-        cap = cv2.VideoCapture(self.video_source)
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        cap = open_capture(self.config, self.video_source)
 
         if not cap.isOpened():
             print("❌ Failed to open video source!")
@@ -135,6 +139,7 @@ class PolygonEditor:
 
         self.original_frame = frame.copy()
         self.frame = frame.copy()
+        self.frame_scale = cap.scale
 
         cap.release()
 
@@ -169,26 +174,17 @@ class PolygonEditor:
         self.get_polygon_info()
 
         coordinates = {
-            "points": [{"x": int(p[0]), "y": int(p[1])} for p in self.points]
+            "points": [{"x": int(round(p[0] / self.frame_scale[0])), "y": int(round(p[1] / self.frame_scale[1]))}
+                       for p in self.points]
         }
 
         try:
-            cursor = self.db.connection.cursor()
-
-            query = """
-                INSERT INTO polygon_areas (name, coordinates, description, is_active)
-                VALUES (%s, %s, %s, TRUE)
-            """
-
-            cursor.execute(query, (
+            polygon_id = self.db.create_polygon(
                 self.polygon_name,
-                json.dumps(coordinates),
-                self.polygon_description
-            ))
-
-            self.db.connection.commit()
-            polygon_id = cursor.lastrowid
-            cursor.close()
+                self.polygon_description,
+                coordinates,
+                is_active=True
+            )
 
             print("\n" + "=" * 70)
             print("✅ POLYGON SAVED TO DATABASE!")
@@ -231,15 +227,7 @@ class PolygonEditor:
 
     def load_existing_polygons(self):
         try:
-            cursor = self.db.connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT id, name, coordinates, description, is_active, created_at
-                FROM polygon_areas
-                ORDER BY created_at DESC
-            """)
-
-            polygons = cursor.fetchall()
-            cursor.close()
+            polygons = self.db.list_polygons()
 
             if not polygons:
                 print("ℹ️ No existing polygons found in database")
@@ -251,7 +239,7 @@ class PolygonEditor:
 
             for poly in polygons:
                 status = "✅ Active" if poly['is_active'] else "❌ Inactive"
-                coords = json.loads(poly['coordinates'])
+                coords = poly['coordinates']
                 num_points = len(coords['points'])
 
                 print(f"\nID: {poly['id']} | {status}")
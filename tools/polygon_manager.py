@@ -4,29 +4,22 @@ Polygon Manager - List, View, Delete polygons
 
 import sys
 import os
-import json
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.db_manager import DatabaseManager
+from database.factory import create_database_manager
+from core.polygon_registry import PolygonRegistry
 
 
 class PolygonManager:
     def __init__(self):
-        self.db = DatabaseManager()
+        self.db = create_database_manager()
 
     def list_polygons(self):
         """List all polygons"""
         try:
-            cursor = self.db.connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT id, name, coordinates, description, is_active, created_at, updated_at
-                FROM polygon_areas
-                ORDER BY created_at DESC
-            """)
-
-            polygons = cursor.fetchall()
-            cursor.close()
+            registry = PolygonRegistry(self.db, poll_interval=0)
+            polygons = registry.list()
 
             if not polygons:
                 print("ℹ️ No polygons found")
@@ -38,7 +31,7 @@ class PolygonManager:
 
             for poly in polygons:
                 status = "✅ Active" if poly['is_active'] else "❌ Inactive"
-                coords = json.loads(poly['coordinates'])
+                coords = poly['coordinates']
 
                 print(f"\n[ID: {poly['id']}] {poly['name']} - {status}")
                 print(f"  Description: {poly['description']}")
@@ -46,6 +39,8 @@ class PolygonManager:
                 print(f"  Coordinates: {coords}")
                 print(f"  Created: {poly['created_at']}")
                 print(f"  Updated: {poly['updated_at']}")
+                if registry.get(poly['id'])['checker'] is None:
+                    print("  ⚠️ Invalid geometry (less than 3 points)")
                 print("-" * 80)
 
             print("=" * 80 + "\n")
@@ -56,38 +51,22 @@ class PolygonManager:
     def delete_polygon(self, polygon_id):
         """Delete polygon by ID"""
         try:
-            cursor = self.db.connection.cursor()
-            cursor.execute("DELETE FROM polygon_areas WHERE id = %s", (polygon_id,))
-            self.db.connection.commit()
-
-            if cursor.rowcount > 0:
+            if self.db.delete_polygon(polygon_id, hard_delete=True):
                 print(f"✅ Polygon ID {polygon_id} deleted")
             else:
                 print(f"⚠️ Polygon ID {polygon_id} not found")
 
-            cursor.close()
-
         except Exception as e:
             print(f"❌ Error: {e}")
 
     def toggle_active(self, polygon_id):
         """Toggle polygon active status"""
         try:
-            cursor = self.db.connection.cursor()
-            cursor.execute("""
-                UPDATE polygon_areas 
-                SET is_active = NOT is_active 
-                WHERE id = %s
-            """, (polygon_id,))
-            self.db.connection.commit()
-
-            if cursor.rowcount > 0:
+            if self.db.toggle_polygon_active(polygon_id):
                 print(f"✅ Polygon ID {polygon_id} status toggled")
             else:
                 print(f"⚠️ Polygon ID {polygon_id} not found")
 
-            cursor.close()
-
         except Exception as e:
             print(f"❌ Error: {e}")
 
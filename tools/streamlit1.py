@@ -2,6 +2,13 @@ import streamlit as st
 import requests
 import time
 import pandas as pd
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
 
 STATS_URL = 'http://localhost:8000/api/stats/live'
 GRAPH_URL = 'http://localhost:8000/api/stats/history'
@@ -21,6 +28,25 @@ if "times" in data and len(data["times"]) > 0:
     st.dataframe(df.tail(10))
 else:
     st.info("Belum ada data summary statistik di database.")
+
+# Histori panjang dibaca dari arsip Parquet (tools/archive_exporter.py), bukan query ke database
+st.title("Histori Harian (Arsip)")
+archive_days = st.slider("Lama histori arsip (hari)", 7, 365, 30)
+archive_dir = Config.ARCHIVE_DIR
+if os.path.isdir(os.path.join(archive_dir, 'events')):
+    from database.archive import query_archive
+
+    events_df = query_archive(archive_dir, 'events', columns=['event_type', 'timestamp'],
+                              start=datetime.now() - timedelta(days=archive_days))
+    if len(events_df) > 0:
+        daily = (events_df.assign(day=events_df['timestamp'].dt.floor('D'))
+                 .pivot_table(index='day', columns='event_type', values='timestamp', aggfunc='count')
+                 .fillna(0))
+        st.bar_chart(daily)
+    else:
+        st.info("Belum ada event di arsip untuk rentang ini.")
+else:
+    st.info("Arsip Parquet belum tersedia. Jalankan: python tools/archive_exporter.py --once")
 st.title("Live People Counting Dashboard")
 
 col1, col2 = st.columns(2)